@@ -0,0 +1 @@
+"""Benchmarks for the django_owm app."""
@@ -0,0 +1,42 @@
+"""Benchmark the API call counts used to enforce the rate limits, at 10k and 1M logged calls."""
+
+from datetime import timedelta
+
+import pytest
+from django.apps import apps
+from django.utils import timezone
+
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.utils.api import get_api_call_counts
+
+
+# Logged calls are spread evenly over this many days, so about two thirds fall in the 30-day window
+LOG_DAYS = 45
+
+
+def create_api_call_logs(count: int, batches: int = 100) -> None:
+    """Create ``count`` APICallLog rows spread over the last LOG_DAYS days in ``batches`` steps, newest last."""
+    APICallLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog"))
+    now = timezone.now()
+    step = timedelta(days=LOG_DAYS) / count
+    batch_size = max(count // batches, 1)
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        created_after = timezone.now()
+        APICallLog.objects.bulk_create(APICallLog(api_name="one_call") for _ in range(size))
+        # The timestamp is set on creation (auto_now_add), so move each batch back in time afterwards. Every earlier
+        # batch is already older than created_after, so only the new batch is updated.
+        APICallLog.objects.filter(timestamp__gte=created_after).update(
+            timestamp=now - (count - start - size // 2) * step
+        )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", [10_000, 1_000_000], ids=["10k", "1M"])
+def test_get_api_call_counts(benchmark, count):
+    """Benchmark get_api_call_counts(), which runs before every scheduled fetch and every bulk fetch."""
+    create_api_call_logs(count)
+
+    calls_last_minute, calls_last_month = benchmark(get_api_call_counts, "one_call")
+
+    assert 0 < calls_last_month < count
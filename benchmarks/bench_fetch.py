@@ -0,0 +1,63 @@
+"""Benchmark a whole fetch_weather run against the replay transport and the stub server."""
+
+import pytest
+from django.apps import apps
+from django.core.cache import cache
+
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.tasks import fetch_weather
+from src.django_owm.utils.transports import StubServer
+
+from .conftest import random_coordinate
+
+
+# Stays within the default quota of 60 calls per minute, which fetch_weather caps each run at
+LOCATION_COUNT = 50
+
+REPLAY_TRANSPORT = {"BACKEND": "src.django_owm.utils.transports.ReplayTransport", "OPTIONS": {"seed": 1}}
+
+
+@pytest.fixture
+def due_locations(weather_location_model, seeded_random):
+    """Create LOCATION_COUNT locations that are due to be fetched."""
+    weather_location_model.objects.bulk_create(
+        weather_location_model(
+            name=f"Location {index}",
+            latitude=random_coordinate(seeded_random, -60, 70),
+            longitude=random_coordinate(seeded_random, -180, 180),
+            timezone="UTC",
+        )
+        for index in range(LOCATION_COUNT)
+    )
+
+
+@pytest.fixture(params=["replay", "http"])
+def transport(override_owm_settings, request):
+    """Configure the API transport: the replay transport, or the default HTTP transport against the stub server."""
+    if request.param == "replay":
+        override_owm_settings(OWM_API_KEY="benchmark", OWM_API_TRANSPORT=REPLAY_TRANSPORT)
+        yield request.param
+    else:
+        with StubServer() as server:
+            override_owm_settings(OWM_API_KEY="benchmark", OWM_API_TRANSPORT=None, OWM_API_BASE_URL=server.url)
+            yield request.param
+
+
+@pytest.mark.django_db
+def test_fetch_weather(benchmark, weather_location_model, due_locations, transport):
+    """Benchmark a scheduled fetch_weather run over LOCATION_COUNT due locations, from API call to saved rows."""
+    APICallLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    runs = []
+
+    def setup():
+        # Make every location due again and reset the quota, run lock and circuit breaker
+        weather_location_model.objects.update(next_fetch_at=None)
+        APICallLog.objects.all().delete()
+        cache.clear()
+        runs.append(True)
+
+    benchmark.pedantic(fetch_weather, setup=setup, rounds=5, iterations=1)
+    benchmark.extra_info["locations"] = LOCATION_COUNT
+    # Counted from the runs made, which is a single one with --benchmark-disable
+    assert CurrentWeather.objects.count() == len(runs) * LOCATION_COUNT
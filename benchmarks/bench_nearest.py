@@ -0,0 +1,60 @@
+"""Benchmark nearest-location lookups at 100k locations."""
+
+import pytest
+
+from src.django_owm.utils.geo import haversine_km
+
+from .conftest import random_coordinate
+
+
+LOCATION_COUNT = 100_000
+
+
+@pytest.fixture
+def many_locations(weather_location_model, seeded_random):
+    """Create LOCATION_COUNT locations spread over the inhabited latitudes and return points to query."""
+    WeatherLocation = weather_location_model
+    WeatherLocation.objects.bulk_create(
+        (
+            WeatherLocation(
+                latitude=random_coordinate(seeded_random, -60, 70),
+                longitude=random_coordinate(seeded_random, -180, 180),
+            )
+            for _ in range(LOCATION_COUNT)
+        ),
+        batch_size=5000,
+    )
+    # Return a set of query points to cycle through
+    return [
+        (float(random_coordinate(seeded_random, -60, 70)), float(random_coordinate(seeded_random, -180, 180)))
+        for _ in range(50)
+    ]
+
+
+@pytest.mark.django_db
+def test_nearest_geohash(benchmark, weather_location_model, many_locations):
+    """Benchmark WeatherLocation.objects.nearest() using the geohash index."""
+    points = iter(many_locations * 1000)
+
+    def run():
+        latitude, longitude = next(points)
+        return weather_location_model.objects.nearest(latitude, longitude, k=5)
+
+    result = benchmark(run)
+    assert len(result) == 5
+
+
+@pytest.mark.django_db
+def test_nearest_full_scan(benchmark, weather_location_model, many_locations):
+    """Benchmark the previous approach of loading every location and ranking them in Python."""
+    points = iter(many_locations * 1000)
+
+    def run():
+        latitude, longitude = next(points)
+        locations = weather_location_model.objects.only("pk", "latitude", "longitude")
+        return sorted(
+            locations, key=lambda location: haversine_km(latitude, longitude, location.latitude, location.longitude)
+        )[:5]
+
+    result = benchmark.pedantic(run, rounds=5, iterations=1)
+    assert len(result) == 5
@@ -0,0 +1,149 @@
+"""Benchmark the numeric storages for measurements (``OWM_NUMERIC_STORAGE``) against each other.
+
+The weather models' schema is fixed when they are imported, so each storage gets a table of its own here, holding the
+measurement columns of ``HourlyWeather``. For each storage, this measures the time to insert rows with
+``bulk_create``, the time to read a million rows with ``values_list``, and the size of each row on disk where the
+database reports it (SQLite with the ``dbstat`` table, or PostgreSQL).
+"""
+
+import random
+
+import pytest
+from django.db import DatabaseError
+from django.db import connection
+from django.db import models
+
+from src.django_owm.models.fields import ScaledIntegerField
+
+
+COLUMNS = ("temp", "feels_like", "dew_point", "uvi", "wind_speed", "wind_gust", "pop", "rain_1h", "snow_1h")
+
+STORAGE_FIELDS = {
+    "decimal": lambda: models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True),
+    "float": lambda: models.FloatField(blank=True, null=True),
+    "scaled": lambda: ScaledIntegerField(decimal_places=2, blank=True, null=True),
+}
+
+READ_ROWS = 1_000_000
+INSERT_ROWS = 20_000
+
+
+def measurement_model(storage: str) -> type[models.Model]:
+    """Return a model with the measurement columns stored with a numeric storage."""
+    meta = type("Meta", (), {"app_label": "example", "db_table": f"bench_measurements_{storage}"})
+    attrs = {"__module__": __name__, "Meta": meta, **{column: STORAGE_FIELDS[storage]() for column in COLUMNS}}
+    return type(f"{storage.title()}Measurements", (models.Model,), attrs)
+
+
+MODELS = {storage: measurement_model(storage) for storage in STORAGE_FIELDS}
+
+
+def measurement_rows(model: type[models.Model], count: int, rng: random.Random) -> list[models.Model]:
+    """Return unsaved rows of realistic measurements, as the API returns them (floats with 2 decimal places)."""
+    rows = []
+    for _ in range(count):
+        temp = round(rng.uniform(-20, 40), 2)
+        rain = round(rng.expovariate(1), 2) if rng.random() < 0.2 else None
+        rows.append(
+            model(
+                temp=temp,
+                feels_like=round(temp - rng.uniform(0, 3), 2),
+                dew_point=round(temp - rng.uniform(0, 10), 2),
+                uvi=round(rng.uniform(0, 11), 2),
+                wind_speed=round(rng.uniform(0, 20), 2),
+                wind_gust=round(rng.uniform(0, 30), 2),
+                pop=round(rng.random(), 2),
+                rain_1h=rain,
+                snow_1h=None,
+            )
+        )
+    return rows
+
+
+def table_bytes(model: type[models.Model]) -> int | None:
+    """Return the size of a table on disk, or None if the database does not report it."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+        elif connection.vendor == "sqlite":
+            try:
+                cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [table])
+            except DatabaseError:
+                # SQLite was built without the dbstat table
+                return None
+        else:
+            return None
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture(scope="module")
+def measurement_tables(django_db_setup, django_db_blocker):
+    """Create a table for each storage."""
+    with django_db_blocker.unblock():
+        with connection.schema_editor() as editor:
+            for model in MODELS.values():
+                editor.create_model(model)
+    yield MODELS
+    with django_db_blocker.unblock():
+        with connection.schema_editor() as editor:
+            for model in MODELS.values():
+                editor.delete_model(model)
+
+
+@pytest.fixture(scope="module")
+def filled_tables(measurement_tables, django_db_blocker):
+    """Fill each table with READ_ROWS rows, recording the bytes per row."""
+    bytes_per_row = {}
+    with django_db_blocker.unblock():
+        for storage, model in measurement_tables.items():
+            model.objects.all().delete()
+            model.objects.bulk_create(measurement_rows(model, 10_000, random.Random(1234)), batch_size=1000)
+            # Double the rows with INSERT ... SELECT until there are enough
+            table = connection.ops.quote_name(model._meta.db_table)
+            columns = ", ".join(connection.ops.quote_name(column) for column in COLUMNS)
+            while model.objects.count() < READ_ROWS:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}")  # noqa: S608
+            size = table_bytes(model)
+            bytes_per_row[storage] = size / model.objects.count() if size else None
+    yield bytes_per_row
+    with django_db_blocker.unblock():
+        for model in measurement_tables.values():
+            model.objects.all().delete()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("storage", STORAGE_FIELDS)
+def test_insert(benchmark, measurement_tables, storage):
+    """Benchmark inserting rows with bulk_create, as saving weather data does."""
+    model = measurement_tables[storage]
+    rng = random.Random(1234)
+
+    def setup():
+        model.objects.all().delete()
+        return (measurement_rows(model, INSERT_ROWS, rng),), {}
+
+    benchmark.pedantic(lambda rows: model.objects.bulk_create(rows, batch_size=1000), setup=setup, rounds=5)
+    benchmark.extra_info["rows"] = INSERT_ROWS
+
+    assert model.objects.count() == INSERT_ROWS
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("storage", STORAGE_FIELDS)
+def test_bulk_read(benchmark, measurement_tables, filled_tables, storage):
+    """Benchmark reading every measurement of a million or more rows, as exports and charts do."""
+    model = measurement_tables[storage]
+
+    def read():
+        rows = 0
+        for _ in model.objects.values_list(*COLUMNS).iterator(chunk_size=10_000):
+            rows += 1
+        return rows
+
+    rows = benchmark.pedantic(read, rounds=3)
+    benchmark.extra_info["rows"] = rows
+    benchmark.extra_info["bytes_per_row"] = filled_tables[storage]
+
+    assert rows >= READ_ROWS
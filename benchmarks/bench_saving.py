@@ -0,0 +1,66 @@
+"""Benchmark saving a full One Call API response for a location."""
+
+import pytest
+from django.apps import apps
+
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.utils.saving import count_weather_rows
+from src.django_owm.utils.saving import save_weather_data
+from src.django_owm.utils.snapshots import store_weather_data
+
+
+@pytest.mark.django_db
+def test_save_weather_data(benchmark, weather_location_model, one_call_payload):
+    """Benchmark save_weather_data() for one location, writing every row of a full response."""
+    locations = []
+
+    def setup():
+        location = weather_location_model.objects.create(
+            name=f"Location {len(locations)}", latitude="40.71", longitude="-74.01", timezone="America/New_York"
+        )
+        locations.append(location)
+        return (location, one_call_payload), {}
+
+    benchmark.pedantic(save_weather_data, setup=setup, rounds=50, iterations=1)
+    benchmark.extra_info["rows_per_location"] = count_weather_rows(one_call_payload)
+    HourlyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather"))
+    assert HourlyWeather.objects.filter(location=locations[-1]).count() == len(one_call_payload["hourly"])
+
+
+@pytest.mark.django_db
+def test_store_snapshot(override_owm_settings, benchmark, weather_location_model, one_call_payload):
+    """Benchmark storing a full response as a lazy snapshot, the only write of a fetch with OWM_SNAPSHOT_MODE="lazy"."""
+    override_owm_settings(OWM_SNAPSHOT_MODE="lazy")
+    location = weather_location_model.objects.create(
+        name="Location", latitude="40.71", longitude="-74.01", timezone="America/New_York"
+    )
+
+    rows_by_model = benchmark.pedantic(store_weather_data, args=(location, one_call_payload), rounds=50, iterations=1)
+
+    WeatherSnapshot = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherSnapshot"))
+    benchmark.extra_info["payload_bytes"] = len(WeatherSnapshot.objects.first().payload)
+    assert rows_by_model == {"WeatherSnapshot": 1}
+
+
+@pytest.mark.django_db
+def test_save_changed_weather_data(override_owm_settings, benchmark, weather_location_model, one_call_payload):
+    """Benchmark saving the next response for a location with OWM_CHANGE_DETECTION, when one forecast hour changed."""
+    override_owm_settings(OWM_CHANGE_DETECTION=True)
+    hourly = [dict(hour) for hour in one_call_payload["hourly"]]
+    hourly[0]["temp"] = round(hourly[0]["temp"] + 1, 2)
+    next_payload = {**one_call_payload, "hourly": hourly}
+    locations = []
+
+    def setup():
+        location = weather_location_model.objects.create(
+            name=f"Location {len(locations)}", latitude="40.71", longitude="-74.01", timezone="America/New_York"
+        )
+        save_weather_data(location, one_call_payload)
+        locations.append(location)
+        return (location, next_payload), {}
+
+    rows_by_model = benchmark.pedantic(save_weather_data, setup=setup, rounds=50, iterations=1)
+
+    benchmark.extra_info["rows_written"] = sum(rows_by_model.values())
+    assert rows_by_model["HourlyWeather"] == 1
+    assert "DailyWeather" not in rows_by_model
@@ -0,0 +1,69 @@
+"""Benchmark every read-only view and partial for a location with a large weather history."""
+
+import random
+
+import pytest
+from django.apps import apps
+from django.test import Client
+from django.urls import reverse
+
+from src.django_owm.app_settings import owm_settings
+
+from .conftest import create_weather_history
+
+
+LOCATION_VIEWS = [
+    "weather_detail",
+    "weather_history",
+    "weather_forecast",
+    "weather_alerts",
+    "weather_errors",
+    "weather_history_partial",
+    "weather_forecast_partial",
+    "weather_alerts_partial",
+    "weather_errors_partial",
+    "weather_dashboard_partial",
+]
+
+# Query parameters for each locations view
+LIST_VIEWS = {
+    "list_locations": {},
+    "locations_geojson": {"bbox": "-180,-90,180,90", "zoom": "3"},
+}
+
+
+@pytest.fixture(scope="module", params=[10_000, 100_000], ids=["10k", "100k"])
+def location_with_history(request, django_db_setup, django_db_blocker):
+    """Create a location with ``param`` hours of weather history, shared by the benchmarks in this module."""
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    with django_db_blocker.unblock():
+        location = WeatherLocation.objects.create(
+            name="Benchmark location", latitude="40.71", longitude="-74.01", timezone="America/New_York"
+        )
+        create_weather_history(location, request.param, random.Random(1234))
+    yield location
+    with django_db_blocker.unblock():
+        location.delete()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", LOCATION_VIEWS)
+def test_location_view(benchmark, location_with_history, view_name):
+    """Benchmark a weather view or partial for the location."""
+    client = Client()
+    url = reverse(f"django_owm:{view_name}", args=[location_with_history.pk])
+
+    response = benchmark(client.get, url)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view_name", LIST_VIEWS)
+def test_list_view(benchmark, location_with_history, view_name):
+    """Benchmark a locations view while the weather tables hold a large history."""
+    client = Client()
+
+    response = benchmark(client.get, reverse(f"django_owm:{view_name}"), LIST_VIEWS[view_name])
+
+    assert response.status_code == 200
@@ -0,0 +1,150 @@
+"""Shared fixtures for the django_owm benchmarks.
+
+Run with ``nox --session benchmarks`` or ``pytest benchmarks -o python_files="bench_*.py"``. The nox session saves
+each run's results as JSON under ``.benchmarks/``; compare runs with ``pytest-benchmark compare``.
+"""
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.apps import apps
+from django.utils import timezone
+
+# The tests' fixture for changing DJANGO_OWM, shared with the benchmarks
+from example_project.conftest import override_owm_settings  # noqa: F401
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.utils.transports import ReplayTransport
+
+
+WEATHER_CONDITIONS = (
+    (800, "Clear", "clear sky", "01d"),
+    (803, "Clouds", "broken clouds", "04d"),
+    (500, "Rain", "light rain", "10d"),
+    (600, "Snow", "light snow", "13d"),
+)
+
+
+@pytest.fixture
+def weather_location_model():
+    """Return the WeatherLocation model."""
+    return apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+
+
+@pytest.fixture
+def seeded_random():
+    """Return a seeded random number generator so benchmark data is reproducible."""
+    return random.Random(1234)
+
+
+def random_coordinate(rng: random.Random, low: float, high: float) -> Decimal:
+    """Return a random coordinate quantized to the 2 decimal places stored on WeatherLocation."""
+    return Decimal(str(round(rng.uniform(low, high), 2)))
+
+
+@pytest.fixture
+def one_call_payload():
+    """Return a full recorded One Call API response (current, minutely, hourly, daily and alerts)."""
+    return ReplayTransport().response_for(40.71, -74.01)
+
+
+def weather_condition(rng: random.Random) -> dict:
+    """Return random weather condition fields for a weather row."""
+    condition_id, main, description, icon = rng.choice(WEATHER_CONDITIONS)
+    return {
+        "weather_condition_id": condition_id,
+        "weather_condition_main": main,
+        "weather_condition_description": description,
+        "weather_condition_icon": icon,
+    }
+
+
+def create_weather_history(location, size: int, rng: random.Random, batch_size: int = 5000) -> None:
+    """Create ``size`` hourly rows of current weather, minutely and hourly data around now for a location.
+
+    Half of the hourly rows are in the future, so forecast views have ``size // 2`` upcoming rows. Daily rows, alerts
+    and error logs are added at one per 24, 100 and 100 hourly rows.
+    """
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    MinutelyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("MinutelyWeather"))
+    HourlyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather"))
+    DailyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("DailyWeather"))
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    now = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+    def measurements():
+        return {
+            "temp": Decimal(str(round(rng.uniform(250, 310), 2))),
+            "feels_like": Decimal(str(round(rng.uniform(250, 310), 2))),
+            "pressure": rng.randint(980, 1040),
+            "humidity": rng.randint(10, 100),
+            "wind_speed": Decimal(str(round(rng.uniform(0, 20), 2))),
+            **weather_condition(rng),
+        }
+
+    CurrentWeather.objects.bulk_create(
+        (
+            CurrentWeather(location=location, timestamp=now - timedelta(hours=hour), **measurements())
+            for hour in range(size)
+        ),
+        batch_size=batch_size,
+    )
+    MinutelyWeather.objects.bulk_create(
+        (
+            MinutelyWeather(
+                location=location, timestamp=now - timedelta(minutes=minute), precipitation=Decimal("0.00")
+            )
+            for minute in range(size)
+        ),
+        batch_size=batch_size,
+    )
+    HourlyWeather.objects.bulk_create(
+        (
+            HourlyWeather(location=location, timestamp=now + timedelta(hours=hour), **measurements())
+            for hour in range(-(size // 2), size - size // 2)
+        ),
+        batch_size=batch_size,
+    )
+    DailyWeather.objects.bulk_create(
+        (
+            DailyWeather(location=location, timestamp=now + timedelta(days=day), **weather_condition(rng))
+            for day in range(-(size // 48), size // 24 - size // 48)
+        ),
+        batch_size=batch_size,
+    )
+    WeatherAlert.objects.bulk_create(
+        (
+            WeatherAlert(
+                location=location,
+                sender_name="NWS",
+                event="Heat Advisory",
+                start=now + timedelta(hours=hour),
+                end=now + timedelta(hours=hour + 12),
+                description="Hot temperatures expected.",
+                signature=WeatherAlert.build_signature(
+                    "NWS",
+                    "Heat Advisory",
+                    now + timedelta(hours=hour),
+                    now + timedelta(hours=hour + 12),
+                    "Hot temperatures expected.",
+                ),
+            )
+            for hour in range(-(size // 200), size // 100 - size // 200)
+        ),
+        batch_size=batch_size,
+    )
+    WeatherErrorLog.objects.bulk_create(
+        (
+            WeatherErrorLog(
+                location=location,
+                api_name="one_call",
+                error_message=f"Failed to fetch weather data ({index % 7})",
+                first_seen=now - timedelta(hours=index),
+                last_seen=now - timedelta(hours=index),
+            )
+            for index in range(size // 100)
+        ),
+        batch_size=batch_size,
+    )
@@ -0,0 +1,26 @@
+"""Shared fixtures for the django_owm tests."""
+
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Clear the cache around each test, so that run locks and circuit breaker state don't leak between tests."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def override_owm_settings(settings):
+    """Return a function that changes ``DJANGO_OWM`` settings until the end of the test.
+
+    Use it as ``override_owm_settings(OWM_SNAPSHOT_MODE="lazy")``. Changing ``settings.DJANGO_OWM`` sends
+    ``setting_changed``, so the app reads the new values, and the previous settings are restored after the test.
+    """
+
+    def override(**values):
+        settings.DJANGO_OWM = {**settings.DJANGO_OWM, **values}
+
+    return override
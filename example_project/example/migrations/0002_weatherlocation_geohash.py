@@ -0,0 +1,40 @@
+"""Generated by Django 5.1.15 on 2026-10-19 11:29."""
+
+from django.db import migrations
+from django.db import models
+
+from src.django_owm.utils.geo import encode_geohash
+
+
+def populate_geohash(apps, schema_editor):  # pylint: disable=W0613
+    """Fill in the geohash of existing locations."""
+    WeatherLocation = apps.get_model("example", "WeatherLocation")
+    locations = list(WeatherLocation.objects.only("pk", "latitude", "longitude"))
+    for location in locations:
+        location.geohash = encode_geohash(location.latitude, location.longitude)
+    WeatherLocation.objects.bulk_update(locations, ["geohash"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    """Add the geohash field to WeatherLocation."""
+
+    dependencies = [
+        ("example", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="weatherlocation",
+            name="geohash",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default="",
+                editable=False,
+                help_text="Geohash of the coordinates, used for nearest-location lookups",
+                max_length=12,
+                verbose_name="Geohash",
+            ),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
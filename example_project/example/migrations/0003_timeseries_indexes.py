@@ -0,0 +1,63 @@
+"""Generated by Django 5.1.15 on 2026-10-19 11:32."""
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    """Add indexes to the time-series models."""
+
+    dependencies = [
+        ("example", "0002_weatherlocation_geohash"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="apicalllog",
+            index=models.Index(fields=["api_name", "timestamp"], name="example_api_api_nam_5ac570_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="currentweather",
+            index=models.Index(fields=["location", "timestamp"], name="example_cur_locatio_f5114a_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="currentweather",
+            index=models.Index(fields=["timestamp"], name="example_cur_timesta_b40f76_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="dailyweather",
+            index=models.Index(fields=["location", "timestamp"], name="example_dai_locatio_9c2497_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="dailyweather",
+            index=models.Index(fields=["timestamp"], name="example_dai_timesta_c85a68_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hourlyweather",
+            index=models.Index(fields=["location", "timestamp"], name="example_hou_locatio_b76636_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hourlyweather",
+            index=models.Index(fields=["timestamp"], name="example_hou_timesta_5e3a19_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="minutelyweather",
+            index=models.Index(fields=["location", "timestamp"], name="example_min_locatio_4eb53f_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="minutelyweather",
+            index=models.Index(fields=["timestamp"], name="example_min_timesta_13cabc_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="weatheralert",
+            index=models.Index(fields=["location", "end"], name="example_wea_locatio_487c46_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="weathererrorlog",
+            index=models.Index(fields=["location", "timestamp"], name="example_wea_locatio_992ca8_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="weathererrorlog",
+            index=models.Index(fields=["timestamp"], name="example_wea_timesta_142e1d_idx"),
+        ),
+    ]
@@ -0,0 +1,51 @@
+"""Generated by Django 5.1.15 on 2026-10-19 11:38."""
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    """Add per-location refresh scheduling fields to WeatherLocation."""
+
+    dependencies = [
+        ("example", "0003_timeseries_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="weatherlocation",
+            name="last_fetched_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name="Last Fetched At"),
+        ),
+        migrations.AddField(
+            model_name="weatherlocation",
+            name="next_fetch_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="When weather data is next due to be fetched. Empty if it has never been fetched.",
+                null=True,
+                verbose_name="Next Fetch At",
+            ),
+        ),
+        migrations.AddField(
+            model_name="weatherlocation",
+            name="priority",
+            field=models.SmallIntegerField(
+                default=0,
+                help_text="Locations with a higher priority are fetched first when several are due",
+                verbose_name="Priority",
+            ),
+        ),
+        migrations.AddField(
+            model_name="weatherlocation",
+            name="refresh_interval",
+            field=models.DurationField(
+                blank=True,
+                help_text="How often to fetch weather data for this location. Leave empty to use the default interval.",
+                null=True,
+                verbose_name="Refresh Interval",
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+"""Generated by Django 5.1.15 on 2026-10-19 11:45."""
+
+import hashlib
+
+import django.utils.timezone
+from django.db import migrations
+from django.db import models
+
+
+def populate_aggregation_fields(apps, schema_editor):  # pylint: disable=W0613
+    """Set the signature and first/last seen times of existing error logs."""
+    WeatherErrorLog = apps.get_model("example", "WeatherErrorLog")
+    WeatherErrorLog.objects.update(first_seen=models.F("timestamp"), last_seen=models.F("timestamp"))
+    batch = []
+    for error_log in WeatherErrorLog.objects.only("pk", "api_name", "error_message").iterator(chunk_size=1000):
+        error_log.signature = hashlib.sha256(f"{error_log.api_name}\n{error_log.error_message}".encode()).hexdigest()
+        batch.append(error_log)
+        if len(batch) == 1000:
+            WeatherErrorLog.objects.bulk_update(batch, ["signature"])
+            batch = []
+    WeatherErrorLog.objects.bulk_update(batch, ["signature"])
+
+
+class Migration(migrations.Migration):
+    """Add occurrence counts, first/last seen times and a signature to WeatherErrorLog, for aggregating errors."""
+
+    dependencies = [
+        ("example", "0004_weatherlocation_refresh_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="weathererrorlog",
+            name="first_seen",
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name="First Seen"),
+        ),
+        migrations.AddField(
+            model_name="weathererrorlog",
+            name="last_seen",
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name="Last Seen"),
+        ),
+        migrations.AddField(
+            model_name="weathererrorlog",
+            name="occurrences",
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text="Number of times this error occurred between first and last seen",
+                verbose_name="Occurrences",
+            ),
+        ),
+        migrations.AddField(
+            model_name="weathererrorlog",
+            name="signature",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Hash of the API name and error message, used to group repeated errors",
+                max_length=64,
+                verbose_name="Signature",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="weathererrorlog",
+            index=models.Index(fields=["location", "last_seen"], name="example_wea_locatio_9df6df_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="weathererrorlog",
+            index=models.Index(fields=["location", "signature"], name="example_wea_locatio_15fcf6_idx"),
+        ),
+        migrations.RunPython(populate_aggregation_fields, migrations.RunPython.noop),
+    ]
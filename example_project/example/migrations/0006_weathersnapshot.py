@@ -0,0 +1,53 @@
+"""Generated by Django 5.1.15 on 2026-10-19 12:27."""
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    """Add WeatherSnapshot, for storing compressed API responses."""
+
+    dependencies = [
+        ("example", "0005_weathererrorlog_aggregation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WeatherSnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("fetched_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Fetched At")),
+                (
+                    "payload",
+                    models.BinaryField(help_text="The API response as zlib-compressed JSON", verbose_name="Payload"),
+                ),
+                (
+                    "materialized_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="When the response was saved to the weather tables",
+                        null=True,
+                        verbose_name="Materialized At",
+                    ),
+                ),
+                (
+                    "location",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="weather_snapshots",
+                        to="example.weatherlocation",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+                "indexes": [
+                    models.Index(fields=["location", "fetched_at"], name="example_wea_locatio_e0386d_idx"),
+                    models.Index(fields=["location", "materialized_at"], name="example_wea_locatio_e67128_idx"),
+                    models.Index(fields=["materialized_at", "fetched_at"], name="example_wea_materia_3ef5e8_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+"""Generated by Django 5.1.15 on 2026-10-19 12:37."""
+
+import hashlib
+
+import django.utils.timezone
+from django.db import migrations
+from django.db import models
+
+
+def deduplicate_alerts(apps, schema_editor):  # pylint: disable=W0613
+    """Set the signature and seen times of existing alerts, and delete all but the first row of each alert.
+
+    Rows did not record when they were fetched, so an alert is taken to have been seen from its start until its end,
+    or until now if it has not ended yet.
+    """
+    WeatherAlert = apps.get_model("example", "WeatherAlert")
+    now = django.utils.timezone.now()
+    seen = set()
+    duplicates = []
+    batch = []
+    rows = WeatherAlert.objects.only("pk", "location", "sender_name", "event", "start", "end", "description")
+    for alert in rows.order_by("pk").iterator(chunk_size=1000):
+        key = (
+            f"{alert.sender_name}\n{alert.event}\n{int(alert.start.timestamp())}\n{int(alert.end.timestamp())}\n"
+            f"{alert.description or ''}"
+        )
+        alert.signature = hashlib.sha256(key.encode()).hexdigest()
+        if (alert.location_id, alert.signature) in seen:
+            duplicates.append(alert.pk)
+            continue
+        seen.add((alert.location_id, alert.signature))
+        alert.first_seen = min(alert.start, now)
+        alert.last_seen = max(alert.first_seen, min(alert.end, now))
+        batch.append(alert)
+        if len(batch) == 1000:
+            WeatherAlert.objects.bulk_update(batch, ["signature", "first_seen", "last_seen"])
+            batch = []
+    WeatherAlert.objects.bulk_update(batch, ["signature", "first_seen", "last_seen"])
+    for offset in range(0, len(duplicates), 1000):
+        WeatherAlert.objects.filter(pk__in=duplicates[offset : offset + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+    """Add a signature, first/last seen times and a cleared time to WeatherAlert, storing each alert once."""
+
+    dependencies = [
+        ("example", "0006_weathersnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="weatheralert",
+            name="cleared_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the alert was first missing from a response, i.e. withdrawn by its sender",
+                null=True,
+                verbose_name="Cleared At",
+            ),
+        ),
+        migrations.AddField(
+            model_name="weatheralert",
+            name="first_seen",
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name="First Seen"),
+        ),
+        migrations.AddField(
+            model_name="weatheralert",
+            name="last_seen",
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name="Last Seen"),
+        ),
+        migrations.AddField(
+            model_name="weatheralert",
+            name="signature",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Hash of the sender, event, start, end and description, identifying the alert across fetches",
+                max_length=64,
+                verbose_name="Signature",
+            ),
+        ),
+        migrations.RunPython(deduplicate_alerts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="weatheralert",
+            constraint=models.UniqueConstraint(
+                fields=("location", "signature"), name="example_weatheralert_unique_signature"
+            ),
+        ),
+    ]
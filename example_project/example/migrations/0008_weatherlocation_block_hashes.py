@@ -0,0 +1,26 @@
+"""Generated by Django 5.1.15 on 2026-10-19 12:56."""
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    """Add the hashes of the last saved response's blocks to WeatherLocation, for skipping unchanged blocks."""
+
+    dependencies = [
+        ("example", "0007_weatheralert_deduplication"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="weatherlocation",
+            name="block_hashes",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Hash of each block of the last saved response, used to skip unchanged blocks",
+                verbose_name="Block Hashes",
+            ),
+        ),
+    ]
@@ -8,6 +8,7 @@ from src.django_owm.models import AbstractMinutelyWeather
 from src.django_owm.models import AbstractWeatherAlert
 from src.django_owm.models import AbstractWeatherErrorLog
 from src.django_owm.models import AbstractWeatherLocation
+from src.django_owm.models import AbstractWeatherSnapshot
 
 
 class WeatherLocation(AbstractWeatherLocation):
@@ -34,6 +35,10 @@ class WeatherAlert(AbstractWeatherAlert):
     """Concrete model for AbstractWeatherAlert."""
 
 
+class WeatherSnapshot(AbstractWeatherSnapshot):
+    """Concrete model for AbstractWeatherSnapshot."""
+
+
 class WeatherErrorLog(AbstractWeatherErrorLog):
     """Concrete model for AbstractWeatherErrorLog."""
 
@@ -7,6 +7,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/dev/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 
@@ -81,6 +82,17 @@ DATABASES = {
     }
 }
 
+# Set POSTGRES_DB to use PostgreSQL instead, e.g. to run the partitioning tests, which are skipped on SQLite
+if os.environ.get("POSTGRES_DB"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ["POSTGRES_DB"],
+        "USER": os.environ.get("POSTGRES_USER", ""),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", ""),
+        "PORT": os.environ.get("POSTGRES_PORT", ""),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/dev/ref/settings/#auth-password-validators
 
@@ -152,6 +164,7 @@ DJANGO_OWM = {
         "WeatherAlert": "example.WeatherAlert",
         "WeatherErrorLog": "example.WeatherErrorLog",
         "APICallLog": "example.APICallLog",
+        "WeatherSnapshot": "example.WeatherSnapshot",
     },
     "OWM_USE_BUILTIN_ADMIN": True,
     "OWM_SHOW_MAP": True,
@@ -0,0 +1,10 @@
+"""Django settings for the example project with UUID primary keys.
+
+The example migrations create integer keys, so run tests with these settings with ``--nomigrations``.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import DJANGO_OWM
+
+
+DJANGO_OWM = {**DJANGO_OWM, "OWM_USE_UUID": True}
@@ -1,12 +1,89 @@
 """Tests for the admin module in the django_owm app."""
 
+from decimal import Decimal
+
+import pytest
 from django.apps import apps
 from django.contrib.admin.sites import site
+from django.urls import reverse
+from django.utils import timezone
 
-from src.django_owm.app_settings import OWM_MODEL_MAPPINGS
+from src.django_owm.admin import EstimatedCountPaginator
+from src.django_owm.app_settings import owm_settings
 
 
 def test_admin_model_registration():
     """Test that models are registered in the admin site."""
-    WeatherLocation = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
     assert WeatherLocation in site._registry  # pylint: disable=W0212
+
+
+@pytest.fixture
+def many_locations_with_weather():
+    """Create several locations, each with a current weather record."""
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    WeatherSnapshot = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherSnapshot"))
+    locations = WeatherLocation.objects.bulk_create(
+        WeatherLocation(name=f"Location {i}", latitude=Decimal(i), longitude=Decimal(i)) for i in range(60)
+    )
+    CurrentWeather.objects.bulk_create(
+        CurrentWeather(
+            location=location,
+            timestamp=timezone.now(),
+            temp=Decimal("20.0"),
+            weather_condition_id=800,
+            weather_condition_main="Clear",
+        )
+        for location in locations
+    )
+    WeatherErrorLog.objects.bulk_create(
+        WeatherErrorLog(location=location, api_name="one_call", error_message="Failed to fetch weather data")
+        for location in locations
+    )
+    WeatherSnapshot.objects.bulk_create(
+        WeatherSnapshot(location=location, payload=WeatherSnapshot.compress_payload({})) for location in locations
+    )
+    return locations
+
+
+@pytest.mark.parametrize("model_name", ["CurrentWeather", "WeatherErrorLog", "WeatherSnapshot"])
+@pytest.mark.django_db
+def test_admin_changelist_select_related(
+    admin_client, django_assert_max_num_queries, many_locations_with_weather, model_name
+):  # pylint: disable=W0613
+    """Test that changelists showing the location do not run a query per row."""
+    model = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get(model_name))
+    url = reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist")
+
+    with django_assert_max_num_queries(12):
+        response = admin_client.get(url)
+
+    assert response.status_code == 200
+    assert "Location 59" in response.content.decode("utf-8")
+
+
+@pytest.mark.django_db
+def test_admin_changelist_location_filter(admin_client, many_locations_with_weather):
+    """Test filtering a changelist by location when there are too many locations to list."""
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    url = reverse(f"admin:{CurrentWeather._meta.app_label}_{CurrentWeather._meta.model_name}_changelist")
+    location = many_locations_with_weather[3]
+
+    response = admin_client.get(url, {"location": location.pk})
+
+    assert response.status_code == 200
+    assert list(response.context["cl"].result_list) == list(CurrentWeather.objects.filter(location=location))
+
+
+@pytest.mark.django_db
+def test_estimated_count_paginator_falls_back_to_exact_count(many_locations_with_weather):  # pylint: disable=W0613
+    """Test that EstimatedCountPaginator uses an exact count when no estimate is available."""
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    paginator = EstimatedCountPaginator(CurrentWeather.objects.order_by("pk"), 10)
+
+    assert paginator.estimated_count() is None
+    assert paginator.count == 60
+    filtered = CurrentWeather.objects.filter(temp__gt=0).order_by("pk")
+    assert EstimatedCountPaginator(filtered, 10).estimated_count() is None
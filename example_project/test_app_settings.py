@@ -1,11 +1,49 @@
 """Tests for app_settings.py in the django_owm app."""
 
+import pytest
+from django.db import models
 
-def test_app_settings_defaults(monkeypatch):
+from src.django_owm.app_settings import owm_settings
+
+
+def test_app_settings_defaults(settings):
     """Test that default settings are used when specific settings are missing."""
-    monkeypatch.setattr("django.conf.settings.DJANGO_OWM", {})
-    from src.django_owm.app_settings import OWM_API_RATE_LIMITS  # pylint: disable=C0415
-    from src.django_owm.app_settings import OWM_USE_BUILTIN_ADMIN
+    settings.DJANGO_OWM = {}
+
+    assert owm_settings.OWM_API_RATE_LIMITS == {"one_call": {"calls_per_minute": 60, "calls_per_month": 1000000}}
+    assert owm_settings.OWM_USE_BUILTIN_ADMIN is True
+    assert owm_settings.OWM_MODEL_MAPPINGS == {}
+
+
+def test_app_settings_are_read_when_used(settings):
+    """Test that settings are read when first used, and read again after DJANGO_OWM changes."""
+    owm_settings.reload()
+    assert "OWM_API_KEY" not in vars(owm_settings)
+    assert owm_settings.OWM_API_KEY == "test_api_key"
+    assert "OWM_API_KEY" in vars(owm_settings)
+
+    settings.DJANGO_OWM = {**settings.DJANGO_OWM, "OWM_API_KEY": "other_key"}
+    assert owm_settings.OWM_API_KEY == "other_key"
+    # Importing a setting from the module gives its current value
+    from src.django_owm.app_settings import OWM_API_KEY  # pylint: disable=C0415
+
+    assert OWM_API_KEY == "other_key"
+    with pytest.raises(AttributeError, match="OWM_API_KYE"):
+        owm_settings.OWM_API_KYE  # pylint: disable=W0104
+
+
+def test_builtin_concrete_models_setting(settings):
+    """Test that the built-in concrete models replace OWM_MODEL_MAPPINGS when they are used."""
+    settings.DJANGO_OWM = {"OWM_USE_BUILTIN_CONCRETE_MODELS": True, "OWM_MODEL_MAPPINGS": {"WeatherLocation": "a.B"}}
+
+    assert owm_settings.OWM_MODEL_MAPPINGS["WeatherLocation"] == "django_owm.WeatherLocation"
+
+
+def test_base_model_setting(settings):
+    """Test that a function returning the base model is called once, and that a model class is used as it is."""
+    base_model = owm_settings.OWM_BASE_MODEL
+    assert issubclass(base_model, models.Model) and base_model._meta.abstract
+    assert owm_settings.OWM_BASE_MODEL is base_model
 
-    assert OWM_API_RATE_LIMITS == {"one_call": {"calls_per_minute": 60, "calls_per_month": 1000000}}
-    assert OWM_USE_BUILTIN_ADMIN is True
+    settings.DJANGO_OWM = {**settings.DJANGO_OWM, "OWM_BASE_MODEL": models.Model}
+    assert owm_settings.OWM_BASE_MODEL is models.Model
@@ -5,7 +5,7 @@ from decimal import Decimal
 import pytest
 from django.apps import apps
 
-from src.django_owm.app_settings import OWM_MODEL_MAPPINGS
+from src.django_owm.app_settings import owm_settings
 from src.django_owm.forms import WeatherLocationForm
 from src.django_owm.forms import quantize_to_2_decimal_places
 
@@ -13,7 +13,7 @@ from src.django_owm.forms import quantize_to_2_decimal_places
 @pytest.fixture
 def weather_location_model():
     """Return the WeatherLocation model."""
-    return apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    return apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
 
 
 @pytest.fixture
@@ -0,0 +1,123 @@
+"""Tests for the geographic helpers in the django_owm app."""
+
+import random
+from decimal import Decimal
+
+import pytest
+from django.apps import apps
+
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.utils.geo import encode_geohash
+from src.django_owm.utils.geo import geohash_cell_size
+from src.django_owm.utils.geo import geohash_neighbourhood
+from src.django_owm.utils.geo import geohash_prefix_filter
+from src.django_owm.utils.geo import grid_cell_size
+from src.django_owm.utils.geo import haversine_km
+from src.django_owm.utils.geo import parse_bbox
+from src.django_owm.utils.geo import parse_zoom
+
+
+@pytest.fixture
+def weather_location_model():
+    """Return the WeatherLocation model."""
+    return apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+
+
+def test_encode_geohash():
+    """Test geohash encoding against a known value."""
+    assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert encode_geohash(Decimal("57.65"), Decimal("10.41"), 5) == "u4pru"
+
+
+def test_geohash_cell_size():
+    """Test the size of geohash cells."""
+    assert geohash_cell_size(1) == (45.0, 45.0)
+    assert geohash_cell_size(2) == (5.625, 11.25)
+
+
+def test_geohash_neighbourhood():
+    """Test that a neighbourhood holds the cell of the point and its eight neighbours."""
+    cells = geohash_neighbourhood(57.64911, 10.40744, 5)
+    assert len(cells) == 9
+    assert "u4pru" in cells
+
+
+def test_geohash_neighbourhood_antimeridian():
+    """Test that neighbourhoods wrap around the antimeridian."""
+    cells = geohash_neighbourhood(0.0, 179.99, 4)
+    assert encode_geohash(0.0, -179.99, 4) in cells
+
+
+def test_haversine_km():
+    """Test the haversine distance between two points."""
+    # New York to London is roughly 5570 km
+    assert haversine_km(40.7128, -74.0060, 51.5074, -0.1278) == pytest.approx(5570, rel=0.01)
+    assert haversine_km(10, 20, 10, 20) == 0
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("-10,-20,30,40", (-10.0, -20.0, 30.0, 40.0)),
+        ("170,0,190,10", (170.0, 0.0, -170.0, 10.0)),
+        ("-200,-100,200,100", (-180.0, -90.0, 180.0, 90.0)),
+    ],
+)
+def test_parse_bbox(value, expected):
+    """Test parsing bounding boxes."""
+    assert parse_bbox(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, "", "1,2,3", "1,2,3,x", "0,10,10,0"])
+def test_parse_bbox_invalid(value):
+    """Test that invalid bounding boxes raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_bbox(value)
+
+
+@pytest.mark.parametrize("value,expected", [("5", 5), (None, 2), ("abc", 2), (-3, 0), (99, 20)])
+def test_parse_zoom(value, expected):
+    """Test parsing and clamping zoom levels."""
+    assert parse_zoom(value) == expected
+
+
+def test_grid_cell_size():
+    """Test that grid cells halve with each zoom level."""
+    assert grid_cell_size(0) == 90.0
+    assert grid_cell_size(1) == 45.0
+
+
+@pytest.mark.django_db
+def test_nearest_matches_brute_force(weather_location_model):
+    """Test that the geohash-backed nearest search agrees with a full scan."""
+    WeatherLocation = weather_location_model
+    rng = random.Random(42)
+    WeatherLocation.objects.bulk_create(
+        WeatherLocation(
+            latitude=Decimal(str(round(rng.uniform(-60, 60), 2))),
+            longitude=Decimal(str(round(rng.uniform(-180, 180), 2))),
+        )
+        for _ in range(500)
+    )
+    locations = list(WeatherLocation.objects.all())
+
+    for _ in range(20):
+        latitude, longitude = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        expected = sorted(
+            locations, key=lambda location: haversine_km(latitude, longitude, location.latitude, location.longitude)
+        )[:3]
+        result = WeatherLocation.objects.nearest(latitude, longitude, k=3)
+        assert [location.pk for location in result] == [location.pk for location in expected]
+
+
+@pytest.mark.parametrize(
+    "prefix,expected",
+    [
+        ("u4pru", {"geohash__gte": "u4pru", "geohash__lt": "u4prv"}),
+        ("u4pz", {"geohash__gte": "u4pz", "geohash__lt": "u4q"}),
+        ("zz", {"geohash__gte": "zz"}),
+    ],
+)
+def test_geohash_prefix_filter(prefix, expected):
+    """Test the range filter used to match geohash prefixes."""
+    assert dict(geohash_prefix_filter(prefix).children) == expected
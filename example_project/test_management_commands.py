@@ -1,20 +1,22 @@
 """Tests for the management commands of the django_owm app."""
 
+import datetime
 from decimal import Decimal
 
 import pytest
 from django.apps import apps
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.utils import timezone
 
-from src.django_owm.app_settings import OWM_MODEL_MAPPINGS
-from src.django_owm.app_settings import OWM_USE_UUID
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.utils.api import APICallResult
 
 
 @pytest.fixture
 def weather_location_model():
     """Fixture to get the WeatherLocation model."""
-    return apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    return apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
 
 
 @pytest.fixture
@@ -28,7 +30,7 @@ def sample_location(weather_location_model):
 @pytest.mark.django_db
 def test_manual_weather_fetch_command(capsys, sample_location):
     """Test the manual_weather_fetch command."""
-    location_id = str(sample_location.uuid if OWM_USE_UUID else sample_location.id)
+    location_id = str(sample_location.uuid if owm_settings.OWM_USE_UUID else sample_location.id)
     call_command("manual_weather_fetch", location_id)
     captured = capsys.readouterr()
     assert "Successfully fetched weather data for location 'Test Location'" in captured.out
@@ -37,7 +39,7 @@ def test_manual_weather_fetch_command(capsys, sample_location):
 @pytest.mark.django_db
 def test_manual_weather_fetch_command_invalid_location(capsys):
     """Test the manual_weather_fetch command with an invalid location ID."""
-    invalid_id = "9999" if not OWM_USE_UUID else "00000000-0000-0000-0000-000000000000"
+    invalid_id = "9999" if not owm_settings.OWM_USE_UUID else "00000000-0000-0000-0000-000000000000"
     with pytest.raises(CommandError):
         call_command("manual_weather_fetch", invalid_id)
     captured = capsys.readouterr()
@@ -114,3 +116,280 @@ def test_delete_location_command_invalid_location(capsys):
         call_command("delete_location", str(invalid_id))
     captured = capsys.readouterr()
     assert f"Location with ID {invalid_id} does not exist." in captured.err
+
+
+@pytest.mark.django_db
+def test_import_locations_command_csv(capsys, tmp_path, weather_location_model, sample_location):
+    """Test importing locations from CSV, skipping invalid rows and duplicate coordinates."""
+    path = tmp_path / "locations.csv"
+    path.write_text(
+        "name,latitude,longitude,timezone\n"
+        "Paris,48.8566,2.3522,Europe/Paris\n"
+        "Paris again,48.86,2.35,\n"
+        "Existing,10,20,UTC\n"
+        "Nowhere,95,0,\n"
+        "Broken,abc,1,\n"
+        "Berlin,52.52,13.405,Europe/Berlin\n"
+        "Not a number,NaN,1,\n"
+        "Infinite,1,inf,\n"
+        "Overflow,1e999,1,\n"
+        "Huge,1e30,1,\n"
+    )
+
+    call_command("import_locations", str(path), "--batch-size", "2")
+    captured = capsys.readouterr()
+
+    assert "Processed 10 records: 2 created, 2 duplicates skipped, 6 invalid." in captured.out
+    for record_number in (5, 6, 8, 9, 10, 11):
+        assert f"Record {record_number}:" in captured.err
+    assert weather_location_model.objects.count() == 3
+    paris = weather_location_model.objects.get(name="Paris")
+    assert paris.latitude == Decimal("48.86")
+    assert paris.longitude == Decimal("2.35")
+    assert paris.timezone == "Europe/Paris"
+    assert paris.geohash
+
+
+@pytest.mark.django_db
+def test_import_locations_command_geojson_and_ndjson(capsys, tmp_path, weather_location_model):
+    """Test importing locations from GeoJSON and NDJSON files."""
+    geojson_path = tmp_path / "locations.geojson"
+    geojson_path.write_text(
+        '{"type": "FeatureCollection", "features": ['
+        '{"type": "Feature", "geometry": {"type": "Point", "coordinates": [2.35, 48.86]}, '
+        '"properties": {"name": "Paris"}},'
+        '{"type": "Feature", "geometry": null, "properties": {"name": "No geometry"}}'
+        "]}"
+    )
+    ndjson_path = tmp_path / "locations.ndjson"
+    ndjson_path.write_text('{"name": "Berlin", "latitude": 52.52, "longitude": 13.41}\nnot json\n')
+
+    call_command("import_locations", str(geojson_path))
+    call_command("import_locations", str(ndjson_path))
+    captured = capsys.readouterr()
+
+    assert "Processed 2 records: 1 created, 0 duplicates skipped, 1 invalid." in captured.out
+    assert sorted(weather_location_model.objects.values_list("name", flat=True)) == ["Berlin", "Paris"]
+
+
+@pytest.mark.django_db
+def test_import_locations_command_dry_run(capsys, tmp_path, weather_location_model):
+    """Test that a dry run validates the file without creating locations."""
+    path = tmp_path / "locations.csv"
+    path.write_text(
+        "name,latitude,longitude,timezone\nParis,48.86,2.35,\nBerlin,52.52,13.41,\nParis again,48.86,2.35,\n"
+    )
+
+    call_command("import_locations", str(path), "--dry-run", "--batch-size", "1")
+    captured = capsys.readouterr()
+
+    # Duplicates in different batches are found as in a real run
+    assert "Dry run. Processed 3 records: 2 created, 1 duplicates skipped, 0 invalid." in captured.out
+    assert not weather_location_model.objects.exists()
+
+
+def test_import_locations_command_missing_file(tmp_path):
+    """Test importing from a file that does not exist."""
+    with pytest.raises(CommandError):
+        call_command("import_locations", str(tmp_path / "missing.csv"))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("file_format", ["csv", "geojson", "ndjson"])
+def test_export_locations_command_round_trip(capsys, tmp_path, weather_location_model, file_format):
+    """Test that exported locations can be imported again."""
+    weather_location_model.objects.create(
+        name="Paris", latitude=Decimal("48.86"), longitude=Decimal("2.35"), timezone="Europe/Paris"
+    )
+    weather_location_model.objects.create(name="South", latitude=Decimal("-33.87"), longitude=Decimal("151.21"))
+    path = tmp_path / f"locations.{file_format}"
+
+    call_command("export_locations", str(path), "--chunk-size", "1")
+    assert "Exported 2 locations" in capsys.readouterr().out
+
+    weather_location_model.objects.all().delete()
+    call_command("import_locations", str(path))
+
+    assert set(weather_location_model.objects.values_list("name", "latitude", "longitude", "timezone")) == {
+        ("Paris", Decimal("48.86"), Decimal("2.35"), "Europe/Paris"),
+        ("South", Decimal("-33.87"), Decimal("151.21"), None),
+    }
+
+
+def _mock_one_call(lat, lon, before_retry=None):
+    """Return a minimal One Call API response, or a failure for locations in the southern hemisphere."""
+    if lat < 0:
+        return APICallResult(attempts=1, status_code=500, error="HTTP 500")
+    weather = [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}]
+    data = {
+        "current": {"dt": 1609459200, "temp": "280.00", "weather": weather},
+        "hourly": [{"dt": 1609459200 + 3600 * hour, "weather": weather} for hour in range(3)],
+    }
+    return APICallResult(data=data, attempts=1, status_code=200)
+
+
+@pytest.mark.django_db
+def test_fetch_weather_bulk_command(capsys, monkeypatch, weather_location_model):
+    """Test fetching weather for every location concurrently."""
+    monkeypatch.setattr("src.django_owm.utils.fetching.request_weather_data", _mock_one_call)
+    weather_location_model.objects.create(name="North", latitude=Decimal("10.00"), longitude=Decimal("20.00"))
+    weather_location_model.objects.create(name="South", latitude=Decimal("-10.00"), longitude=Decimal("20.00"))
+    weather_location_model.objects.create(name="Far north", latitude=Decimal("60.00"), longitude=Decimal("20.00"))
+
+    call_command("fetch_weather_bulk", "--workers", "2")
+    captured = capsys.readouterr()
+
+    assert "3 calls in" in captured.out
+    assert "calls/s" in captured.out
+    assert "8 rows written" in captured.out
+    assert "Fetched weather data for 2 locations (1 failed)." in captured.out
+    assert apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather")).objects.count() == 2
+    assert apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog")).objects.get().location.name == "South"
+    assert apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog")).objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_fetch_weather_bulk_command_filters(capsys, monkeypatch, weather_location_model):
+    """Test selecting locations by ID, name, bounding box and staleness."""
+    fetched = []
+    monkeypatch.setattr(
+        "src.django_owm.utils.fetching.request_weather_data",
+        lambda lat, lon, before_retry=None: fetched.append((lat, lon)) or APICallResult(attempts=1),
+    )
+    paris = weather_location_model.objects.create(name="Paris", latitude=Decimal("48.86"), longitude=Decimal("2.35"))
+    berlin = weather_location_model.objects.create(
+        name="Berlin", latitude=Decimal("52.52"), longitude=Decimal("13.41")
+    )
+    weather_location_model.objects.create(name="Sydney", latitude=Decimal("-33.87"), longitude=Decimal("151.21"))
+    apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather")).objects.create(
+        location=berlin,
+        timestamp=timezone.now(),
+        weather_condition_id=800,
+        weather_condition_main="Clear",
+        weather_condition_description="clear sky",
+        weather_condition_icon="01d",
+    )
+
+    call_command("fetch_weather_bulk", "--ids", str(paris.pk), str(berlin.pk))
+    assert sorted(fetched) == [(paris.latitude, paris.longitude), (berlin.latitude, berlin.longitude)]
+
+    fetched.clear()
+    call_command("fetch_weather_bulk", "--name", "PAR")
+    assert fetched == [(paris.latitude, paris.longitude)]
+
+    fetched.clear()
+    call_command("fetch_weather_bulk", "--bbox", "0,40,20,60", "--stale-minutes", "60")
+    assert fetched == [(paris.latitude, paris.longitude)]
+
+    # Every location fetched above has been rescheduled, so only Sydney is still due
+    fetched.clear()
+    call_command("fetch_weather_bulk", "--due")
+    assert fetched == [(Decimal("-33.87"), Decimal("151.21"))]
+
+    with pytest.raises(CommandError):
+        call_command("fetch_weather_bulk", "--bbox", "not,a,bbox")
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(not owm_settings.OWM_USE_UUID, reason="Needs UUID primary keys (settings_uuid)")
+def test_fetch_weather_bulk_command_malformed_uuid(monkeypatch, weather_location_model):
+    """Test that malformed UUIDs given to --ids are reported as a command error."""
+    monkeypatch.setattr("src.django_owm.utils.fetching.request_weather_data", pytest.fail)
+    weather_location_model.objects.create(name="Paris", latitude=Decimal("48.86"), longitude=Decimal("2.35"))
+
+    with pytest.raises(CommandError, match="Invalid location IDs"):
+        call_command("fetch_weather_bulk", "--ids", "not-a-uuid")
+
+
+@pytest.mark.django_db
+def test_fetch_weather_bulk_command_plan(capsys, monkeypatch, weather_location_model):
+    """Test that --plan reports the calls and quotas without fetching."""
+    monkeypatch.setattr("src.django_owm.utils.fetching.request_weather_data", pytest.fail)
+    monkeypatch.setattr("src.django_owm.utils.fetching.get_api_call_counts", lambda api_name: (58, 100))
+    for index in range(3):
+        weather_location_model.objects.create(name=f"L{index}", latitude=Decimal(index), longitude=Decimal("0"))
+
+    call_command("fetch_weather_bulk", "--plan")
+    captured = capsys.readouterr()
+
+    assert "3 API calls would be made for 3 locations." in captured.out
+    assert "Per-minute quota: 58/60 used, 2 remaining." in captured.out
+    assert "paced over at least 2 minutes" in captured.out
+
+
+@pytest.mark.django_db
+def test_generate_weather_fixtures_command(capsys, weather_location_model):
+    """Test that the generated history has the expected rows, timestamps and values, and depends only on the seed."""
+    args = ["--locations", "2", "--days", "2", "--end", "2024-10-01T00:00Z", "--batch-size", "100", "--seed", "3"]
+    call_command("generate_weather_fixtures", *args)
+
+    output = capsys.readouterr().out
+    assert "MinutelyWeather: 5,760 rows" in output
+    assert "Created " in output
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    MinutelyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("MinutelyWeather"))
+    DailyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("DailyWeather"))
+    APICallLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog"))
+    assert weather_location_model.objects.count() == 2
+    assert CurrentWeather.objects.count() == 2 * 48
+    assert MinutelyWeather.objects.count() == 2 * 48 * 60
+    assert DailyWeather.objects.count() == 2 * 2
+    assert APICallLog.objects.count() == 2 * 48
+
+    end = timezone.datetime(2024, 10, 1, tzinfo=datetime.timezone.utc)
+    newest = CurrentWeather.objects.latest("timestamp")
+    assert newest.timestamp == end
+    assert 200 < newest.temp < 330
+    # API call logs keep their generated timestamps rather than the time of creation
+    assert APICallLog.objects.latest("timestamp").timestamp < end + timezone.timedelta(minutes=1)
+
+    first_run = list(CurrentWeather.objects.order_by("location__name", "timestamp").values_list("temp", "pressure"))
+    weather_location_model.objects.all().delete()
+    APICallLog.objects.all().delete()
+    call_command("generate_weather_fixtures", *args, "--no-minutely")
+    second_run = list(CurrentWeather.objects.order_by("location__name", "timestamp").values_list("temp", "pressure"))
+    assert second_run == first_run
+    assert not MinutelyWeather.objects.exists()
+
+
+def test_generate_weather_fixtures_command_invalid_options():
+    """Test that invalid options are reported."""
+    with pytest.raises(CommandError):
+        call_command("generate_weather_fixtures", "--days", "0")
+    with pytest.raises(CommandError):
+        call_command("generate_weather_fixtures", "--end", "yesterday")
+
+
+@pytest.mark.django_db
+def test_materialize_weather_snapshots_command(override_owm_settings, capsys, monkeypatch, weather_location_model):
+    """Test that lazily stored snapshots are materialized by the command, and replayed into emptied tables."""
+    monkeypatch.setattr("src.django_owm.utils.fetching.request_weather_data", _mock_one_call)
+    override_owm_settings(OWM_SNAPSHOT_MODE="lazy")
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    WeatherSnapshot = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherSnapshot"))
+    weather_location_model.objects.create(name="North", latitude=Decimal("10.00"), longitude=Decimal("20.00"))
+    weather_location_model.objects.create(name="Far north", latitude=Decimal("60.00"), longitude=Decimal("20.00"))
+
+    call_command("fetch_weather_bulk")
+    assert "2 rows written" in capsys.readouterr().out
+    assert WeatherSnapshot.objects.filter(materialized_at__isnull=True).count() == 2
+    assert not CurrentWeather.objects.exists()
+
+    call_command("materialize_weather_snapshots")
+    assert "Materialized 2 weather snapshots." in capsys.readouterr().out
+    assert CurrentWeather.objects.count() == 2
+    assert not WeatherSnapshot.objects.filter(materialized_at__isnull=True).exists()
+
+    call_command("materialize_weather_snapshots")
+    assert "Materialized 0 weather snapshots." in capsys.readouterr().out
+
+    CurrentWeather.objects.all().delete()
+    call_command("materialize_weather_snapshots", "--replay", "--limit", "1")
+    assert "Materialized 1 weather snapshots." in capsys.readouterr().out
+    assert CurrentWeather.objects.count() == 1
+
+
+def test_materialize_weather_snapshots_command_invalid_options():
+    """Test that the materialize_weather_snapshots command rejects invalid options."""
+    with pytest.raises(CommandError, match="--limit"):
+        call_command("materialize_weather_snapshots", "--limit", "0")
@@ -0,0 +1,229 @@
+"""Tests for the fetch pipeline instrumentation and metrics backends of the django_owm app."""
+
+import datetime
+import socket
+
+import pytest
+from django.apps import apps
+from django.shortcuts import reverse
+from django.utils import timezone
+
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.signals import fetch_run_completed
+from src.django_owm.signals import fetch_stage_completed
+from src.django_owm.tasks import fetch_weather
+from src.django_owm.utils.fetching import fetch_locations_concurrently
+from src.django_owm.utils.instrumentation import fetch_run
+from src.django_owm.utils.instrumentation import stage
+from src.django_owm.utils.metrics import NullMetrics
+from src.django_owm.utils.metrics import StatsdMetrics
+from src.django_owm.utils.metrics import get_metrics
+
+
+class RecordingMetrics:
+    """A metrics backend that keeps every metric in a list."""
+
+    def __init__(self, **options):
+        self.options = options
+        self.records = []
+
+    def increment(self, name, value=1, tags=None):
+        self.records.append(("increment", name, value, tags))
+
+    def timing(self, name, seconds, tags=None):
+        self.records.append(("timing", name, seconds, tags))
+
+    def gauge(self, name, value, tags=None):
+        self.records.append(("gauge", name, value, tags))
+
+
+@pytest.fixture
+def recording_metrics(override_owm_settings):
+    """Configure the RecordingMetrics backend and return it.
+
+    Changing settings discards the backend, so request this after fixtures that change other settings.
+    """
+    override_owm_settings(
+        OWM_METRICS_BACKEND={"BACKEND": "example_project.test_metrics.RecordingMetrics", "OPTIONS": {"prefix": "test"}}
+    )
+    return get_metrics()
+
+
+@pytest.fixture
+def replay_transport(override_owm_settings):
+    """Answer API requests with the replay transport."""
+    override_owm_settings(
+        OWM_API_KEY="test_key", OWM_API_TRANSPORT={"BACKEND": "src.django_owm.utils.transports.ReplayTransport"}
+    )
+
+
+@pytest.fixture
+def locations():
+    """Create three locations."""
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    return [WeatherLocation.objects.create(name=f"L{index}", latitude=index, longitude=index) for index in range(3)]
+
+
+def test_default_metrics_backend():
+    """Test that metrics are discarded by default."""
+    assert isinstance(get_metrics(), NullMetrics)
+    get_metrics().increment("anything", tags={"a": "b"})
+
+
+@pytest.mark.django_db
+def test_fetch_weather_returns_run_summary(replay_transport, recording_metrics, locations):
+    """Test that fetch_weather times each stage, and reports the run through signals, metrics and its result."""
+    stages, runs = [], []
+
+    def on_stage(sender, stage, duration, **kwargs):
+        stages.append((sender, stage))
+
+    def on_run(sender, summary, **kwargs):
+        runs.append((sender, summary))
+
+    fetch_stage_completed.connect(on_stage)
+    fetch_run_completed.connect(on_run)
+    try:
+        result = fetch_weather()
+    finally:
+        fetch_stage_completed.disconnect(on_stage)
+        fetch_run_completed.disconnect(on_run)
+
+    assert result["name"] == "fetch_weather"
+    assert (result["locations"], result["succeeded"], result["failed"]) == (3, 3, 0)
+    assert result["rows_written"] == apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather")).objects.count() + sum(
+        apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get(name)).objects.count()
+        for name in ("MinutelyWeather", "HourlyWeather", "DailyWeather", "WeatherAlert")
+    )
+    for stage_name in ("http_request", "json_decode", "save_current_weather", "save_hourly_weather", "log_api_call"):
+        assert result["stages"][stage_name]["count"] == 3
+        assert ("fetch_weather", stage_name) in stages
+    assert result["stages"]["rate_limit_check"]["count"] >= 1
+    assert [sender for sender, _ in runs] == ["fetch_weather"]
+    assert runs[0][1].succeeded == 3
+
+    records = recording_metrics.records
+    assert recording_metrics.options == {"prefix": "test"}
+    assert ("increment", "api.requests", 1, {"status": "200"}) in records
+    assert ("increment", "fetch.locations", 1, {"run": "fetch_weather", "outcome": "succeeded"}) in records
+    assert any(record[:2] == ("timing", "fetch.run.duration") for record in records)
+    assert sum(1 for record in records if record[:2] == ("timing", "fetch.stage.duration")) == len(stages)
+
+
+@pytest.mark.django_db
+def test_bulk_fetch_records_stages_from_worker_threads(replay_transport, locations):
+    """Test that stages run in worker threads are recorded in the bulk fetch's run."""
+    summary = fetch_locations_concurrently(locations, workers=2)
+
+    assert summary.succeeded == 3
+    assert summary.stages["http_request"].count == 3
+    assert summary.stages["save_daily_weather"].count == 3
+    assert summary.stages["http_request"].mean > 0
+
+
+def test_stage_outside_run_and_failures():
+    """Test that stages are timed outside a run and when they raise."""
+    with fetch_run("test") as summary:
+        with pytest.raises(ValueError), stage("json_decode"):
+            raise ValueError
+    with stage("json_decode"):
+        pass
+
+    assert summary.stages["json_decode"].count == 1
+    assert summary.as_dict()["stages"]["json_decode"]["count"] == 1
+
+
+def test_statsd_metrics():
+    """Test the StatsD line format."""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(5)
+    metrics = StatsdMetrics(host="127.0.0.1", port=receiver.getsockname()[1])
+    try:
+        metrics.increment("fetch.locations", tags={"run": "fetch_weather", "outcome": "failed"})
+        metrics.timing("fetch.stage.duration", 0.25, tags={"stage": "http_request"})
+        metrics.gauge("queue", 3)
+        lines = [receiver.recv(1024).decode() for _ in range(3)]
+    finally:
+        receiver.close()
+        metrics.socket.close()
+
+    assert lines == [
+        "django_owm.fetch.locations:1|c|#outcome:failed,run:fetch_weather",
+        "django_owm.fetch.stage.duration:250.0|ms|#stage:http_request",
+        "django_owm.queue:3|g",
+    ]
+
+
+def test_prometheus_metrics():
+    """Test recording metrics with prometheus_client."""
+    prometheus_client = pytest.importorskip("prometheus_client")
+    from src.django_owm.utils.metrics import PrometheusMetrics
+
+    registry = prometheus_client.CollectorRegistry()
+    metrics = PrometheusMetrics(registry=registry)
+    metrics.increment("fetch.locations", tags={"outcome": "failed"})
+    metrics.timing("fetch.stage.duration", 0.5, tags={"stage": "http_request"})
+
+    assert registry.get_sample_value("django_owm_fetch_locations_total", {"outcome": "failed"}) == 1
+    assert registry.get_sample_value("django_owm_fetch_stage_duration_seconds_sum", {"stage": "http_request"}) == 0.5
+
+
+def test_metrics_view_disabled(client):
+    """Test that the metrics view is not served unless enabled."""
+    response = client.get(reverse("django_owm:metrics"))
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_metrics_view(override_owm_settings, client, django_assert_max_num_queries, replay_transport, locations):
+    """Test that the metrics view serves the totals of finished runs and usage computed from indexed queries."""
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    # Runs are only published while the metrics view is on, which can change after startup
+    fetch_weather([locations[1].pk])
+    override_owm_settings(OWM_ENABLE_METRICS_VIEW=True)
+    fetch_weather([location.pk for location in locations[:2]])
+    fetch_weather([locations[0].pk])
+    WeatherLocation.objects.filter(pk=locations[1].pk).update(
+        next_fetch_at=timezone.now() - datetime.timedelta(minutes=10)
+    )
+
+    with django_assert_max_num_queries(10):
+        response = client.get(reverse("django_owm:metrics"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+    lines = response.content.decode().splitlines()
+    assert "# TYPE django_owm_fetch_stage_duration_seconds histogram" in lines
+    assert 'django_owm_api_calls{api="one_call",window="minute"} 4' in lines
+    assert 'django_owm_api_call_limit{api="one_call",window="month"} 1000000' in lines
+    assert 'django_owm_fetch_locations_total{run="fetch_weather",outcome="succeeded"} 3' in lines
+    assert 'django_owm_fetch_run_duration_seconds_count{run="fetch_weather"} 2' in lines
+    assert 'django_owm_fetch_stage_duration_seconds_count{stage="http_request"} 3' in lines
+    assert 'django_owm_fetch_stage_duration_seconds_bucket{stage="http_request",le="+Inf"} 3' in lines
+    assert 'django_owm_rows_written_total{model="CurrentWeather"} 3' in lines
+    assert 'django_owm_api_responses_total{status="2xx"} 3' in lines
+    assert 'django_owm_circuit_breaker_state{api="one_call",state="closed"} 1' in lines
+    assert "django_owm_locations_never_fetched 1" in lines
+    assert 'django_owm_locations_overdue{min_seconds="300"} 1' in lines
+    assert 'django_owm_locations_overdue{min_seconds="900"} 0' in lines
+
+
+@pytest.mark.django_db
+def test_metrics_view_api_call_counts(override_owm_settings, client):
+    """Test that scrapes cache the 30-day API call count, and are not timed as stages of the fetch pipeline."""
+    override_owm_settings(
+        OWM_ENABLE_METRICS_VIEW=True,
+        OWM_METRICS_BACKEND={"BACKEND": "example_project.test_metrics.RecordingMetrics", "OPTIONS": {}},
+    )
+    recording_metrics = get_metrics()
+    APICallLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog"))
+    APICallLog.objects.create(api_name="one_call")
+
+    client.get(reverse("django_owm:metrics"))
+    APICallLog.objects.create(api_name="one_call")
+    lines = client.get(reverse("django_owm:metrics")).content.decode().splitlines()
+
+    assert 'django_owm_api_calls{api="one_call",window="minute"} 2' in lines
+    assert 'django_owm_api_calls{api="one_call",window="month"} 1' in lines
+    assert not [record for record in recording_metrics.records if record[1] == "fetch.stage.duration"]
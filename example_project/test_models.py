@@ -4,15 +4,21 @@ from decimal import Decimal
 
 import pytest
 from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import F
+from django.test.utils import isolate_apps
 from django.utils import timezone
 
-from src.django_owm.app_settings import OWM_MODEL_MAPPINGS
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.models.fields import ScaledIntegerField
+from src.django_owm.models.fields import measurement_field
 
 
 @pytest.fixture
 def weather_location_model():
     """Return the WeatherLocation model."""
-    return apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    return apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
 
 
 @pytest.mark.django_db
@@ -30,7 +36,7 @@ def test_create_weather_location(weather_location_model):
 def test_create_current_weather(weather_location_model):
     """Test creating a CurrentWeather object."""
     WeatherLocation = weather_location_model
-    CurrentWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
     location = WeatherLocation.objects.create(
         name="Test Location", latitude=40.7128, longitude=-74.0060, timezone="America/New_York"
     )
@@ -82,7 +88,7 @@ def test_weather_location_model(weather_location_model):
 def test_weather_alert_model(weather_location_model):
     """Test the WeatherAlert model."""
     WeatherLocation = weather_location_model
-    WeatherAlert = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
 
     location = WeatherLocation.objects.create(
         name="Alert Location", latitude=Decimal("10.0"), longitude=Decimal("20.0"), timezone="UTC"
@@ -106,7 +112,7 @@ def test_weather_alert_model(weather_location_model):
 @pytest.mark.django_db
 def test_daily_weather_moon_phase_description(weather_location_model):
     """Test the moon_phase_description property of DailyWeather model."""
-    DailyWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("DailyWeather"))
+    DailyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("DailyWeather"))
     WeatherLocation = weather_location_model
 
     location = WeatherLocation.objects.create(name="Test Location", latitude=10.0, longitude=20.0)
@@ -142,7 +148,7 @@ def test_daily_weather_moon_phase_description(weather_location_model):
 def test_weather_alert_manager_active(weather_location_model):
     """Test the active method of WeatherAlertManager."""
     WeatherLocation = weather_location_model
-    WeatherAlert = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
 
     location = WeatherLocation.objects.create(name="Test Location", latitude=10.0, longitude=20.0, timezone="UTC")
 
@@ -166,3 +172,129 @@ def test_weather_alert_manager_active(weather_location_model):
 
     active_alerts = WeatherAlert.objects.filter(end__gte=now)
     assert list(active_alerts) == [active_alert]
+
+
+@pytest.mark.django_db
+def test_weather_location_geohash(weather_location_model):
+    """Test that the geohash is kept in sync with the coordinates."""
+    WeatherLocation = weather_location_model
+    location = WeatherLocation.objects.create(name="Aalborg", latitude=Decimal("57.65"), longitude=Decimal("10.41"))
+    assert location.geohash.startswith("u4pru")
+
+    location.latitude = Decimal("40.71")
+    location.longitude = Decimal("-74.01")
+    location.save(update_fields=["latitude", "longitude"])
+    location.refresh_from_db()
+    assert location.geohash.startswith("dr5r")
+
+    (bulk_location,) = WeatherLocation.objects.bulk_create(
+        [WeatherLocation(latitude=Decimal("57.65"), longitude=Decimal("10.41"))]
+    )
+    assert bulk_location.geohash.startswith("u4pru")
+
+
+@pytest.mark.django_db
+def test_weather_location_geohash_queryset_updates(weather_location_model):
+    """Test that update() and bulk_update() keep the geohash in sync with changed coordinates."""
+    WeatherLocation = weather_location_model
+    location = WeatherLocation.objects.create(name="Aalborg", latitude=Decimal("57.65"), longitude=Decimal("10.41"))
+    other = WeatherLocation.objects.create(name="Other", latitude=Decimal("57.65"), longitude=Decimal("10.41"))
+
+    WeatherLocation.objects.filter(pk=location.pk).update(latitude=Decimal("40.71"), longitude=Decimal("-74.01"))
+    location.refresh_from_db()
+    assert location.geohash.startswith("dr5r")
+
+    # With one coordinate or an expression, the geohash is recomputed from the updated rows
+    WeatherLocation.objects.filter(pk=location.pk).update(latitude=Decimal("57.65"))
+    WeatherLocation.objects.filter(pk=location.pk).update(longitude=F("longitude") + Decimal("84.42"))
+    location.refresh_from_db()
+    assert location.geohash.startswith("u4pru")
+
+    other.latitude, other.longitude = Decimal("40.71"), Decimal("-74.01")
+    WeatherLocation.objects.bulk_update([other], ["latitude", "longitude"])
+    other.refresh_from_db()
+    assert other.geohash.startswith("dr5r")
+    location.refresh_from_db()
+    assert location.geohash.startswith("u4pru")
+
+
+@pytest.mark.django_db
+def test_weather_location_nearest(weather_location_model):
+    """Test finding the nearest locations to a point."""
+    WeatherLocation = weather_location_model
+    new_york = WeatherLocation.objects.create(name="New York", latitude=Decimal("40.71"), longitude=Decimal("-74.01"))
+    newark = WeatherLocation.objects.create(name="Newark", latitude=Decimal("40.74"), longitude=Decimal("-74.17"))
+    WeatherLocation.objects.create(name="London", latitude=Decimal("51.51"), longitude=Decimal("-0.13"))
+
+    nearest = WeatherLocation.objects.nearest(40.73, -74.0, k=2)
+    assert nearest == [new_york, newark]
+    assert nearest[0].distance_km < nearest[1].distance_km
+
+    # Falls back to ranking every location when there are too few nearby
+    assert WeatherLocation.objects.nearest(0, 0, k=3)[-1] == newark
+    assert WeatherLocation.objects.filter(name="London").nearest(40.73, -74.0)[0].name == "London"
+    assert WeatherLocation.objects.nearest(0, 0, k=0) == []
+
+
+@pytest.mark.django_db
+def test_weather_snapshot_payload(weather_location_model):
+    """Test that a snapshot stores its API response compressed, and reads it back."""
+    WeatherSnapshot = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherSnapshot"))
+    location = weather_location_model.objects.create(name="Test Location", latitude=40.71, longitude=-74.01)
+    data = {
+        "timezone": "America/New_York",
+        "hourly": [{"dt": 1609459200 + 3600 * hour, "temp": 280} for hour in range(48)],
+    }
+    payload = WeatherSnapshot.compress_payload(data)
+    assert len(payload) < len(str(data)) / 4
+
+    WeatherSnapshot.objects.create(location=location, payload=payload)
+
+    snapshot = WeatherSnapshot.objects.get()
+    assert snapshot.data == data
+    assert snapshot.materialized_at is None
+
+
+@pytest.mark.parametrize(
+    "storage, field_class",
+    [("decimal", models.DecimalField), ("float", models.FloatField), ("scaled", ScaledIntegerField)],
+)
+def test_measurement_field(override_owm_settings, storage, field_class):
+    """Test that measurement fields are created for the configured numeric storage."""
+    override_owm_settings(OWM_NUMERIC_STORAGE=storage)
+    field = measurement_field("Temperature", blank=True, null=True)
+    assert type(field) is field_class
+    assert field.null
+
+
+def test_scaled_integer_field_conversions():
+    """Test that ScaledIntegerField stores hundredths and reads back floats."""
+    field = ScaledIntegerField(decimal_places=2)
+
+    assert field.get_prep_value("21.456") == 2146
+    assert field.get_prep_value(Decimal("-3.5")) == -350
+    assert field.get_prep_value(0.1) == 10
+    assert field.get_prep_value(None) is None
+    assert field.from_db_value(2146, None, None) == 21.46
+    assert field.from_db_value(None, None, None) is None
+    assert field.to_python("7.125") == 7.12
+    assert field.deconstruct()[3]["decimal_places"] == 2
+    with pytest.raises(ValidationError):
+        field.get_prep_value("warm")
+    with pytest.raises(ValidationError):
+        field.to_python("warm")
+
+
+@isolate_apps("example_project.example")
+def test_scaled_integer_field_lookups():
+    """Test that lookup values are scaled, without rounding floats to integers first."""
+
+    class Reading(models.Model):
+        temp = ScaledIntegerField(decimal_places=2)
+
+        class Meta:
+            app_label = "example"
+
+    query = Reading.objects.filter(temp__gte=20.5, temp__lt=Decimal("30.25")).query
+    sql, params = query.sql_with_params()
+    assert params == (2050, 3025)
@@ -0,0 +1,281 @@
+"""Tests for the range partitioning helpers of the django_owm app.
+
+Planning partitions, reading their bounds, and how the migration operation, command and task behave on other
+databases are tested everywhere. The tests marked ``postgresql_only`` partition the example tables, and are skipped
+unless the tests run on PostgreSQL (see ``DATABASES`` in the example project's settings).
+"""
+
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.migrations.state import ProjectState
+from django.utils import timezone
+
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.apps import partitioning_errors
+from src.django_owm.tasks import maintain_partitions
+from src.django_owm.utils.partitioning import Partition
+from src.django_owm.utils.partitioning import PartitionByTimestamp
+from src.django_owm.utils.partitioning import interval_start
+from src.django_owm.utils.partitioning import is_partitioned
+from src.django_owm.utils.partitioning import list_partitions
+from src.django_owm.utils.partitioning import maintain_all_partitions
+from src.django_owm.utils.partitioning import next_interval
+from src.django_owm.utils.partitioning import parse_bound
+from src.django_owm.utils.partitioning import plan_partitions
+
+
+UTC = datetime.timezone.utc
+
+postgresql_only = pytest.mark.skipif(connection.vendor != "postgresql", reason="Partitioning needs PostgreSQL")
+not_postgresql = pytest.mark.skipif(connection.vendor == "postgresql", reason="Tests other databases than PostgreSQL")
+
+
+def utc(*args) -> datetime.datetime:
+    """Return a datetime in UTC."""
+    return datetime.datetime(*args, tzinfo=UTC)
+
+
+@pytest.mark.parametrize(
+    "interval, start, following",
+    [
+        ("day", utc(2026, 10, 20), utc(2026, 10, 21)),
+        ("week", utc(2026, 10, 19), utc(2026, 10, 26)),
+        ("month", utc(2026, 10, 1), utc(2026, 11, 1)),
+    ],
+)
+def test_intervals(interval, start, following):
+    """Test that intervals start at midnight UTC, on Mondays and on the first of the month."""
+    # 2026-10-20 22:30 in UTC
+    moment = datetime.datetime(2026, 10, 21, 1, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=3)))
+
+    assert interval_start(moment, interval) == start
+    assert next_interval(start, interval) == following
+    assert next_interval(utc(2026, 12, 1), "month") == utc(2027, 1, 1)
+
+
+def test_plan_partitions_ahead():
+    """Test that partitions are planned from the end of the existing ones to past the forecast horizon."""
+    existing = [Partition("weather_unpartitioned", None, utc(2026, 10, 19))]
+
+    plan = plan_partitions(
+        "weather", existing, "day", now=utc(2026, 10, 19, 12), horizon=datetime.timedelta(days=2), premake=1
+    )
+
+    assert [partition.name for partition in plan.create] == [
+        "weather_p20261019",
+        "weather_p20261020",
+        "weather_p20261021",
+        "weather_p20261022",
+    ]
+    assert plan.create[0] == Partition("weather_p20261019", utc(2026, 10, 19), utc(2026, 10, 20))
+    assert plan.expire == []
+
+    # Once the partitions exist, nothing more is planned until time moves on
+    plan = plan_partitions(
+        "weather",
+        existing + plan.create,
+        "day",
+        now=utc(2026, 10, 19, 18),
+        horizon=datetime.timedelta(days=2),
+        premake=1,
+    )
+    assert plan.create == []
+
+
+def test_plan_partitions_retention():
+    """Test that partitions past the retention are expired, and that none are planned for the expired period."""
+    existing = [
+        Partition("weather_unpartitioned", None, utc(2026, 8, 1)),
+        Partition("weather_p20260801", utc(2026, 8, 1), utc(2026, 9, 1)),
+        Partition("weather_p20260901", utc(2026, 9, 1), utc(2026, 10, 1)),
+        Partition("weather_p20261001", utc(2026, 10, 1), utc(2026, 11, 1)),
+    ]
+
+    plan = plan_partitions(
+        "weather", existing, "month", now=utc(2026, 10, 19), premake=1, retention=datetime.timedelta(days=30)
+    )
+
+    assert [partition.name for partition in plan.expire] == ["weather_unpartitioned", "weather_p20260801"]
+    assert plan.create == [Partition("weather_p20261101", utc(2026, 11, 1), utc(2026, 12, 1))]
+
+    # After a long pause, partitions start again from the retention cutoff rather than filling the whole gap
+    plan = plan_partitions(
+        "weather", existing, "month", now=utc(2027, 3, 10), premake=1, retention=datetime.timedelta(days=30)
+    )
+    assert [partition.name for partition in plan.create] == [
+        "weather_p20270201",
+        "weather_p20270301",
+        "weather_p20270401",
+    ]
+    assert len(plan.expire) == 4
+
+
+def test_partition_bounds():
+    """Test reading partition bounds as shown by PostgreSQL, and writing them."""
+    assert parse_bound("FOR VALUES FROM ('2026-10-19 00:00:00+00') TO ('2026-10-20 00:00:00+00')") == (
+        utc(2026, 10, 19),
+        utc(2026, 10, 20),
+    )
+    assert parse_bound("FOR VALUES FROM (MINVALUE) TO ('2026-10-01 00:00:00+00')") == (None, utc(2026, 10, 1))
+    assert parse_bound("DEFAULT") is None
+    assert (
+        Partition("weather_old", None, utc(2026, 10, 1)).bound_sql()
+        == "FOR VALUES FROM (MINVALUE) TO ('2026-10-01T00:00:00+00:00')"
+    )
+
+
+@not_postgresql
+@pytest.mark.django_db
+def test_partition_by_timestamp_elsewhere_than_postgresql():
+    """Test that the migration operation leaves tables alone on other databases."""
+    operation = PartitionByTimestamp("MinutelyWeather", interval="day")
+    state = ProjectState.from_apps(apps)
+    MinutelyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS["MinutelyWeather"])
+
+    operation.database_forwards("example", SimpleNamespace(connection=connection), state, state)
+
+    assert operation.deconstruct() == (
+        "PartitionByTimestamp",
+        ["MinutelyWeather"],
+        {"interval": "day", "column": "timestamp"},
+    )
+    assert operation.migration_name_fragment == "partition_minutelyweather"
+    assert MinutelyWeather._meta.db_table in connection.introspection.table_names()
+    with pytest.raises(ValueError, match="interval"):
+        PartitionByTimestamp("MinutelyWeather", interval="year")
+
+
+@not_postgresql
+@pytest.mark.django_db
+def test_maintain_partitions_elsewhere_than_postgresql(override_owm_settings):
+    """Test that the maintenance command refuses to run, and the task skips tables that are not partitioned."""
+    settings = {"MinutelyWeather": {"interval": "day", "retention": datetime.timedelta(days=7)}}
+    override_owm_settings(OWM_PARTITIONING=settings)
+
+    with pytest.raises(CommandError, match="PostgreSQL"):
+        call_command("maintain_partitions")
+    assert maintain_partitions() == {"MinutelyWeather": None}
+
+
+class WeatherRouter:
+    """Database router writing weather data to the "weather" database."""
+
+    def db_for_write(self, model, **hints):
+        """Return the database that weather data is written to."""
+        return "weather" if model._meta.app_label == "example" else None
+
+
+def test_maintain_partitions_checks_routed_database(override_owm_settings, settings, monkeypatch):
+    """Test that the maintenance command checks the database each model is written to, not the default one."""
+    override_owm_settings(OWM_PARTITIONING={"MinutelyWeather": {"interval": "day"}})
+    settings.DATABASE_ROUTERS = [f"{__name__}.WeatherRouter"]
+    monkeypatch.setattr(
+        "src.django_owm.utils.partitioning.connections",
+        {
+            "default": SimpleNamespace(alias="default", vendor="postgresql"),
+            "weather": SimpleNamespace(alias="weather", vendor="sqlite"),
+        },
+    )
+
+    with pytest.raises(CommandError, match="MinutelyWeather \\(database 'weather', sqlite\\)"):
+        call_command("maintain_partitions")
+
+
+def test_partitioning_setting_check(override_owm_settings):
+    """Test that models that cannot be partitioned, and unknown intervals, are reported."""
+    settings = {"MinutelyWeather": {"interval": "day"}, "WeatherAlert": {}, "HourlyWeather": {"interval": "hour"}}
+    override_owm_settings(OWM_PARTITIONING=settings)
+
+    assert [error.id for error in partitioning_errors(None)] == ["django_owm.E006", "django_owm.E007"]
+
+
+@pytest.fixture
+def minutely_weather_model():
+    """Return the MinutelyWeather model."""
+    return apps.get_model(owm_settings.OWM_MODEL_MAPPINGS["MinutelyWeather"])
+
+
+def partition_minutely_weather():
+    """Partition the MinutelyWeather table by day with the migration operation."""
+    state = ProjectState.from_apps(apps)
+    with connection.schema_editor() as schema_editor:
+        PartitionByTimestamp("MinutelyWeather", interval="day").database_forwards(
+            "example", schema_editor, state, state
+        )
+
+
+@postgresql_only
+@pytest.mark.django_db
+def test_partition_by_timestamp(minutely_weather_model):
+    """Test that partitioning a table keeps its rows and keys, and creates partitions past the forecast horizon."""
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS["WeatherLocation"])
+    location = WeatherLocation.objects.create(name="Location", latitude=10, longitude=20)
+    now = timezone.now()
+    old_row = minutely_weather_model.objects.create(
+        location=location, timestamp=now - datetime.timedelta(days=3), precipitation=1
+    )
+    table = minutely_weather_model._meta.db_table
+
+    partition_minutely_weather()
+
+    assert is_partitioned(connection, table)
+    partitions = list_partitions(connection, table)
+    assert partitions[0] == Partition(
+        f"{table}_unpartitioned", None, interval_start(old_row.timestamp, "day") + datetime.timedelta(days=1)
+    )
+    # Partitions follow each other without gaps, past the longest forecast horizon
+    assert all(previous.end == partition.start for previous, partition in zip(partitions, partitions[1:]))
+    assert partitions[-1].end > now + datetime.timedelta(days=8)
+
+    # New rows are routed to their partition, and primary keys keep counting from the existing ones
+    new_row = minutely_weather_model.objects.create(location=location, timestamp=now, precipitation=2)
+    assert new_row.pk > old_row.pk
+    assert list(minutely_weather_model.objects.order_by("timestamp").values_list("pk", flat=True)) == [
+        old_row.pk,
+        new_row.pk,
+    ]
+    assert minutely_weather_model.objects.filter(timestamp__gte=now - datetime.timedelta(hours=1)).count() == 1
+    # Deleting the location still cascades to its rows in every partition
+    location.delete()
+    assert not minutely_weather_model.objects.exists()
+
+
+@postgresql_only
+@pytest.mark.django_db
+def test_maintain_partitions_on_postgresql(override_owm_settings, capsys, minutely_weather_model):
+    """Test that maintenance creates partitions as time moves on and drops those past the retention."""
+    override_owm_settings(
+        OWM_PARTITIONING={"MinutelyWeather": {"interval": "day", "retention": datetime.timedelta(days=7)}}
+    )
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS["WeatherLocation"])
+    location = WeatherLocation.objects.create(name="Location", latitude=10, longitude=20)
+    now = timezone.now()
+    minutely_weather_model.objects.create(
+        location=location, timestamp=now - datetime.timedelta(days=30), precipitation=1
+    )
+    table = minutely_weather_model._meta.db_table
+    partition_minutely_weather()
+
+    call_command("maintain_partitions", "--dry-run")
+    assert f"Would drop {table}_unpartitioned" in capsys.readouterr().out
+    assert minutely_weather_model.objects.count() == 1
+
+    later = now + datetime.timedelta(days=20)
+    plan = maintain_all_partitions(now=later)["MinutelyWeather"]
+
+    partitions = list_partitions(connection, table)
+    assert f"{table}_unpartitioned" in [partition.name for partition in plan.expire]
+    assert partitions[0].start >= interval_start(later - datetime.timedelta(days=8), "day")
+    assert partitions[-1].end > later + datetime.timedelta(days=1)
+    assert not minutely_weather_model.objects.exists()
+    # A row for the new time can be inserted straight away
+    minutely_weather_model.objects.create(location=location, timestamp=later, precipitation=2)
+    # Running maintenance again has nothing left to do
+    plan = maintain_all_partitions(now=later)["MinutelyWeather"]
+    assert plan.create == [] and plan.expire == []
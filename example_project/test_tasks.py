@@ -1,28 +1,37 @@
 """Tests for the celery tasks module."""
 
+import datetime
 import json
 from decimal import Decimal
 
 import pytest
 import requests
 from django.apps import apps
+from django.utils import timezone
 
-from src.django_owm.app_settings import OWM_MODEL_MAPPINGS
+from src.django_owm.app_settings import owm_settings
 from src.django_owm.tasks import fetch_weather
+from src.django_owm.tasks import materialize_snapshots
+from src.django_owm.utils.circuit_breaker import CircuitBreaker
+from src.django_owm.utils.locking import run_lock
+from src.django_owm.utils.scheduling import MIN_LEASE
+from src.django_owm.utils.scheduling import claim_due_locations
+from src.django_owm.utils.scheduling import get_claim_lease
+from src.django_owm.utils.snapshots import materialize_snapshot
 
 
 @pytest.fixture
 def weather_location_model():
     """Return the WeatherLocation model."""
-    return apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    return apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
 
 
 @pytest.mark.django_db
 def test_fetch_weather(weather_location_model, monkeypatch):
     """Test fetching current weather data."""
     WeatherLocation = weather_location_model
-    CurrentWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
-    APICallLog = apps.get_model(OWM_MODEL_MAPPINGS.get("APICallLog"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    APICallLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog"))
 
     location = WeatherLocation.objects.create(
         name="Test Location", latitude=40.7128, longitude=-74.0060, timezone="America/New_York"
@@ -160,7 +169,7 @@ def test_fetch_weather(weather_location_model, monkeypatch):
 def test_fetch_weather_api_error(weather_location_model, monkeypatch):
     """Test that API errors are handled and logged."""
     WeatherLocation = weather_location_model
-    WeatherErrorLog = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
 
     location = WeatherLocation.objects.create(name="Error Location", latitude=10.0, longitude=20.0, timezone="UTC")
 
@@ -218,3 +227,221 @@ def test_fetch_weather_exception_handling(weather_location_model, monkeypatch):
     with pytest.raises(Exception) as exc_info:
         fetch_weather()
         assert "Test exception" in str(exc_info.value)
+
+
+@pytest.mark.django_db
+def test_fetch_weather_only_due_locations(weather_location_model, monkeypatch):
+    """Test that fetch_weather only fetches due locations, highest priority and most overdue first."""
+    WeatherLocation = weather_location_model
+    now = timezone.now()
+    never_fetched = WeatherLocation.objects.create(name="Never", latitude=1, longitude=1)
+    overdue = WeatherLocation.objects.create(
+        name="Overdue", latitude=2, longitude=2, next_fetch_at=now - datetime.timedelta(hours=2)
+    )
+    slightly_overdue = WeatherLocation.objects.create(
+        name="Slightly overdue", latitude=3, longitude=3, next_fetch_at=now - datetime.timedelta(minutes=1)
+    )
+    urgent = WeatherLocation.objects.create(
+        name="Urgent", latitude=4, longitude=4, priority=10, next_fetch_at=now - datetime.timedelta(minutes=1)
+    )
+    WeatherLocation.objects.create(name="Not due", latitude=5, longitude=5, next_fetch_at=now + datetime.timedelta(1))
+
+    fetched = []
+    monkeypatch.setattr("src.django_owm.tasks.make_api_call", lambda lat, lon: fetched.append(int(lat)) or None)
+
+    fetch_weather()
+
+    assert fetched == [urgent.latitude, never_fetched.latitude, overdue.latitude, slightly_overdue.latitude]
+
+    # Every fetched location is rescheduled, even when the call failed, so none of them are due again straight away
+    urgent.refresh_from_db()
+    assert urgent.last_fetched_at is not None
+    assert urgent.next_fetch_at == urgent.last_fetched_at + owm_settings.OWM_DEFAULT_REFRESH_INTERVAL
+    fetched.clear()
+    fetch_weather()
+    assert fetched == []
+
+
+@pytest.mark.django_db
+def test_fetch_weather_refresh_interval(weather_location_model, monkeypatch):
+    """Test that a location's own refresh interval overrides the default."""
+    location = weather_location_model.objects.create(
+        name="Fast", latitude=1, longitude=1, refresh_interval=datetime.timedelta(minutes=5)
+    )
+    monkeypatch.setattr("src.django_owm.tasks.make_api_call", lambda lat, lon: None)
+
+    fetch_weather()
+
+    location.refresh_from_db()
+    assert location.next_fetch_at - location.last_fetched_at == datetime.timedelta(minutes=5)
+
+
+@pytest.mark.django_db
+def test_fetch_weather_location_ids(weather_location_model, monkeypatch):
+    """Test that explicitly requested locations are fetched whether or not they are due."""
+    not_due = weather_location_model.objects.create(
+        name="Not due", latitude=1, longitude=1, next_fetch_at=timezone.now() + datetime.timedelta(days=1)
+    )
+    weather_location_model.objects.create(name="Due", latitude=2, longitude=2)
+    fetched = []
+    monkeypatch.setattr("src.django_owm.tasks.make_api_call", lambda lat, lon: fetched.append(int(lat)) or None)
+
+    fetch_weather(location_ids=[not_due.pk])
+
+    assert fetched == [1]
+
+
+@pytest.mark.django_db
+def test_fetch_weather_limited_to_minute_quota(weather_location_model, monkeypatch):
+    """Test that a run makes no more calls than remain in the per-minute quota."""
+    for index in range(5):
+        weather_location_model.objects.create(name=f"L{index}", latitude=index, longitude=0)
+    fetched = []
+    monkeypatch.setattr("src.django_owm.tasks.make_api_call", lambda lat, lon: fetched.append(lat) or None)
+    monkeypatch.setattr("src.django_owm.tasks.get_api_call_counts", lambda api_name: (57, 0))
+
+    fetch_weather()
+
+    assert len(fetched) == 3
+
+
+@pytest.mark.django_db
+def test_fetch_weather_skips_overlapping_run(weather_location_model, monkeypatch):
+    """Test that a scheduled run does nothing while another run holds the run lock."""
+    weather_location_model.objects.create(name="Due", latitude=1, longitude=1)
+    fetched = []
+    monkeypatch.setattr("src.django_owm.tasks.make_api_call", lambda lat, lon: fetched.append(lat) or None)
+
+    with run_lock("fetch_weather") as acquired:
+        assert acquired
+        fetch_weather()
+        assert fetched == []
+
+    fetch_weather()
+    assert len(fetched) == 1
+
+
+@pytest.mark.django_db
+def test_claim_due_locations(weather_location_model):
+    """Test that claimed locations are leased and not claimed twice until the lease expires."""
+    now = timezone.now()
+    for index in range(3):
+        weather_location_model.objects.create(name=f"L{index}", latitude=index, longitude=0)
+
+    first = claim_due_locations(limit=2, now=now)
+    second = claim_due_locations(now=now)
+
+    assert [location.name for location in first] == ["L0", "L1"]
+    assert [location.name for location in second] == ["L2"]
+    assert claim_due_locations(now=now) == []
+    assert weather_location_model.objects.filter(next_fetch_at=now + MIN_LEASE).count() == 3
+    assert len(claim_due_locations(now=now + MIN_LEASE)) == 3
+
+
+@pytest.mark.django_db
+def test_claim_due_locations_lease_covers_run(override_owm_settings, weather_location_model):
+    """Test that a claim outlasting the shortest lease is not claimed again while it may still be fetched."""
+    override_owm_settings(OWM_API_RETRY={"max_attempts": 3, "backoff_max": 30.0})
+    now = timezone.now()
+    for index in range(20):
+        weather_location_model.objects.create(name=f"L{index}", latitude=index, longitude=0)
+
+    # Each call can take 3 timed-out attempts of 10s and 2 waits of 30s, and 5 rounds of 4 calls are needed
+    assert get_claim_lease(20, workers=4) == datetime.timedelta(seconds=5 * 90)
+    assert get_claim_lease(1) == MIN_LEASE
+
+    claimed = claim_due_locations(now=now, workers=4)
+    assert len(claimed) == 20
+    # The run is still going after the shortest lease, so another worker must not claim its locations
+    assert claim_due_locations(now=now + MIN_LEASE + datetime.timedelta(minutes=1)) == []
+    assert len(claim_due_locations(now=now + get_claim_lease(20, workers=4))) == 20
+
+
+@pytest.mark.django_db
+def test_fetch_weather_stops_when_circuit_opens(weather_location_model, monkeypatch):
+    """Test that a run stops making calls once the circuit breaker opens."""
+    for index in range(10):
+        weather_location_model.objects.create(name=f"L{index}", latitude=index, longitude=0)
+    breaker = CircuitBreaker("one_call", failure_threshold=3, open_seconds=60)
+    monkeypatch.setattr("src.django_owm.tasks.get_circuit_breaker", lambda api_name: breaker)
+    calls = []
+
+    def failing_api_call(lat, lon):
+        calls.append(lat)
+        breaker.record_failure()
+
+    monkeypatch.setattr("src.django_owm.tasks.make_api_call", failing_api_call)
+
+    fetch_weather()
+
+    assert len(calls) == 3
+    assert apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog")).objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_fetch_weather_aggregates_errors(weather_location_model, monkeypatch):
+    """Test that repeated failures for a location are counted on one error log row."""
+    WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    location = weather_location_model.objects.create(name="Failing", latitude=1, longitude=1)
+    monkeypatch.setattr("src.django_owm.tasks.make_api_call", lambda lat, lon: None)
+
+    for _ in range(3):
+        fetch_weather(location_ids=[location.pk])
+
+    error_log = WeatherErrorLog.objects.get()
+    assert error_log.location == location
+    assert error_log.error_message == "Failed to fetch weather data"
+    assert error_log.occurrences == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("mode", ["archive", "lazy"])
+def test_fetch_weather_snapshots(override_owm_settings, weather_location_model, monkeypatch, mode):
+    """Test that responses are kept as snapshots, and saved to the weather tables at once or by a later task."""
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    WeatherSnapshot = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherSnapshot"))
+    location = weather_location_model.objects.create(name="Test Location", latitude=1, longitude=1)
+    weather = [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}]
+    data = {
+        "current": {"dt": 1609459200, "temp": 280, "weather": weather},
+        "hourly": [{"dt": 1609459200, "temp": 280, "weather": weather}],
+    }
+    monkeypatch.setattr("src.django_owm.tasks.make_api_call", lambda lat, lon: data)
+    override_owm_settings(OWM_SNAPSHOT_MODE=mode)
+
+    summary = fetch_weather(location_ids=[location.pk])
+
+    snapshot = WeatherSnapshot.objects.get()
+    assert snapshot.data == data
+    if mode == "archive":
+        assert summary["rows_by_model"] == {"CurrentWeather": 1, "HourlyWeather": 1, "WeatherSnapshot": 1}
+        assert snapshot.materialized_at is not None
+        assert materialize_snapshots() == 0
+    else:
+        assert summary["rows_by_model"] == {"WeatherSnapshot": 1}
+        assert not CurrentWeather.objects.exists()
+        assert materialize_snapshots() == 1
+        # A snapshot is only materialized once, even by a worker that read it while it was pending
+        assert not materialize_snapshot(snapshot)
+    assert CurrentWeather.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("change_detection", [False, True])
+def test_materialize_snapshots_alert_times(override_owm_settings, weather_location_model, change_detection):
+    """Test that alerts materialized from snapshots are seen and cleared at the snapshots' fetch times."""
+    override_owm_settings(OWM_SNAPSHOT_MODE="lazy", OWM_CHANGE_DETECTION=change_detection)
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    WeatherSnapshot = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherSnapshot"))
+    location = weather_location_model.objects.create(name="Test Location", latitude=1, longitude=1)
+    storm = {"sender_name": "Test", "event": "Storm", "start": 1609459200, "end": 1609545600, "description": "Wind"}
+    times = [datetime.datetime(2021, 1, 1, hour, tzinfo=datetime.timezone.utc) for hour in range(3)]
+    for fetched_at, alerts in zip(times, ([storm], [storm], [])):
+        WeatherSnapshot.objects.create(
+            location=location, payload=WeatherSnapshot.compress_payload({"alerts": alerts}), fetched_at=fetched_at
+        )
+
+    assert materialize_snapshots() == 3
+
+    alert = WeatherAlert.objects.get(location=location)
+    assert (alert.first_seen, alert.last_seen, alert.cleared_at) == tuple(times)
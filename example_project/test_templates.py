@@ -4,13 +4,13 @@ from django.apps import apps
 from django.template import Context
 from django.template import Template
 
-from src.django_owm.app_settings import OWM_MODEL_MAPPINGS
+from src.django_owm.app_settings import owm_settings
 
 
 def test_weather_detail_template_rendering():
     """Test that weather_detail template renders correctly."""
-    WeatherLocation = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    CurrentWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
 
     location = WeatherLocation(name="Test Location", latitude=10.0, longitude=20.0, timezone="UTC")
     current_weather = CurrentWeather(
@@ -0,0 +1,123 @@
+"""Tests for the API transports of the django_owm app."""
+
+import time
+from decimal import Decimal
+
+import pytest
+import requests
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.tasks import fetch_weather
+from src.django_owm.utils.api import make_api_call
+from src.django_owm.utils.transports import ReplayTransport
+from src.django_owm.utils.transports import RequestsTransport
+from src.django_owm.utils.transports import StubServer
+from src.django_owm.utils.transports import get_transport
+from src.django_owm.utils.transports import load_recorded_responses
+
+
+@pytest.fixture
+def use_transport(override_owm_settings):
+    """Return a function that configures the OWM_API_TRANSPORT setting for the test."""
+
+    def configure(setting):
+        override_owm_settings(OWM_API_TRANSPORT=setting)
+
+    return configure
+
+
+def test_default_transport_uses_requests(use_transport, monkeypatch):
+    """Test that the default transport calls requests.get."""
+    use_transport(None)
+    monkeypatch.setattr("requests.get", lambda url, timeout: (url, timeout))
+
+    assert isinstance(get_transport(), RequestsTransport)
+    assert get_transport().get("http://example.com", timeout=10) == ("http://example.com", 10)
+
+
+def test_replay_transport_serves_recorded_responses():
+    """Test that responses are recorded data for the requested point, with timestamps moved to the present."""
+    transport = ReplayTransport()
+    recorded = load_recorded_responses()
+
+    response = transport.get("https://example.com/onecall?lat=10.50&lon=-20.25&exclude=&appid=key", timeout=10)
+    data = response.json()
+
+    assert response.status_code == 200
+    assert (data["lat"], data["lon"]) == (10.5, -20.25)
+    assert abs(data["current"]["dt"] - time.time()) < 5
+    source = next(item for item in recorded if len(item["hourly"]) == len(data["hourly"]))
+    offset = data["current"]["dt"] - source["current"]["dt"]
+    assert data["hourly"][1]["dt"] == source["hourly"][1]["dt"] + offset
+    assert data["daily"][0]["sunrise"] == source["daily"][0]["sunrise"] + offset
+
+    # The same point is always served the same recorded response
+    again = transport.get("https://example.com/onecall?lat=10.50&lon=-20.25", timeout=10).json()
+    assert again["timezone"] == data["timezone"]
+
+
+def test_replay_transport_synthetic_errors_and_latency(monkeypatch):
+    """Test the synthetic error rate and latency."""
+    sleeps = []
+    monkeypatch.setattr("src.django_owm.utils.transports.time.sleep", sleeps.append)
+    url = "https://example.com/onecall?lat=1&lon=2"
+
+    failing = ReplayTransport(error_rate=1.0, error_statuses=(503,), latency=0.5, latency_jitter=0.1, seed=1)
+    assert failing.get(url, timeout=10).status_code == 503
+    assert 0.4 <= sleeps[0] <= 0.6
+
+    with pytest.raises(requests.ConnectionError):
+        ReplayTransport(error_rate=1.0, error_statuses=(0,)).get(url, timeout=10)
+
+    # The same seed gives the same sequence of outcomes
+    statuses = [ReplayTransport(error_rate=0.5, seed=7).get(url, timeout=10).status_code for _ in range(2)]
+    assert statuses[0] == statuses[1]
+    mixed = ReplayTransport(error_rate=0.5, seed=7)
+    outcomes = {mixed.get(url, timeout=10).status_code == 200 for _ in range(50)}
+    assert outcomes == {True, False}
+
+
+@pytest.mark.django_db
+def test_fetch_weather_with_replay_transport(use_transport):
+    """Test a whole fetch run against the replay transport, without network access."""
+    use_transport({"BACKEND": "src.django_owm.utils.transports.ReplayTransport", "OPTIONS": {"seed": 1}})
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    for index in range(3):
+        WeatherLocation.objects.create(name=f"L{index}", latitude=index, longitude=index)
+
+    fetch_weather()
+
+    assert apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather")).objects.count() == 3
+    assert apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather")).objects.count() == 3 * 48
+    assert apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("DailyWeather")).objects.count() == 3 * 8
+    assert not apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog")).objects.exists()
+
+
+@pytest.mark.django_db
+def test_stub_server(override_owm_settings, use_transport, monkeypatch):
+    """Test fetching from the stub server over HTTP."""
+    use_transport(None)
+    monkeypatch.setattr("src.django_owm.utils.api.time.sleep", lambda seconds: None)
+    override_owm_settings(OWM_API_KEY="test_key")
+
+    with StubServer() as server:
+        override_owm_settings(OWM_API_BASE_URL=server.url)
+        data = make_api_call(Decimal("48.86"), Decimal("2.35"))
+        assert data["lat"] == 48.86
+        assert len(data["hourly"]) == 48
+
+        # Dropped connections surface as request exceptions, which are retried and then given up on
+        server.transport = ReplayTransport(error_rate=1.0, error_statuses=(0,))
+        assert make_api_call(Decimal("48.86"), Decimal("2.35")) is None
+
+        response = requests.get(server.url.replace("onecall", "other"), timeout=5)
+        assert response.status_code == 404
+
+
+def test_owm_stub_server_command_invalid_responses_dir(tmp_path):
+    """Test that the stub server command reports a directory without recorded responses."""
+    with pytest.raises(CommandError):
+        call_command("owm_stub_server", "--responses-dir", str(tmp_path), "--port", "0")
@@ -1,18 +1,37 @@
 """Tests for utility functions in the django_owm app."""
 
+import datetime
+import json
 import logging
+import threading
 from decimal import Decimal
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
 
 import pytest
 import requests
 from django.apps import apps
+from django.db import connection
+from django.utils import timezone
 
-from src.django_owm.app_settings import OWM_API_RATE_LIMITS
-from src.django_owm.app_settings import OWM_MODEL_MAPPINGS
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.utils.api import RetryPolicy
 from src.django_owm.utils.api import check_api_limits
 from src.django_owm.utils.api import get_api_call_counts
 from src.django_owm.utils.api import log_api_call
 from src.django_owm.utils.api import make_api_call
+from src.django_owm.utils.api import parse_retry_after
+from src.django_owm.utils.api import request_weather_data
+from src.django_owm.utils.circuit_breaker import CLOSED
+from src.django_owm.utils.circuit_breaker import HALF_OPEN
+from src.django_owm.utils.circuit_breaker import OPEN
+from src.django_owm.utils.circuit_breaker import CircuitBreaker
+from src.django_owm.utils.fetching import BulkFetchSummary
+from src.django_owm.utils.fetching import MinuteRateLimiter
+from src.django_owm.utils.locking import run_lock
+from src.django_owm.utils.saving import ERROR_AGGREGATION_WINDOW
+from src.django_owm.utils.saving import ErrorLogAggregator
 from src.django_owm.utils.saving import save_alerts
 from src.django_owm.utils.saving import save_current_weather
 from src.django_owm.utils.saving import save_daily_weather
@@ -102,8 +121,8 @@ def test_make_api_call_error(monkeypatch, caplog):
 @pytest.mark.django_db
 def test_save_weather_data():
     """Test that save_weather_data saves data correctly."""
-    WeatherLocation = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    CurrentWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
 
     location = WeatherLocation.objects.create(name="Test Location", latitude=10.0, longitude=20.0, timezone="UTC")
 
@@ -134,6 +153,85 @@ def test_save_weather_data():
     assert float(weather.temp) == 295.15
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("rolling_window", [False, True])
+def test_save_minutely_weather_rolling_window(override_owm_settings, rolling_window):
+    """Test that with a rolling window, each fetch's minutely rows replace the location's previous ones."""
+    override_owm_settings(OWM_MINUTELY_ROLLING_WINDOW=rolling_window)
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    MinutelyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("MinutelyWeather"))
+    location = WeatherLocation.objects.create(name="Test Location", latitude=10.0, longitude=20.0)
+    other_location = WeatherLocation.objects.create(name="Other Location", latitude=30.0, longitude=40.0)
+
+    save_minutely_weather(other_location, {"minutely": [{"dt": 1609459200, "precipitation": 0}]})
+    for fetched_at in (1609459200, 1609462800):
+        window = [{"dt": fetched_at + 60 * minute, "precipitation": minute / 10} for minute in range(61)]
+        save_minutely_weather(location, {"minutely": window})
+
+    rows = MinutelyWeather.objects.filter(location=location)
+    assert rows.count() == (61 if rolling_window else 122)
+    assert rows.order_by("timestamp").first().timestamp == timezone.datetime.fromtimestamp(
+        1609462800 if rolling_window else 1609459200, tz=datetime.timezone.utc
+    )
+    assert MinutelyWeather.objects.filter(location=other_location).count() == 1
+
+
+@pytest.mark.django_db
+def test_save_weather_data_change_detection(override_owm_settings):
+    """Test that unchanged blocks are skipped, and that only the changed rows of a changed forecast are written."""
+    override_owm_settings(OWM_CHANGE_DETECTION=True)
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    HourlyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather"))
+    location = WeatherLocation.objects.create(name="Test Location", latitude=10.0, longitude=20.0, timezone="UTC")
+    weather = [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}]
+    hourly = [{"dt": 1609459200 + 3600 * hour, "temp": 280.15 + hour, "weather": weather} for hour in range(3)]
+    data = {
+        "current": {"dt": 1609459200, "temp": 280.15, "weather": weather},
+        "hourly": hourly,
+        "daily": [{"dt": 1609502400, "temp": {"day": 281.5}, "weather": weather}],
+        "alerts": [
+            {"sender_name": "Test", "event": "Storm", "start": 1609459200, "end": 1609545600, "description": "Wind"}
+        ],
+    }
+
+    assert save_weather_data(location, data) == {
+        "CurrentWeather": 1,
+        "HourlyWeather": 3,
+        "DailyWeather": 1,
+        "WeatherAlert": 1,
+    }
+    assert save_weather_data(location, json.loads(json.dumps(data))) == {}
+    location.refresh_from_db()
+    assert sorted(location.block_hashes) == ["alerts", "current", "daily", "hourly"]
+
+    # One hour changes and one is added; the other two hours are left alone
+    changed = {**data, "hourly": [*hourly[:2], {**hourly[2], "temp": 290.0}, {**hourly[2], "dt": 1609470000}]}
+    assert save_weather_data(location, changed) == {"HourlyWeather": 2}
+    rows = HourlyWeather.objects.filter(location=location).order_by("timestamp")
+    assert [float(row.temp) for row in rows] == [280.15, 281.15, 290.0, 282.15]
+
+
+@pytest.mark.django_db
+def test_save_weather_data_change_detection_refreshes_alerts(override_owm_settings, monkeypatch):
+    """Test that alerts repeated in unchanged responses keep their last seen time current, and are still cleared."""
+    override_owm_settings(OWM_CHANGE_DETECTION=True)
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    location = WeatherLocation.objects.create(name="Test Location", latitude=10.0, longitude=20.0, timezone="UTC")
+    storm = {"sender_name": "Test", "event": "Storm", "start": 1609459200, "end": 1609545600, "description": "Wind"}
+    times = iter(datetime.datetime(2021, 1, 1, hour, tzinfo=datetime.timezone.utc) for hour in range(3))
+    monkeypatch.setattr("src.django_owm.utils.saving.timezone.now", lambda: next(times))
+
+    assert save_weather_data(location, {"alerts": [storm]}) == {"WeatherAlert": 1}
+    assert save_weather_data(location, {"alerts": [storm]}) == {}
+    alert = WeatherAlert.objects.get(location=location)
+    assert (alert.first_seen.hour, alert.last_seen.hour, alert.cleared_at) == (0, 1, None)
+
+    save_weather_data(location, {"alerts": []})
+    alert.refresh_from_db()
+    assert alert.cleared_at.hour == 2
+
+
 def test_save_weather_data_missing_data():
     """Test that save_weather_data handles missing data gracefully."""
 
@@ -234,20 +332,35 @@ def test_save_daily_weather(mock_apps_get_model, mock_model, weather_data, expec
     assert mock_model.create_calls == expected_calls
 
 
-@pytest.mark.parametrize(
-    "weather_data, expected_calls",
-    [
-        ({}, 0),
-        ({"alerts": []}, 0),
-        ({"alerts": [{"sender_name": "Test", "event": "Storm", "start": 1609459200, "end": 1609545600}]}, 1),
-    ],
-)
-def test_save_alerts(mock_apps_get_model, mock_model, weather_data, expected_calls):  # pylint: disable=W0613
-    """Test that save_alerts creates the correct number of records."""
-    location = object()  # simple mock location
-
-    save_alerts(location, weather_data)
-    assert mock_model.create_calls == expected_calls
+@pytest.mark.django_db
+@pytest.mark.parametrize("upsert", [True, False], ids=["upsert", "no_upsert"])
+def test_save_alerts(monkeypatch, upsert):
+    """Test that alerts repeated across responses are stored once, and cleared when they are no longer sent.
+
+    Databases that cannot upsert on a unique constraint, such as MySQL and MariaDB, update and add the alerts instead.
+    """
+    monkeypatch.setattr(connection.features, "supports_update_conflicts_with_target", upsert)
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    location = WeatherLocation.objects.create(name="Test Location", latitude=10.0, longitude=20.0)
+    storm = {"sender_name": "Test", "event": "Storm", "start": 1609459200, "end": 1609545600, "description": "Wind"}
+    flood = {**storm, "event": "Flood"}
+    times = iter(datetime.datetime(2021, 1, 1, hour, tzinfo=datetime.timezone.utc) for hour in range(4))
+    monkeypatch.setattr("src.django_owm.utils.saving.timezone.now", lambda: next(times))
+
+    save_alerts(location, {"alerts": [storm, storm]})
+    save_alerts(location, {"alerts": [storm, flood]})
+    assert WeatherAlert.objects.filter(location=location).count() == 2
+    storm_row = WeatherAlert.objects.get(location=location, event="Storm")
+    assert (storm_row.first_seen.hour, storm_row.last_seen.hour, storm_row.cleared_at) == (0, 1, None)
+
+    save_alerts(location, {"alerts": [flood]})
+    storm_row.refresh_from_db()
+    assert storm_row.cleared_at.hour == 2
+
+    save_alerts(location, {})
+    assert WeatherAlert.objects.filter(location=location, cleared_at__isnull=True).count() == 0
+    assert WeatherAlert.objects.filter(location=location).count() == 2
 
 
 def test_save_error_log(mock_apps_get_model, mock_model):  # pylint: disable=W0613
@@ -308,9 +421,10 @@ def test_save_weather_data_integration(mock_save_functions):
 
     save_weather_data(location, data)
 
-    for _, mock_func in mock_save_functions.items():
+    for func_name, mock_func in mock_save_functions.items():
         assert mock_func.call_count == 1
-        assert mock_func.last_call_args == ((location, data), {})
+        # Alerts are saved as seen when the response was fetched, which is now unless given
+        assert mock_func.last_call_args == ((location, data), {"now": None} if func_name == "save_alerts" else {})
 
 
 @pytest.fixture
@@ -345,13 +459,13 @@ def mock_api_call_log_model(monkeypatch):
         return MockAPICallLogModel
 
     monkeypatch.setattr(apps, "get_model", mock_get_model)
-    monkeypatch.setitem(OWM_MODEL_MAPPINGS, "APICallLog", "mock.APICallLog")
+    monkeypatch.setitem(owm_settings.OWM_MODEL_MAPPINGS, "APICallLog", "mock.APICallLog")
     return MockAPICallLogModel
 
 
 def test_get_api_call_counts_no_model(monkeypatch):
     """Test that get_api_call_counts returns 0 when the model is not configured."""
-    monkeypatch.setitem(OWM_MODEL_MAPPINGS, "APICallLog", None)
+    monkeypatch.setitem(owm_settings.OWM_MODEL_MAPPINGS, "APICallLog", None)
     assert get_api_call_counts("test_api") == (0, 0)
 
 
@@ -369,9 +483,9 @@ def test_get_api_call_counts_with_model(mock_api_call_log_model):  # pylint: dis
         (60, 1000000, False),
     ],
 )
-def test_check_api_limits(monkeypatch, calls_last_minute, calls_last_month, expected):
+def test_check_api_limits(override_owm_settings, monkeypatch, calls_last_minute, calls_last_month, expected):
     """Test that check_api_limits correctly checks the API rate limits."""
-    monkeypatch.setitem(OWM_API_RATE_LIMITS, "one_call", {"calls_per_minute": 60, "calls_per_month": 1000000})
+    override_owm_settings(OWM_API_RATE_LIMITS={"one_call": {"calls_per_minute": 60, "calls_per_month": 1000000}})
     monkeypatch.setattr("src.django_owm.utils.api.get_api_call_counts", lambda x: (calls_last_minute, calls_last_month))
 
     @check_api_limits
@@ -388,9 +502,9 @@ def test_log_api_call(mock_api_call_log_model):  # pylint: disable=W0613
     # Since we can't easily check if create was called, we just ensure no exception is raised
 
 
-def test_make_api_call_no_api_key(monkeypatch, caplog):
+def test_make_api_call_no_api_key(override_owm_settings, caplog):
     """Test that make_api_call logs an error when the API key is not set."""
-    monkeypatch.setattr("src.django_owm.utils.api.OWM_API_KEY", None)
+    override_owm_settings(OWM_API_KEY=None)
 
     with caplog.at_level(logging.ERROR):
         result = make_api_call(Decimal("10.0"), Decimal("20.0"))
@@ -399,7 +513,7 @@ def test_make_api_call_no_api_key(monkeypatch, caplog):
     assert "OpenWeatherMap API key not set" in caplog.text
 
 
-def test_make_api_call_with_exclude(monkeypatch):
+def test_make_api_call_with_exclude(override_owm_settings, monkeypatch):
     """Test that make_api_call returns the JSON response when the API call is successful."""
 
     class MockResponse:
@@ -413,7 +527,7 @@ def test_make_api_call_with_exclude(monkeypatch):
             """Return the JSON data."""
             return self.json_data
 
-    monkeypatch.setattr("src.django_owm.utils.api.OWM_API_KEY", "test_key")
+    override_owm_settings(OWM_API_KEY="test_key")
     monkeypatch.setattr("requests.get", lambda url, timeout: MockResponse(200, {"data": "test"}))
 
     result = make_api_call(Decimal("10.0"), Decimal("20.0"), exclude=["daily", "hourly"])
@@ -421,9 +535,9 @@ def test_make_api_call_with_exclude(monkeypatch):
     assert result == {"data": "test"}
 
 
-def test_make_api_call_json_response(monkeypatch):
+def test_make_api_call_json_response(override_owm_settings, monkeypatch):
     """Test that make_api_call returns the JSON response when the API call is successful."""
-    monkeypatch.setattr("src.django_owm.utils.api.OWM_API_KEY", "test_key")
+    override_owm_settings(OWM_API_KEY="test_key")
 
     class MockResponse:
         """Mock response object with JSON method."""
@@ -441,9 +555,9 @@ def test_make_api_call_json_response(monkeypatch):
     assert result == {"data": "test"}
 
 
-def test_make_api_call_attribute_error(monkeypatch, caplog):
+def test_make_api_call_attribute_error(override_owm_settings, monkeypatch, caplog):
     """Test that make_api_call handles attribute errors gracefully."""
-    monkeypatch.setattr("src.django_owm.utils.api.OWM_API_KEY", "test_key")
+    override_owm_settings(OWM_API_KEY="test_key")
 
     class MockResponse:
         """Mock response object with attribute error."""
@@ -459,9 +573,12 @@ def test_make_api_call_attribute_error(monkeypatch, caplog):
     assert "Error parsing JSON response" in caplog.text
 
 
-def test_make_api_call_request_exception(monkeypatch, caplog):
+@pytest.mark.django_db
+def test_make_api_call_request_exception(override_owm_settings, monkeypatch, caplog):
     """Test that make_api_call handles requests exceptions gracefully."""
-    monkeypatch.setattr("src.django_owm.utils.api.OWM_API_KEY", "test_key")
+    override_owm_settings(OWM_API_KEY="test_key")
+    # Request exceptions are retried; don't wait between attempts
+    monkeypatch.setattr("src.django_owm.utils.api.time.sleep", lambda seconds: None)
     monkeypatch.setattr(
         "requests.get", lambda url, timeout: (_ for _ in ()).throw(requests.RequestException("Test error"))
     )
@@ -471,3 +588,314 @@ def test_make_api_call_request_exception(monkeypatch, caplog):
 
     assert result is None
     assert "Error fetching weather data: Test error" in caplog.text
+
+
+def test_minute_rate_limiter():
+    """Test that the rate limiter waits once the per-minute limit is reached."""
+    clock = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    limiter = MinuteRateLimiter(3, calls_already_made=1, clock=lambda: clock[0], sleep=sleep)
+    limiter.acquire()
+    clock[0] = 10.0
+    limiter.acquire()
+    assert sleeps == []
+
+    limiter.acquire()
+    assert sleeps == [50.0]
+    assert clock[0] == 60.0
+
+
+def test_bulk_fetch_summary():
+    """Test the throughput statistics of a bulk fetch."""
+    summary = BulkFetchSummary(calls=4, elapsed=2.0, latencies=[0.4, 0.1, 0.3, 0.2])
+    assert summary.calls_per_second == 2.0
+    assert summary.latency_percentile(50) == 0.2
+    assert summary.latency_percentile(95) == 0.4
+    assert BulkFetchSummary().latency_percentile(95) == 0.0
+    assert BulkFetchSummary().calls_per_second == 0.0
+
+
+def test_run_lock():
+    """Test that a run lock can only be held once at a time and is released afterwards."""
+    with run_lock("test") as first:
+        with run_lock("test") as second:
+            assert first
+            assert not second
+        # A run that failed to take the lock must not release it
+        with run_lock("test") as third:
+            assert not third
+    with run_lock("test") as fourth:
+        assert fourth
+
+
+@pytest.fixture
+def fake_owm_server(override_owm_settings):
+    """Run a local HTTP server standing in for the One Call API, answering with queued responses.
+
+    Yields a list to append ``(status, headers, body)`` responses to; bodies are sent as JSON, except bytes, which are
+    sent as they are. The requested paths are recorded on its ``requests`` attribute. Once the queue is empty, the
+    server answers 200 with an empty JSON object.
+    """
+
+    class Responses(list):
+        requests = []
+
+    responses = Responses()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            responses.requests.append(self.path)
+            status, headers, body = responses.pop(0) if responses else (200, {}, {})
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body if isinstance(body, bytes) else json.dumps(body).encode())
+
+        def log_message(self, format, *args):  # noqa: A002
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    override_owm_settings(OWM_API_KEY="test_key", OWM_API_BASE_URL=f"http://127.0.0.1:{server.server_port}/onecall")
+    yield responses
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def recorded_sleeps(monkeypatch):
+    """Record the waits between retries instead of sleeping."""
+    sleeps = []
+    monkeypatch.setattr("src.django_owm.utils.api.time.sleep", sleeps.append)
+    return sleeps
+
+
+@pytest.mark.django_db
+def test_make_api_call_retries_transient_errors(fake_owm_server, recorded_sleeps):
+    """Test that 5xx and 429 responses are retried, honouring Retry-After, and that retries are logged as calls."""
+    fake_owm_server.extend(
+        [
+            (503, {}, {"message": "unavailable"}),
+            (429, {"Retry-After": "2"}, {"message": "too many requests"}),
+            (200, {}, {"current": {"dt": 1609459200, "temp": 280.5}}),
+        ]
+    )
+
+    data = make_api_call(Decimal("10.00"), Decimal("20.00"))
+
+    assert data == {"current": {"dt": 1609459200, "temp": "280.5"}}
+    assert len(fake_owm_server.requests) == 3
+    assert "lat=10.00&lon=20.00" in fake_owm_server.requests[0]
+    assert len(recorded_sleeps) == 2
+    assert 0 <= recorded_sleeps[0] <= 1.0
+    assert recorded_sleeps[1] == 2.0
+    assert apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog")).objects.count() == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "status,headers",
+    [(401, {}), (404, {}), (429, {"Retry-After": "3600"})],
+)
+def test_make_api_call_does_not_retry(fake_owm_server, recorded_sleeps, status, headers):
+    """Test that auth errors, missing resources and long Retry-After waits are not retried."""
+    fake_owm_server.append((status, headers, {"message": "error"}))
+
+    assert make_api_call(Decimal("10.00"), Decimal("20.00")) is None
+    assert len(fake_owm_server.requests) == 1
+    assert recorded_sleeps == []
+
+
+@pytest.mark.django_db
+def test_request_weather_data_gives_up_after_max_attempts(fake_owm_server, recorded_sleeps):
+    """Test that a call is attempted at most max_attempts times."""
+    fake_owm_server.extend([(500, {}, {})] * 5)
+    retries = []
+
+    result = request_weather_data(
+        Decimal("10.00"),
+        Decimal("20.00"),
+        retry_policy=RetryPolicy(max_attempts=4, backoff_base=1.0, jitter=False),
+        before_retry=lambda: retries.append(True),
+    )
+
+    assert result.data is None
+    assert result.attempts == 4
+    assert result.status_code == 500
+    assert result.error == "HTTP 500"
+    assert recorded_sleeps == [1.0, 2.0, 4.0]
+    assert len(retries) == 3
+
+
+def test_retry_policy_backoff():
+    """Test exponential backoff with and without jitter."""
+    policy = RetryPolicy(backoff_base=2.0, backoff_max=10.0, jitter=False)
+    assert [policy.backoff(retry) for retry in (1, 2, 3, 4)] == [2.0, 4.0, 8.0, 10.0]
+
+    jittered = RetryPolicy(backoff_base=2.0, backoff_max=10.0)
+    assert all(0 <= jittered.backoff(3) <= 8.0 for _ in range(50))
+
+
+def test_parse_retry_after():
+    """Test parsing Retry-After headers given in seconds or as an HTTP date."""
+    assert parse_retry_after("30") == 30.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    retry_at = timezone.now() + datetime.timedelta(seconds=60)
+    assert 55 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 60
+
+
+@pytest.fixture
+def breaker_clock(monkeypatch):
+    """Control the time seen by the circuit breaker."""
+    clock = [1000.0]
+    monkeypatch.setattr("src.django_owm.utils.circuit_breaker.time.time", lambda: clock[0])
+    return clock
+
+
+def test_circuit_breaker_opens_and_half_opens(breaker_clock):
+    """Test that the circuit opens after consecutive failures and lets a single probe through after the open period."""
+    breaker = CircuitBreaker("test", failure_threshold=3, open_seconds=60)
+
+    breaker.record(500)
+    breaker.record(200)  # The upstream answered, so this resets the failure count
+    breaker.record(None)
+    breaker.record(401)
+    assert breaker.state() == CLOSED
+    breaker.record(429)
+    assert breaker.state() == OPEN
+    assert not breaker.allow_request()
+
+    breaker_clock[0] += 61
+    assert breaker.state() == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # A failed probe opens the circuit again straight away
+    breaker.record(500)
+    assert breaker.state() == OPEN
+
+    breaker_clock[0] += 61
+    assert breaker.allow_request()
+    breaker.record(200)
+    assert breaker.state() == CLOSED
+    assert breaker.allow_request()
+
+
+def test_circuit_breaker_client_errors_are_neutral(breaker_clock):
+    """Test that client errors other than 401, 403 and 429 neither reset the failure count nor close the circuit."""
+    breaker = CircuitBreaker("test", failure_threshold=3, open_seconds=60)
+
+    breaker.record(500)
+    breaker.record(404)
+    breaker.record(500)
+    breaker.record(400)
+    assert breaker.state() == CLOSED
+    breaker.record(500)
+    assert breaker.state() == OPEN
+
+    # A probe answered with 404 leaves the circuit half-open, and lets the next call probe instead
+    breaker_clock[0] += 61
+    assert breaker.allow_request()
+    breaker.record(404)
+    assert breaker.state() == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+@pytest.mark.django_db
+def test_make_api_call_fails_fast_while_circuit_open(fake_owm_server, recorded_sleeps, monkeypatch):
+    """Test that no requests are made while the circuit breaker is open."""
+    monkeypatch.setattr("src.django_owm.utils.api.get_circuit_breaker", lambda: CircuitBreaker("test", 2, 60))
+    fake_owm_server.extend([(500, {}, {})] * 5)
+
+    result = request_weather_data(Decimal("10.00"), Decimal("20.00"), retry_policy=RetryPolicy(max_attempts=5))
+
+    # The circuit opened after the second failure, so the remaining retries were not attempted
+    assert result.attempts == 2
+    assert result.circuit_open
+    assert len(fake_owm_server.requests) == 2
+
+    assert make_api_call(Decimal("10.00"), Decimal("20.00")) is None
+    assert len(fake_owm_server.requests) == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("body", [b"<html>Bad gateway</html>", b'{"current": {', [1, 2]])
+def test_make_api_call_invalid_response(fake_owm_server, recorded_sleeps, monkeypatch, caplog, body):
+    """Test that a 200 response whose body is not a JSON object is a failed call, counted by the circuit breaker."""
+    breaker = CircuitBreaker("test", failure_threshold=1, open_seconds=60)
+    monkeypatch.setattr("src.django_owm.utils.api.get_circuit_breaker", lambda: breaker)
+    fake_owm_server.append((200, {}, body))
+
+    with caplog.at_level(logging.ERROR):
+        assert make_api_call(Decimal("10.00"), Decimal("20.00")) is None
+
+    assert "Error decoding weather data" in caplog.text
+    assert len(fake_owm_server.requests) == 1
+    assert breaker.state() == OPEN
+
+
+@pytest.fixture
+def error_locations():
+    """Create two locations to log errors against."""
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    return [
+        WeatherLocation.objects.create(name=f"Location {index}", latitude=index, longitude=index) for index in range(2)
+    ]
+
+
+@pytest.mark.django_db
+def test_error_log_aggregator(error_locations, django_assert_max_num_queries):
+    """Test that repeated errors are written as one row per location, API and error, with occurrence counts."""
+    WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    first, second = error_locations
+
+    errors = ErrorLogAggregator()
+    for _ in range(3):
+        errors.add(first, "one_call", "Failed to fetch weather data")
+    errors.add(first, "one_call", "Another error")
+    errors.add(second, "one_call", "Failed to fetch weather data")
+    assert len(errors) == 3
+
+    with django_assert_max_num_queries(5):
+        assert errors.flush() == 3
+    assert len(errors) == 0
+
+    row = WeatherErrorLog.objects.get(location=first, error_message="Failed to fetch weather data")
+    assert row.occurrences == 3
+    assert row.first_seen <= row.last_seen
+    assert row.signature == WeatherErrorLog.build_signature("one_call", "Failed to fetch weather data")
+
+    # A later run adds to the existing rows instead of creating new ones
+    errors.add(first, "one_call", "Failed to fetch weather data")
+    errors.add(second, "one_call", "Failed to fetch weather data")
+    with django_assert_max_num_queries(5):
+        assert errors.flush() == 2
+    assert WeatherErrorLog.objects.count() == 3
+    row.refresh_from_db()
+    assert row.occurrences == 4
+
+
+@pytest.mark.django_db
+def test_error_log_aggregator_starts_new_row_after_window(error_locations):
+    """Test that an error recurring after the aggregation window gets a new row."""
+    WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    location = error_locations[0]
+    long_ago = timezone.now() - ERROR_AGGREGATION_WINDOW - datetime.timedelta(minutes=1)
+    save_error_log(location, "one_call", "Failed to fetch weather data")
+    WeatherErrorLog.objects.update(first_seen=long_ago, last_seen=long_ago)
+
+    errors = ErrorLogAggregator()
+    errors.add(location, "one_call", "Failed to fetch weather data")
+    errors.flush()
+
+    assert list(WeatherErrorLog.objects.order_by("last_seen").values_list("occurrences", flat=True)) == [1, 1]
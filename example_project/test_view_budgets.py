@@ -0,0 +1,121 @@
+"""Query count and wall time budgets for every URL of the django_owm app.
+
+Every URL is requested through the project's URLconf for a location with a large, seeded weather history, and must
+stay within the number of queries budgeted for it below. New URLs must be given a budget. The example project uses
+integer location IDs; to run the same budgets against UUID-keyed models and the UUID URL set, run this module with
+``--ds=example_project.settings_uuid --nomigrations``, as the ``tests`` nox session does.
+"""
+
+import datetime
+import importlib.util
+import time
+
+import pytest
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from src.django_owm.app_settings import owm_settings
+from src.django_owm.urls import urlpatterns
+from src.django_owm.utils.saving import ErrorLogAggregator
+from src.django_owm.utils.synthetic import SyntheticWeatherGenerator
+
+
+# Days of weather history for the location whose pages are requested, and the number of other locations
+HISTORY_DAYS = 90
+OTHER_LOCATIONS = 60
+
+# Longest time a URL may take to respond, in seconds. The slowest URL, weather_history, takes under a second here;
+# this only catches pages that stop being bounded, and leaves slow CI machines plenty of room
+WALL_TIME_BUDGET = 10.0
+
+# The most queries each URL may make, and the query parameters it is requested with
+QUERY_BUDGETS = {
+    "list_locations": (2, {}),
+    "create_location": (0, {}),
+    "locations_geojson": (2, {"bbox": "-180,-90,180,90", "zoom": "3"}),
+    "metrics": (9, {}),
+    "delete_location": (1, {}),
+    "update_location": (1, {}),
+    "weather_detail": (2, {}),
+    "weather_history": (2, {}),
+    "weather_forecast": (3, {}),
+    "weather_alerts": (2, {}),
+    "weather_errors": (2, {}),
+    "weather_history_partial": (2, {}),
+    "weather_forecast_partial": (3, {}),
+    "weather_alerts_partial": (2, {}),
+    "weather_errors_partial": (2, {}),
+    "weather_dashboard_partial": (6, {}),
+}
+
+
+def load_urlpatterns(use_uuid: bool) -> list:
+    """Return the app's URL patterns for integer or UUID location IDs."""
+    with override_settings(DJANGO_OWM={**settings.DJANGO_OWM, "OWM_USE_UUID": use_uuid}):
+        spec = importlib.util.find_spec("src.django_owm.urls")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module.urlpatterns
+
+
+URL_SETS = {"int": load_urlpatterns(use_uuid=False), "uuid": load_urlpatterns(use_uuid=True)}
+
+
+@pytest.fixture(scope="module")
+def seeded_location(django_db_setup, django_db_blocker):
+    """Create a location with a long weather history, some errors, and other locations with a short history."""
+    WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    APICallLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog"))
+    # End the history in the future, so that the forecast pages have rows to show
+    end = timezone.now() + datetime.timedelta(days=2)
+    with django_db_blocker.unblock():
+        last_api_call = APICallLog.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        SyntheticWeatherGenerator(locations=1, days=HISTORY_DAYS, seed=1, end=end, minutely=False).run()
+        SyntheticWeatherGenerator(locations=OTHER_LOCATIONS, days=2, seed=2, end=end, minutely=False).run()
+        location = WeatherLocation.objects.get(name="Synthetic location 1-1")
+        errors = ErrorLogAggregator()
+        for index in range(30):
+            errors.add(location, "one_call", f"Failed to fetch weather data ({index})")
+        errors.flush()
+    yield location
+    with django_db_blocker.unblock():
+        WeatherLocation.objects.filter(name__startswith="Synthetic location").delete()
+        APICallLog.objects.filter(pk__gt=last_api_call).delete()
+
+
+def request_url(url_name: str, location_id, params: dict):
+    """Request a URL of the app through the project's URLconf, with a location ID if the URL takes one."""
+    pattern = next(pattern for pattern in urlpatterns if pattern.name == url_name)
+    args = [location_id] if "location_id" in str(pattern.pattern) else []
+    return Client().get(reverse(f"django_owm:{url_name}", args=args), params)
+
+
+def test_every_url_has_a_budget():
+    """Test that the integer and UUID URL sets have the same URLs, each with a budget."""
+    for url_set in URL_SETS.values():
+        assert {pattern.name for pattern in url_set} == set(QUERY_BUDGETS)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url_name", QUERY_BUDGETS)
+def test_url_budget(override_owm_settings, seeded_location, url_name):
+    """Test that a URL stays within its query and wall time budgets."""
+    override_owm_settings(OWM_ENABLE_METRICS_VIEW=True)
+    max_queries, params = QUERY_BUDGETS[url_name]
+
+    # Warm up template and URL resolver caches
+    request_url(url_name, seeded_location.pk, params)
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = request_url(url_name, seeded_location.pk, params)
+        elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert len(queries) <= max_queries, "\n".join(query["sql"] for query in queries.captured_queries)
+    assert elapsed <= WALL_TIME_BUDGET
@@ -1,5 +1,6 @@
 """Tests for the views of the django_owm app."""
 
+import inspect
 from decimal import Decimal
 
 import pytest
@@ -8,13 +9,14 @@ from django.shortcuts import reverse
 from django.urls.exceptions import NoReverseMatch
 from django.utils import timezone
 
-from src.django_owm.app_settings import OWM_MODEL_MAPPINGS
+from src.django_owm import views
+from src.django_owm.app_settings import owm_settings
 
 
 @pytest.fixture
 def weather_location_model():
     """Return the WeatherLocation model."""
-    return apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    return apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
 
 
 @pytest.fixture
@@ -29,7 +31,7 @@ def weather_location_instance(weather_location_model):
 @pytest.fixture
 def current_weather(weather_location_instance):
     """Fixture to create a CurrentWeather instance."""
-    CurrentWeather = apps.get_model(OWM_MODEL_MAPPINGS["CurrentWeather"])
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS["CurrentWeather"])
     return CurrentWeather.objects.create(
         location=weather_location_instance,
         timestamp=timezone.now(),
@@ -62,6 +64,27 @@ def test_weather_detail_view(client, weather_location_instance, current_weather)
     assert response.context["current_weather"] == current_weather
 
 
+@pytest.mark.django_db
+def test_weather_detail_view_materializes_snapshots(override_owm_settings, client, weather_location_instance):
+    """Test that a location's pending snapshots are materialized when its weather is read."""
+    override_owm_settings(OWM_SNAPSHOT_MODE="lazy")
+    WeatherSnapshot = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS["WeatherSnapshot"])
+    now = int(timezone.now().timestamp())
+    weather = [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}]
+    for minutes_ago, temp in ((20, 280.5), (10, 281.5)):
+        data = {"current": {"dt": now - minutes_ago * 60, "temp": temp, "weather": weather}}
+        WeatherSnapshot.objects.create(
+            location=weather_location_instance, payload=WeatherSnapshot.compress_payload(data)
+        )
+
+    url = reverse("django_owm:weather_detail", kwargs={"location_id": weather_location_instance.pk})
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.context["current_weather"].temp == Decimal("281.50")
+    assert not WeatherSnapshot.objects.filter(materialized_at__isnull=True).exists()
+
+
 @pytest.mark.django_db
 def test_list_locations_view(client, weather_location_model, weather_location_instance):
     """Test the list_locations view."""
@@ -161,7 +184,7 @@ def test_update_location_view(client, weather_location_instance):
 @pytest.mark.django_db
 def test_weather_history_view(client, weather_location_instance, current_weather):
     """Test the weather_history view."""
-    CurrentWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
     weather2 = CurrentWeather.objects.create(
         location=weather_location_instance,
         timestamp=timezone.now() - timezone.timedelta(hours=2),
@@ -185,8 +208,8 @@ def test_weather_history_view(client, weather_location_instance, current_weather
 @pytest.mark.django_db
 def test_weather_forecast_view(client, weather_location_instance):
     """Test the weather_forecast view."""
-    HourlyWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("HourlyWeather"))
-    DailyWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("DailyWeather"))
+    HourlyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather"))
+    DailyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("DailyWeather"))
 
     now = timezone.now()
 
@@ -225,7 +248,7 @@ def test_weather_forecast_view(client, weather_location_instance):
 @pytest.mark.django_db
 def test_weather_alerts_view(client, weather_location_instance):
     """Test the weather_alerts view."""
-    WeatherAlert = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
 
     now = timezone.now()
 
@@ -237,6 +260,15 @@ def test_weather_alerts_view(client, weather_location_instance):
         end=now + timezone.timedelta(hours=1),
         description="This is a test alert.",
     )
+    WeatherAlert.objects.create(
+        location=weather_location_instance,
+        sender_name="Test Sender",
+        event="Cleared Alert",
+        start=now - timezone.timedelta(hours=1),
+        end=now + timezone.timedelta(hours=1),
+        description="This alert was withdrawn.",
+        cleared_at=now,
+    )
 
     url = reverse("django_owm:weather_alerts", args=[weather_location_instance.id])
     response = client.get(url)
@@ -248,7 +280,7 @@ def test_weather_alerts_view(client, weather_location_instance):
 @pytest.mark.django_db
 def test_weather_errors_view(client, weather_location_instance):
     """Test the weather_errors view."""
-    WeatherErrorLog = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
 
     error_log = WeatherErrorLog.objects.create(
         location=weather_location_instance,
@@ -347,7 +379,7 @@ def test_list_locations_view_empty_database(client, weather_location_model):
 @pytest.mark.django_db
 def test_weather_history_view_large_dataset(client, weather_location_instance):
     """Test the weather_history view with a large dataset."""
-    CurrentWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
     # Create 1000 weather records
     for i in range(1000):
         CurrentWeather.objects.create(
@@ -412,8 +444,8 @@ def test_weather_history_partial(client, weather_location_instance, current_weat
 @pytest.mark.django_db
 def test_weather_forecast_partial(client, weather_location_instance):
     """Test the weather_forecast_partial view."""
-    HourlyWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("HourlyWeather"))
-    DailyWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("DailyWeather"))
+    HourlyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather"))
+    DailyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("DailyWeather"))
 
     # Create some forecast data
     HourlyWeather.objects.create(
@@ -447,7 +479,7 @@ def test_weather_forecast_partial(client, weather_location_instance):
 @pytest.mark.django_db
 def test_weather_alerts_partial(client, weather_location_instance):
     """Test the weather_alerts_partial view."""
-    WeatherAlert = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
 
     # Create a weather alert
     WeatherAlert.objects.create(
@@ -472,7 +504,7 @@ def test_weather_alerts_partial(client, weather_location_instance):
 @pytest.mark.django_db
 def test_weather_errors_partial(client, weather_location_instance):
     """Test the weather_errors_partial view."""
-    WeatherErrorLog = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
 
     # Create a weather error log
     WeatherErrorLog.objects.create(
@@ -495,7 +527,7 @@ def test_weather_errors_partial(client, weather_location_instance):
 @pytest.mark.django_db
 def test_weather_history_partial_pagination(client, weather_location_instance):
     """Test pagination in the weather_history_partial view."""
-    CurrentWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
 
     # Create 10 weather records
     for i in range(10):
@@ -549,3 +581,216 @@ def test_weather_errors_partial_no_errors(client, weather_location_instance):
     assert response.status_code == 200
     assert "page_obj" in response.context
     assert len(response.context["page_obj"]) == 0
+
+
+@pytest.mark.parametrize(
+    "view_name",
+    [
+        "list_locations",
+        "weather_detail",
+        "weather_history",
+        "weather_forecast",
+        "weather_alerts",
+        "weather_errors",
+        "weather_history_partial",
+        "weather_forecast_partial",
+        "weather_alerts_partial",
+        "weather_errors_partial",
+    ],
+)
+def test_read_only_views_are_async(view_name):
+    """Test that the read-only views are coroutine functions."""
+    assert inspect.iscoroutinefunction(getattr(views, view_name))
+
+
+@pytest.mark.django_db
+def test_weather_history_partial_invalid_page(client, weather_location_instance):
+    """Test that the async pagination falls back like Paginator.get_page."""
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+
+    for i in range(7):
+        CurrentWeather.objects.create(
+            location=weather_location_instance,
+            timestamp=timezone.now() - timezone.timedelta(hours=i),
+            temp=Decimal("20.0"),
+            weather_condition_id=800,
+            weather_condition_main="Clear",
+        )
+
+    url = reverse("django_owm:weather_history_partial", kwargs={"location_id": weather_location_instance.id})
+
+    response = client.get(url, {"page": "abc"})
+    assert response.context["page_obj"].number == 1
+    assert len(response.context["page_obj"]) == 5
+
+    response = client.get(url, {"page": 99})
+    assert response.context["page_obj"].number == 2
+    assert len(response.context["page_obj"]) == 2
+    assert response.context["page_obj"].has_previous()
+
+
+@pytest.mark.django_db
+def test_weather_dashboard_partial(client, weather_location_instance, current_weather):
+    """Test the weather_dashboard_partial view renders every panel."""
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    WeatherAlert.objects.create(
+        location=weather_location_instance,
+        sender_name="Test Sender",
+        event="Test Alert",
+        start=timezone.now(),
+        end=timezone.now() + timezone.timedelta(hours=1),
+        description="This is a test alert.",
+    )
+
+    url = reverse("django_owm:weather_dashboard_partial", kwargs={"location_id": weather_location_instance.id})
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.context["location"] == weather_location_instance
+    assert list(response.context["history_page_obj"]) == [current_weather]
+    assert len(response.context["alerts_page_obj"]) == 1
+    assert len(response.context["hourly_page_obj"]) == 0
+    assert len(response.context["errors_page_obj"]) == 0
+    content = response.content.decode("utf-8")
+    for panel_id in ["weather-history", "weather-forecast", "weather-alerts", "weather-errors"]:
+        assert f'id="{panel_id}"' in content
+
+
+@pytest.mark.django_db
+def test_weather_dashboard_partial_query_count(client, django_assert_max_num_queries, weather_location_instance):
+    """Test that the dashboard loads a location and all panels in a fixed number of queries."""
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    HourlyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather"))
+    now = timezone.now()
+    CurrentWeather.objects.bulk_create(
+        CurrentWeather(
+            location=weather_location_instance,
+            timestamp=now - timezone.timedelta(hours=i),
+            temp=Decimal("20.0"),
+            weather_condition_id=800,
+            weather_condition_main="Clear",
+        )
+        for i in range(50)
+    )
+    HourlyWeather.objects.bulk_create(
+        HourlyWeather(
+            location=weather_location_instance,
+            timestamp=now + timezone.timedelta(hours=i + 1),
+            temp=Decimal("20.0"),
+            weather_condition_id=800,
+            weather_condition_main="Clear",
+        )
+        for i in range(48)
+    )
+
+    url = reverse("django_owm:weather_dashboard_partial", kwargs={"location_id": weather_location_instance.id})
+
+    # One query for the location plus one per panel (history, hourly, daily, alerts, errors)
+    with django_assert_max_num_queries(6):
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.context["history_page_obj"].paginator.count == 50
+    assert response.context["hourly_page_obj"].paginator.num_pages == 10
+
+
+@pytest.mark.django_db
+def test_weather_forecast_partial_query_count(client, django_assert_max_num_queries, weather_location_instance):
+    """Test that the forecast partial loads each page and its count in a single query."""
+    url = reverse("django_owm:weather_forecast_partial", kwargs={"location_id": weather_location_instance.id})
+
+    # One query for the location plus one for each of the hourly and daily pages
+    with django_assert_max_num_queries(3):
+        response = client.get(url)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_list_locations_view_pagination(client, weather_location_model):
+    """Test that list_locations paginates locations and provides the map bounds."""
+    WeatherLocation = weather_location_model
+    WeatherLocation.objects.bulk_create(
+        WeatherLocation(name=f"Location {i}", latitude=Decimal(i % 90), longitude=Decimal(i % 180)) for i in range(60)
+    )
+
+    url = reverse("django_owm:list_locations")
+    response = client.get(url)
+    assert response.status_code == 200
+    assert len(response.context["locations"]) == 50
+    assert response.context["locations"].has_next()
+    assert response.context["map_bounds"] == {
+        "south": Decimal("0"),
+        "west": Decimal("0"),
+        "north": Decimal("59"),
+        "east": Decimal("59"),
+    }
+    assert "Location 59" not in response.content.decode("utf-8")
+
+    response = client.get(url, {"page": 2})
+    assert len(response.context["locations"]) == 10
+
+
+@pytest.mark.django_db
+def test_locations_geojson_points(client, weather_location_model, weather_location_instance):
+    """Test that locations_geojson returns individual points inside the bbox."""
+    WeatherLocation = weather_location_model
+    WeatherLocation.objects.create(name="Outside", latitude=Decimal("-30.00"), longitude=Decimal("100.00"))
+
+    url = reverse("django_owm:locations_geojson")
+    response = client.get(url, {"bbox": "-80,35,-70,45", "zoom": 5})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["type"] == "FeatureCollection"
+    assert len(data["features"]) == 1
+    feature = data["features"][0]
+    assert feature["geometry"]["coordinates"] == [-74.01, 40.71]
+    assert feature["properties"]["cluster"] is False
+    assert feature["properties"]["name"] == "Test Location"
+    assert feature["properties"]["url"] == reverse("django_owm:weather_detail", args=[weather_location_instance.id])
+
+
+@pytest.mark.django_db
+def test_locations_geojson_clusters(client, weather_location_model, monkeypatch):
+    """Test that locations_geojson clusters locations server-side when there are many of them."""
+    monkeypatch.setattr("src.django_owm.views.MAX_UNCLUSTERED_POINTS", 10)
+    WeatherLocation = weather_location_model
+    WeatherLocation.objects.bulk_create(
+        [WeatherLocation(latitude=Decimal("10.00") + Decimal(i) / 100, longitude=Decimal("10.00")) for i in range(20)]
+        + [WeatherLocation(latitude=Decimal("-40.00"), longitude=Decimal(-100 - i)) for i in range(5)]
+    )
+
+    url = reverse("django_owm:locations_geojson")
+    response = client.get(url, {"bbox": "-180,-90,180,90", "zoom": 2})
+
+    assert response.status_code == 200
+    features = response.json()["features"]
+    assert all(feature["properties"]["cluster"] for feature in features)
+    assert sum(feature["properties"]["count"] for feature in features) == 25
+    assert sorted(feature["properties"]["count"] for feature in features) == [5, 20]
+
+
+@pytest.mark.django_db
+def test_locations_geojson_antimeridian(client, weather_location_model):
+    """Test that a bbox crossing the antimeridian includes locations on both sides."""
+    WeatherLocation = weather_location_model
+    WeatherLocation.objects.create(name="West", latitude=Decimal("0.00"), longitude=Decimal("179.50"))
+    WeatherLocation.objects.create(name="East", latitude=Decimal("0.00"), longitude=Decimal("-179.50"))
+    WeatherLocation.objects.create(name="Far", latitude=Decimal("0.00"), longitude=Decimal("0.00"))
+
+    url = reverse("django_owm:locations_geojson")
+    response = client.get(url, {"bbox": "179,-1,181,1", "zoom": 8})
+
+    names = sorted(feature["properties"]["name"] for feature in response.json()["features"])
+    assert names == ["East", "West"]
+
+
+@pytest.mark.parametrize("bbox", [None, "1,2,3", "a,b,c,d", "0,10,10,0"])
+@pytest.mark.django_db
+def test_locations_geojson_invalid_bbox(client, bbox):
+    """Test that locations_geojson rejects missing or invalid bounding boxes."""
+    url = reverse("django_owm:locations_geojson")
+    response = client.get(url, {"bbox": bbox} if bbox else {})
+    assert response.status_code == 400
+    assert "error" in response.json()
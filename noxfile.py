@@ -161,11 +161,46 @@ def tests(session: Session, django: str) -> None:
     try:
 
         session.run("coverage", "run", "-m", "pytest", *session.posargs)
+        if not session.posargs:
+            # Run the view budgets and the UUID-only tests again with UUID primary keys and the UUID URL set
+            session.run(
+                "coverage",
+                "run",
+                "--append",
+                "-m",
+                "pytest",
+                "example_project/test_view_budgets.py",
+                "example_project/test_management_commands.py::test_fetch_weather_bulk_command_malformed_uuid",
+                "--ds=example_project.settings_uuid",
+                "--nomigrations",
+            )
     finally:
         if session.interactive:
             session.notify("coverage", posargs=[])
 
 
+@session(python=PYTHON_STABLE_VERSION)
+@nox.parametrize("django", DJANGO_STABLE_VERSION)
+def benchmarks(session: Session, django: str) -> None:
+    """Run the benchmark suite, saving the results as JSON under .benchmarks/ for comparison across commits."""
+    session.install(f"django=={django}")
+    session.install(".")
+    session.install(
+        "pytest",
+        "pytest-benchmark",
+        "pytest-django",
+        "requests",
+    )
+    session.run(
+        "pytest",
+        "benchmarks",
+        "-o",
+        "python_files=bench_*.py",
+        "--benchmark-autosave",
+        *session.posargs,
+    )
+
+
 @session(python=PYTHON_STABLE_VERSION)
 @nox.parametrize("django", DJANGO_STABLE_VERSION)
 def coverage(session: Session, django: str) -> None:
@@ -2,20 +2,102 @@
 
 from django.apps import apps
 from django.contrib import admin
-
-from .app_settings import OWM_MODEL_MAPPINGS
-from .app_settings import OWM_USE_BUILTIN_ADMIN
-
-
-if OWM_USE_BUILTIN_ADMIN:
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    CurrentWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
-    MinutelyWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("MinutelyWeather"))
-    HourlyWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("HourlyWeather"))
-    DailyWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("DailyWeather"))
-    WeatherAlertModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherAlert"))
-    WeatherErrorLogModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
-    APICallLogModel = apps.get_model(OWM_MODEL_MAPPINGS.get("APICallLog"))
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from .app_settings import owm_settings
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids an exact ``COUNT(*)`` on large, unfiltered PostgreSQL tables.
+
+    For an unfiltered queryset, the row estimate kept by PostgreSQL's statistics is used once it exceeds
+    ``estimate_threshold``. Filtered querysets, small tables and other databases fall back to an exact count.
+    """
+
+    estimate_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        """Return the estimated or exact number of objects."""
+        estimate = self.estimated_count()
+        if estimate is not None and estimate >= self.estimate_threshold:
+            return estimate
+        return super().count
+
+    def estimated_count(self) -> int | None:
+        """Return PostgreSQL's row estimate for the table, or None if it cannot be used."""
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or queryset.query.where or queryset.query.distinct:
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 for tables that have never been analyzed
+        if not row or row[0] < 0:
+            return None
+        return int(row[0])
+
+
+class LocationListFilter(admin.SimpleListFilter):
+    """Filter by location without rendering a choice for every location.
+
+    Locations are only listed when there are few of them; otherwise only the selected location is shown, and other
+    locations can be selected with the ``location`` query parameter.
+    """
+
+    title = _("location")
+    parameter_name = "location"
+    max_choices = 50
+
+    def lookups(self, request, model_admin):
+        """Return the locations to offer as choices."""
+        WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+        locations = list(WeatherLocationModel.objects.order_by("pk")[: self.max_choices + 1])
+        if len(locations) > self.max_choices:
+            try:
+                locations = list(WeatherLocationModel.objects.filter(pk=self.value())) if self.value() else []
+            except (ValueError, ValidationError):
+                locations = []
+        return [(str(location.pk), str(location)) for location in locations]
+
+    def queryset(self, request, queryset):
+        """Filter the queryset to the selected location."""
+        if self.value():
+            return queryset.filter(location_id=self.value())
+        return queryset
+
+
+class WeatherDataAdminMixin:
+    """Options shared by the admins of the large, time-series weather models."""
+
+    date_hierarchy = "timestamp"
+    list_filter = (LocationListFilter,)
+    list_select_related = ("location",)
+    raw_id_fields = ("location",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+if owm_settings.OWM_USE_BUILTIN_ADMIN:
+    WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    CurrentWeatherModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    MinutelyWeatherModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("MinutelyWeather"))
+    HourlyWeatherModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather"))
+    DailyWeatherModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("DailyWeather"))
+    WeatherAlertModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    WeatherErrorLogModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    APICallLogModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog"))
 
     if WeatherLocationModel and not admin.site.is_registered(WeatherLocationModel):
 
@@ -23,12 +105,15 @@ if OWM_USE_BUILTIN_ADMIN:
         class WeatherLocationAdmin(admin.ModelAdmin):
             """Admin for WeatherLocation model."""
 
-            list_display = ("name", "latitude", "longitude", "timezone")
+            list_display = ("name", "latitude", "longitude", "timezone", "priority", "next_fetch_at")
+            readonly_fields = ("last_fetched_at", "next_fetch_at")
+            search_fields = ("name",)
+            show_full_result_count = False
 
     if CurrentWeatherModel and not admin.site.is_registered(CurrentWeatherModel):
 
         @admin.register(CurrentWeatherModel)
-        class CurrentWeatherAdmin(admin.ModelAdmin):
+        class CurrentWeatherAdmin(WeatherDataAdminMixin, admin.ModelAdmin):
             """Admin for CurrentWeather model."""
 
             list_display = ("location", "timestamp", "temp", "feels_like", "pressure", "humidity")
@@ -36,42 +121,48 @@ if OWM_USE_BUILTIN_ADMIN:
     if MinutelyWeatherModel and not admin.site.is_registered(MinutelyWeatherModel):
 
         @admin.register(MinutelyWeatherModel)
-        class MinutelyWeatherAdmin(admin.ModelAdmin):
+        class MinutelyWeatherAdmin(WeatherDataAdminMixin, admin.ModelAdmin):
             """Admin for MinutelyWeather model."""
 
             list_display = ("timestamp", "precipitation")
+            list_select_related = False
 
     if HourlyWeatherModel and not admin.site.is_registered(HourlyWeatherModel):
 
         @admin.register(HourlyWeatherModel)
-        class HourlyWeatherAdmin(admin.ModelAdmin):
+        class HourlyWeatherAdmin(WeatherDataAdminMixin, admin.ModelAdmin):
             """Admin for HourlyWeather model."""
 
             list_display = ("timestamp", "temp", "feels_like", "pressure", "humidity")
+            list_select_related = False
 
     if DailyWeatherModel and not admin.site.is_registered(DailyWeatherModel):
 
         @admin.register(DailyWeatherModel)
-        class DailyWeatherAdmin(admin.ModelAdmin):
+        class DailyWeatherAdmin(WeatherDataAdminMixin, admin.ModelAdmin):
             """Admin for DailyWeather model."""
 
             list_display = ("timestamp", "pressure", "humidity")
+            list_select_related = False
 
     if WeatherAlertModel and not admin.site.is_registered(WeatherAlertModel):
 
         @admin.register(WeatherAlertModel)
-        class WeatherAlertAdmin(admin.ModelAdmin):
+        class WeatherAlertAdmin(WeatherDataAdminMixin, admin.ModelAdmin):
             """Admin for WeatherAlert model."""
 
-            list_display = ("sender_name", "event", "start", "end")
+            date_hierarchy = None
+            list_display = ("sender_name", "event", "start", "end", "first_seen", "last_seen", "cleared_at")
+            list_select_related = False
 
     if WeatherErrorLogModel and not admin.site.is_registered(WeatherErrorLogModel):
 
         @admin.register(WeatherErrorLogModel)
-        class WeatherErrorLogAdmin(admin.ModelAdmin):
+        class WeatherErrorLogAdmin(WeatherDataAdminMixin, admin.ModelAdmin):
             """Admin for WeatherErrorLog model."""
 
-            list_display = ("timestamp", "location", "api_name", "error_message")
+            list_display = ("last_seen", "location", "api_name", "error_message", "occurrences", "first_seen")
+            list_filter = (LocationListFilter, "api_name")
 
     if APICallLogModel and not admin.site.is_registered(APICallLogModel):
 
@@ -79,4 +170,22 @@ if OWM_USE_BUILTIN_ADMIN:
         class APICallLogAdmin(admin.ModelAdmin):
             """Admin for APICallLog model."""
 
+            date_hierarchy = "timestamp"
             list_display = ("timestamp", "api_name")
+            list_filter = ("api_name",)
+            paginator = EstimatedCountPaginator
+            show_full_result_count = False
+
+# WeatherSnapshot is optional, so it is only registered when it is mapped
+if owm_settings.OWM_USE_BUILTIN_ADMIN and owm_settings.OWM_MODEL_MAPPINGS.get("WeatherSnapshot"):
+    WeatherSnapshotModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS["WeatherSnapshot"])
+
+    if not admin.site.is_registered(WeatherSnapshotModel):
+
+        @admin.register(WeatherSnapshotModel)
+        class WeatherSnapshotAdmin(WeatherDataAdminMixin, admin.ModelAdmin):
+            """Admin for WeatherSnapshot model."""
+
+            date_hierarchy = "fetched_at"
+            list_display = ("fetched_at", "location", "materialized_at")
+            readonly_fields = ("materialized_at",)
@@ -1,11 +1,20 @@
-"""App settings for the django_owm app."""
+"""App settings for the django_owm app.
+
+Settings are read from ``settings.DJANGO_OWM`` through ``owm_settings``, when they are first used rather than when
+this module is imported, and read again after ``DJANGO_OWM`` changes (e.g. with ``override_settings`` in tests). Read
+them at the time they are needed, as ``owm_settings.OWM_API_KEY``.
+"""
+
+import datetime
+from functools import cached_property
+from typing import Any
 
 from django.conf import settings
+from django.core.signals import setting_changed
 from django.db import models
+from django.dispatch import receiver
 
 
-DJANGO_OWM = getattr(settings, "DJANGO_OWM", {})
-
 # Example:
 # DJANGO_OWM = {
 #     'OWM_API_KEY': None,  # Developer should provide their API key in settings.py
@@ -25,12 +34,35 @@ DJANGO_OWM = getattr(settings, "DJANGO_OWM", {})
 #         'WeatherAlert': 'myapp.MyWeatherAlert',
 #         'WeatherErrorLog': 'myapp.MyWeatherErrorLog',
 #         'APICallLog': 'myapp.MyAPICallLog',
+#         'WeatherSnapshot': 'myapp.MyWeatherSnapshot',  # Optional, see OWM_SNAPSHOT_MODE
 #     },
 #     'OWM_BASE_MODEL': models.Model,  # Base model for OWM models
 #     'OWM_USE_BUILTIN_ADMIN': True,  # Use built-in admin for OWM models
 #     'OWM_USE_BUILTIN_CONCRETE_MODELS': False,  # Use built-in concrete models
 #     'OWM_SHOW_MAP': False,  # Show map in admin for AbstractWeatherLocation
 #     'OWM_USE_UUID': False,  # Use UUIDs with OWM models
+#     'OWM_NUMERIC_STORAGE': 'decimal',  # Store measurements as 'decimal', 'float' or 'scaled' integers
+#     'OWM_MINUTELY_ROLLING_WINDOW': False,  # Keep only the latest fetch's minutely forecast for each location
+#     'OWM_CHANGE_DETECTION': False,  # Skip saving blocks of a response that are unchanged since the last fetch
+#     'OWM_SNAPSHOT_MODE': 'off',  # Also store responses as snapshots ('archive'), or only store snapshots ('lazy')
+#     'OWM_PARTITIONING': {  # Partitions to maintain for tables partitioned with PartitionByTimestamp (PostgreSQL)
+#         'MinutelyWeather': {'interval': 'day', 'retention': datetime.timedelta(days=7), 'premake': 2},
+#     },
+#     'OWM_DEFAULT_REFRESH_INTERVAL': datetime.timedelta(hours=1),  # How often to refresh each location by default
+#     'OWM_API_BASE_URL': 'https://api.openweathermap.org/data/3.0/onecall',  # One Call API endpoint
+#     'OWM_API_RETRY': {  # Retry policy for failed API calls
+#         'max_attempts': 3,
+#         'backoff_base': 1.0,  # Seconds before the first retry, doubled for each further retry
+#         'backoff_max': 30.0,  # Longest wait before a retry, including waits asked for with Retry-After
+#         'jitter': True,  # Wait a random time up to the backoff, to spread out retries from many workers
+#     },
+#     'OWM_API_TRANSPORT': None,  # {'BACKEND': dotted path to a transport class, 'OPTIONS': {...}}; None uses requests
+#     'OWM_METRICS_BACKEND': None,  # {'BACKEND': dotted path to a metrics backend, 'OPTIONS': {...}}; None discards
+#     'OWM_ENABLE_METRICS_VIEW': False,  # Serve metrics in the Prometheus text format from the metrics view
+#     'OWM_API_CIRCUIT_BREAKER': {  # Stop calling the API while it is failing
+#         'failure_threshold': 5,  # Consecutive failed calls before the circuit opens
+#         'open_seconds': 60,  # How long calls fail fast before a probe call is let through
+#     },
 # }
 
 
@@ -50,26 +82,93 @@ def get_base_model():
     return Model
 
 
-OWM_API_KEY = DJANGO_OWM.get("OWM_API_KEY", None)
-OWM_API_RATE_LIMITS = DJANGO_OWM.get(
-    "OWM_API_RATE_LIMITS", {"one_call": {"calls_per_minute": 60, "calls_per_month": 1000000}}
-)
-OWM_MODEL_MAPPINGS = DJANGO_OWM.get("OWM_MODEL_MAPPINGS", {})
-OWM_BASE_MODEL = DJANGO_OWM.get("OWM_BASE_MODEL", get_base_model)
-OWM_USE_BUILTIN_ADMIN = DJANGO_OWM.get("OWM_USE_BUILTIN_ADMIN", True)
-OWM_SHOW_MAP = DJANGO_OWM.get("OWM_SHOW_MAP", False)
-OWM_USE_UUID = DJANGO_OWM.get("OWM_USE_UUID", False)
-
-OWM_USE_BUILTIN_CONCRETE_MODELS = DJANGO_OWM.get("OWM_USE_BUILTIN_CONCRETE_MODELS", False)
-
-if OWM_USE_BUILTIN_CONCRETE_MODELS:
-    OWM_MODEL_MAPPINGS = {
-        "WeatherLocation": "django_owm.WeatherLocation",
-        "CurrentWeather": "django_owm.CurrentWeather",
-        "MinutelyWeather": "django_owm.MinutelyWeather",
-        "HourlyWeather": "django_owm.HourlyWeather",
-        "DailyWeather": "django_owm.DailyWeather",
-        "WeatherAlert": "django_owm.WeatherAlert",
-        "WeatherErrorLog": "django_owm.WeatherErrorLog",
-        "APICallLog": "django_owm.APICallLog",
-    }
+DEFAULTS = {
+    "OWM_API_KEY": None,
+    "OWM_API_RATE_LIMITS": {"one_call": {"calls_per_minute": 60, "calls_per_month": 1000000}},
+    "OWM_MODEL_MAPPINGS": {},
+    "OWM_BASE_MODEL": get_base_model,
+    "OWM_USE_BUILTIN_ADMIN": True,
+    "OWM_SHOW_MAP": False,
+    "OWM_USE_UUID": False,
+    "OWM_NUMERIC_STORAGE": "decimal",
+    "OWM_MINUTELY_ROLLING_WINDOW": False,
+    "OWM_CHANGE_DETECTION": False,
+    "OWM_SNAPSHOT_MODE": "off",
+    "OWM_PARTITIONING": {},
+    "OWM_DEFAULT_REFRESH_INTERVAL": datetime.timedelta(hours=1),
+    "OWM_API_BASE_URL": "https://api.openweathermap.org/data/3.0/onecall",
+    "OWM_API_RETRY": {},
+    "OWM_API_CIRCUIT_BREAKER": {},
+    "OWM_API_TRANSPORT": None,
+    "OWM_METRICS_BACKEND": None,
+    "OWM_ENABLE_METRICS_VIEW": False,
+    "OWM_USE_BUILTIN_CONCRETE_MODELS": False,
+}
+
+# The models used instead of OWM_MODEL_MAPPINGS when OWM_USE_BUILTIN_CONCRETE_MODELS is on
+BUILTIN_MODEL_MAPPINGS = {
+    "WeatherLocation": "django_owm.WeatherLocation",
+    "CurrentWeather": "django_owm.CurrentWeather",
+    "MinutelyWeather": "django_owm.MinutelyWeather",
+    "HourlyWeather": "django_owm.HourlyWeather",
+    "DailyWeather": "django_owm.DailyWeather",
+    "WeatherAlert": "django_owm.WeatherAlert",
+    "WeatherErrorLog": "django_owm.WeatherErrorLog",
+    "APICallLog": "django_owm.APICallLog",
+    "WeatherSnapshot": "django_owm.WeatherSnapshot",
+}
+
+
+class OwmSettings:
+    """The settings of the django_owm app, as attributes named like the keys of ``DJANGO_OWM``.
+
+    Each setting is read from ``settings.DJANGO_OWM`` (or its default) the first time it is used, then cached on the
+    instance. ``reload`` clears the cache; it is called whenever ``DJANGO_OWM`` changes.
+    """
+
+    def __init__(self, defaults: dict[str, Any]):
+        self.defaults = defaults
+
+    @cached_property
+    def user_settings(self) -> dict[str, Any]:
+        """Return the ``DJANGO_OWM`` setting."""
+        return getattr(settings, "DJANGO_OWM", {})
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in self.defaults:
+            raise AttributeError(f"Invalid django_owm setting: {name!r}")
+        value = self.user_settings.get(name, self.defaults[name])
+        if name == "OWM_MODEL_MAPPINGS" and self.OWM_USE_BUILTIN_CONCRETE_MODELS:
+            value = BUILTIN_MODEL_MAPPINGS
+        elif name == "OWM_BASE_MODEL" and callable(value) and not isinstance(value, type):
+            # A function returning the base model, like ``get_base_model``, is called once
+            value = value()
+        setattr(self, name, value)
+        return value
+
+    def reload(self) -> None:
+        """Clear the cached settings, so that they are read again when next used."""
+        for name in [*self.defaults, "user_settings"]:
+            self.__dict__.pop(name, None)
+
+
+owm_settings = OwmSettings(DEFAULTS)
+
+
+@receiver(setting_changed)
+def reload_owm_settings(*, setting: str, **kwargs) -> None:  # pylint: disable=W0613
+    """Reload the app settings when ``DJANGO_OWM`` changes."""
+    if setting == "DJANGO_OWM":
+        owm_settings.reload()
+
+
+def __getattr__(name: str) -> Any:
+    """Return a setting imported from this module, e.g. ``from django_owm.app_settings import OWM_API_KEY``.
+
+    The value is the one when it is imported, so prefer reading ``owm_settings`` when the value is needed.
+    """
+    if name == "DJANGO_OWM":
+        return owm_settings.user_settings
+    if name in DEFAULTS:
+        return getattr(owm_settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,8 +4,76 @@ from django.apps import AppConfig
 from django.core.checks import Error
 from django.core.checks import register
 
-from .app_settings import OWM_API_KEY
-from .app_settings import OWM_MODEL_MAPPINGS
+from .app_settings import owm_settings
+
+
+def numeric_storage_errors(obj) -> list[Error]:
+    """Return the errors in the OWM_NUMERIC_STORAGE setting."""
+    from .models.fields import NUMERIC_STORAGES
+
+    if owm_settings.OWM_NUMERIC_STORAGE not in NUMERIC_STORAGES:
+        return [
+            Error(
+                f"Unknown OWM_NUMERIC_STORAGE {owm_settings.OWM_NUMERIC_STORAGE!r}.",
+                hint=f"Set OWM_NUMERIC_STORAGE to one of {', '.join(NUMERIC_STORAGES)}.",
+                obj=obj,
+                id="django_owm.E003",
+            )
+        ]
+    return []
+
+
+def snapshot_mode_errors(obj) -> list[Error]:
+    """Return the errors in the OWM_SNAPSHOT_MODE setting."""
+    from .utils.snapshots import SNAPSHOT_MODES
+
+    if owm_settings.OWM_SNAPSHOT_MODE not in SNAPSHOT_MODES:
+        return [
+            Error(
+                f"Unknown OWM_SNAPSHOT_MODE {owm_settings.OWM_SNAPSHOT_MODE!r}.",
+                hint=f"Set OWM_SNAPSHOT_MODE to one of {', '.join(SNAPSHOT_MODES)}.",
+                obj=obj,
+                id="django_owm.E004",
+            )
+        ]
+    if owm_settings.OWM_SNAPSHOT_MODE != "off" and not owm_settings.OWM_MODEL_MAPPINGS.get("WeatherSnapshot"):
+        return [
+            Error(
+                f"OWM_SNAPSHOT_MODE is {owm_settings.OWM_SNAPSHOT_MODE!r}, but no model is set to store snapshots in.",
+                hint="Set OWM_MODEL_MAPPINGS['WeatherSnapshot'] in your settings.",  # noqa: B907
+                obj=obj,
+                id="django_owm.E005",
+            )
+        ]
+    return []
+
+
+def partitioning_errors(obj) -> list[Error]:
+    """Return the errors in the OWM_PARTITIONING setting."""
+    from .utils.partitioning import INTERVALS
+    from .utils.partitioning import PARTITION_COLUMNS
+
+    errors = []
+    for model_name, options in owm_settings.OWM_PARTITIONING.items():
+        if model_name not in PARTITION_COLUMNS:
+            errors.append(
+                Error(
+                    f"{model_name} cannot be partitioned.",
+                    hint=f"Partition one of {', '.join(PARTITION_COLUMNS)}.",
+                    obj=obj,
+                    id="django_owm.E006",
+                )
+            )
+        elif options.get("interval", "month") not in INTERVALS:
+            errors.append(
+                Error(
+                    f"Unknown partition interval {options['interval']!r} for {model_name}.",
+                    hint=f"Set the interval to one of {', '.join(INTERVALS)}.",
+                    obj=obj,
+                    id="django_owm.E007",
+                )
+            )
+    return errors
 
 
 class DjangoOwmConfig(AppConfig):
@@ -30,7 +98,7 @@ class DjangoOwmConfig(AppConfig):
                 "WeatherErrorLog",
                 "APICallLog",
             ]:
-                model_string = OWM_MODEL_MAPPINGS.get(model_name)
+                model_string = owm_settings.OWM_MODEL_MAPPINGS.get(model_name)
                 if not model_string:
                     errors.append(
                         Error(
@@ -44,7 +112,7 @@ class DjangoOwmConfig(AppConfig):
 
         def check_api_key(app_configs, **kwargs):  # pylint: disable=W0613
             """Check that the API key is set."""
-            if not OWM_API_KEY:
+            if not owm_settings.OWM_API_KEY:
                 return [
                     Error(
                         "OpenWeatherMap API key is not set.",
@@ -55,5 +123,26 @@ class DjangoOwmConfig(AppConfig):
                 ]
             return []
 
+        def check_numeric_storage(app_configs, **kwargs):  # pylint: disable=W0613
+            """Check that the numeric storage is a known one."""
+            return numeric_storage_errors(self)
+
+        def check_snapshot_mode(app_configs, **kwargs):  # pylint: disable=W0613
+            """Check that the snapshot mode is a known one, with a model to store snapshots in."""
+            return snapshot_mode_errors(self)
+
+        def check_partitioning(app_configs, **kwargs):  # pylint: disable=W0613
+            """Check that only models that can be partitioned are, with known intervals."""
+            return partitioning_errors(self)
+
         register(check_model_mappings)
         register(check_api_key)
+        register(check_numeric_storage)
+        register(check_snapshot_mode)
+        register(check_partitioning)
+
+        from .signals import fetch_run_completed
+        from .utils.exposition import publish_run
+
+        # publish_run checks OWM_ENABLE_METRICS_VIEW itself, so the setting can change after startup
+        fetch_run_completed.connect(publish_run, dispatch_uid="django_owm_publish_run")
@@ -8,7 +8,7 @@ from django import forms
 from django.apps import apps
 from django.forms.fields import DecimalField
 
-from .app_settings import OWM_MODEL_MAPPINGS
+from .app_settings import owm_settings
 from .validators import validate_latitude
 from .validators import validate_longitude
 
@@ -59,7 +59,7 @@ class WeatherLocationForm(forms.ModelForm):
     class Meta:
         """Meta class for WeatherLocationForm."""
 
-        model = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+        model = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
         fields = ["name", "latitude", "longitude"]
 
     def __init__(self, *args, **kwargs):
@@ -6,7 +6,7 @@ from decimal import Decimal
 from django.apps import apps
 from django.core.management.base import BaseCommand
 
-from ...app_settings import OWM_MODEL_MAPPINGS
+from ...app_settings import owm_settings
 
 
 class Command(BaseCommand):
@@ -16,7 +16,7 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         """Handle the command."""
-        WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+        WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
 
         name = input("Enter location name: ")
         latitude = input("Enter latitude: ")
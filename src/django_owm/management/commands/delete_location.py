@@ -4,7 +4,7 @@ from django.apps import apps
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
-from ...app_settings import OWM_MODEL_MAPPINGS
+from ...app_settings import owm_settings
 
 
 class Command(BaseCommand):
@@ -19,7 +19,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         """Handle the command."""
         location_id = options["location_id"]
-        WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+        WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
 
         try:
             location = WeatherLocationModel.objects.get(pk=location_id)
@@ -0,0 +1,51 @@
+"""Management command to export weather locations to a CSV, GeoJSON or NDJSON file."""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from ...app_settings import owm_settings
+from ...utils.location_files import FIELDS
+from ...utils.location_files import FORMATS
+from ...utils.location_files import detect_format
+from ...utils.location_files import write_locations
+
+
+class Command(BaseCommand):
+    """Management command to export weather locations to a file."""
+
+    help = "Export weather locations to a CSV, GeoJSON or NDJSON file, streaming rows from the database."
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument("path", help="Path of the file to write, or - to write to stdout")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Format of the file. Detected from the file extension if not given, defaulting to csv.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000, help="Number of locations to fetch from the database at a time"
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        path = options["path"]
+        file_format = options["format"] or detect_format(path)
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+
+        records = WeatherLocationModel.objects.order_by("pk").values(*FIELDS).iterator(chunk_size=chunk_size)
+
+        if path == "-":
+            write_locations(self.stdout, records, file_format)
+            return
+
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as stream:
+                count = write_locations(stream, records, file_format)
+        except OSError as exc:
+            raise CommandError(f"Could not write {path!r}: {exc}") from exc
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} locations to {path}."))
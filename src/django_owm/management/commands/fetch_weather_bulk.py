@@ -0,0 +1,143 @@
+"""Management command to fetch weather data for many locations concurrently."""
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.utils import timezone
+
+from ...app_settings import owm_settings
+from ...utils.fetching import fetch_locations_concurrently
+from ...utils.fetching import plan_fetch
+from ...utils.geo import filter_bbox
+from ...utils.geo import parse_bbox
+from ...utils.scheduling import claim_due_locations
+from ...utils.scheduling import due_locations
+
+
+class Command(BaseCommand):
+    """Management command to fetch weather data for many locations concurrently."""
+
+    help = (
+        "Fetch weather data for the locations selected by ID, name, bounding box, staleness or due date (all locations "
+        "if no filter is given), making several API calls at once."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument("--ids", nargs="+", metavar="ID", help="IDs of the locations to fetch weather for")
+        parser.add_argument("--name", help="Only fetch locations whose name contains this text (case-insensitive)")
+        parser.add_argument("--bbox", help="Only fetch locations inside this west,south,east,north bounding box")
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            help="Only fetch locations without current weather data from the last this many minutes",
+        )
+        parser.add_argument(
+            "--due",
+            action="store_true",
+            help=(
+                "Only fetch locations that are due according to their refresh interval, highest priority first. "
+                "Locations are claimed, so several workers can share the due locations."
+            ),
+        )
+        parser.add_argument("--workers", type=int, default=4, help="Number of API calls to make at once")
+        parser.add_argument(
+            "--plan",
+            action="store_true",
+            help="Show how many API calls would be made and whether the quotas allow them, without fetching",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+        locations = self.get_locations(options)
+
+        if options["plan"]:
+            self.show_plan(locations.count())
+            return
+
+        if options["due"]:
+            # Claim the due locations, so that other workers running at the same time skip them
+            locations = claim_due_locations(locations, workers=options["workers"])
+        else:
+            locations = locations.iterator()
+        summary = fetch_locations_concurrently(locations, workers=options["workers"])
+
+        self.stdout.write(
+            f"{summary.calls} calls in {summary.elapsed:.2f}s ({summary.calls_per_second:.2f} calls/s), "
+            f"latency p50 {summary.latency_percentile(50) * 1000:.0f}ms, "
+            f"p95 {summary.latency_percentile(95) * 1000:.0f}ms, {summary.rows_written} rows written."
+        )
+        if summary.skipped:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"Skipped {summary.skipped} locations because the monthly API quota is used up or the API is "
+                    "failing."
+                )
+            )
+        message = f"Fetched weather data for {summary.succeeded} locations ({summary.failed} failed)."
+        self.stdout.write(self.style.SUCCESS(message) if not summary.failed else self.style.WARNING(message))
+
+    def get_locations(self, options):
+        """Return the locations selected by the command's filters."""
+        WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+        locations = WeatherLocationModel.objects.order_by("pk")
+
+        if options["ids"]:
+            lookup = "uuid__in" if owm_settings.OWM_USE_UUID else "pk__in"
+            try:
+                locations = locations.filter(**{lookup: options["ids"]})
+                # Evaluate the lookup now, so that malformed IDs are reported as a command error
+                locations.exists()
+            except (ValueError, TypeError, ValidationError) as exc:
+                # Malformed UUIDs raise ValidationError rather than ValueError
+                raise CommandError(f"Invalid location IDs: {exc}") from exc
+        if options["name"]:
+            locations = locations.filter(name__icontains=options["name"])
+        if options["bbox"]:
+            try:
+                west, south, east, north = parse_bbox(options["bbox"])
+            except ValueError as exc:
+                raise CommandError(str(exc)) from exc
+            locations = filter_bbox(locations, west, south, east, north)
+        if options["stale_minutes"] is not None:
+            CurrentWeatherModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+            cutoff = timezone.now() - timezone.timedelta(minutes=options["stale_minutes"])
+            locations = locations.exclude(
+                Exists(CurrentWeatherModel.objects.filter(location=OuterRef("pk"), timestamp__gte=cutoff))
+            )
+        if options["due"]:
+            locations = due_locations(locations)
+        return locations
+
+    def show_plan(self, location_count):
+        """Report the API calls a fetch would make and whether the quotas allow them."""
+        plan = plan_fetch(location_count)
+        self.stdout.write(f"{plan.calls} API calls would be made for {location_count} locations.")
+        self.stdout.write(
+            f"Per-minute quota: {plan.calls_last_minute}/{plan.calls_per_minute} used, "
+            f"{plan.remaining_this_minute} remaining."
+        )
+        self.stdout.write(
+            f"Per-month quota: {plan.calls_last_month}/{plan.calls_per_month} used, "
+            f"{plan.remaining_this_month} remaining."
+        )
+        if not plan.fits_month_quota:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"The monthly quota does not allow this fetch: only {plan.remaining_this_month} calls remain."
+                )
+            )
+        elif not plan.fits_minute_quota:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"The per-minute quota does not allow every call at once; "
+                    f"the fetch will be paced over at least {plan.minimum_minutes} minutes."
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("The quotas allow this fetch."))
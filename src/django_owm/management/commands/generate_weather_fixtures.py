@@ -0,0 +1,72 @@
+"""Management command to fill the database with synthetic weather data."""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils.dateparse import parse_datetime
+
+from ...utils.synthetic import SyntheticWeatherGenerator
+
+
+class Command(BaseCommand):
+    """Management command to fill the database with synthetic weather data."""
+
+    help = (
+        "Create N synthetic locations with M days of realistic weather history each (current, hourly, daily and "
+        "minutely weather, alerts and API call logs), for testing and benchmarking at production scale. "
+        "The same seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument("--locations", type=int, default=10, help="Number of locations to create")
+        parser.add_argument("--days", type=int, default=30, help="Days of weather history to create per location")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument(
+            "--end",
+            help=(
+                "Date and time of the newest data, in ISO 8601 format (for example 2024-10-01T00:00Z). "
+                "Defaults to now."
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Number of rows to insert per batch")
+        parser.add_argument(
+            "--no-minutely",
+            action="store_true",
+            help="Skip minutely weather, which is 1,440 rows per location and day",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        for option in ("locations", "days", "batch_size"):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1.")
+        end = None
+        if options["end"]:
+            end = parse_datetime(options["end"])
+            if end is None or end.tzinfo is None:
+                raise CommandError("--end must be an ISO 8601 date and time with a timezone.")
+
+        generator = SyntheticWeatherGenerator(
+            locations=options["locations"],
+            days=options["days"],
+            seed=options["seed"],
+            end=end,
+            batch_size=options["batch_size"],
+            minutely=not options["no_minutely"],
+        )
+        started = time.perf_counter()
+
+        def progress(done, counts):
+            self.stdout.write(f"Location {done}/{options['locations']}: {sum(counts.values()):,} rows created")
+
+        counts = generator.run(progress=progress if options["verbosity"] > 1 else None)
+        elapsed = time.perf_counter() - started
+
+        for model_name, count in counts.items():
+            self.stdout.write(f"{model_name}: {count:,} rows")
+        total = sum(counts.values())
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s).")
+        )
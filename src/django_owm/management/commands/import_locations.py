@@ -0,0 +1,158 @@
+"""Management command to bulk import weather locations from a CSV, GeoJSON or NDJSON file."""
+
+import sys
+from decimal import Decimal
+from decimal import DecimalException
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from ...app_settings import owm_settings
+from ...forms import quantize_to_2_decimal_places
+from ...utils.location_files import FORMATS
+from ...utils.location_files import detect_format
+from ...utils.location_files import read_locations
+from ...validators import validate_latitude
+from ...validators import validate_longitude
+
+
+class Command(BaseCommand):
+    """Management command to bulk import weather locations from a file."""
+
+    help = (
+        "Import weather locations from a CSV, GeoJSON or NDJSON file. Records are validated and inserted in batches, "
+        "and locations whose coordinates already exist are skipped."
+    )
+
+    max_reported_errors = 20
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument("path", help="Path of the file to import, or - to read from stdin")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Format of the file. Detected from the file extension if not given, defaulting to csv.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Number of locations to insert per batch")
+        parser.add_argument("--dry-run", action="store_true", help="Validate the file without creating locations")
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        path = options["path"]
+        file_format = options["format"] or detect_format(path)
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        self.dry_run = options["dry_run"]
+        self.WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+        self.stats = {"processed": 0, "created": 0, "duplicates": 0, "invalid": 0}
+        # A dry run saves nothing, so it remembers the coordinates it would have created to find duplicates across
+        # batches as a real run does
+        self.dry_run_keys = set()
+
+        stream = sys.stdin if path == "-" else self._open(path)
+        try:
+            batch = {}
+            for record_number, record in read_locations(stream, file_format):
+                self.stats["processed"] += 1
+                location = self._build_location(record_number, record)
+                if location is None:
+                    continue
+                key = (location.latitude, location.longitude)
+                if key in batch:
+                    self.stats["duplicates"] += 1
+                    continue
+                batch[key] = location
+                if len(batch) >= batch_size:
+                    self._insert_batch(batch)
+                    batch = {}
+            if batch:
+                self._insert_batch(batch)
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        summary = (
+            f"Processed {self.stats['processed']} records: {self.stats['created']} created, "
+            f"{self.stats['duplicates']} duplicates skipped, {self.stats['invalid']} invalid."
+        )
+        if self.dry_run:
+            summary = f"Dry run. {summary}"
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def _open(self, path):
+        """Open the file to import."""
+        try:
+            return open(path, encoding="utf-8", newline="")  # noqa: SIM115
+        except OSError as exc:
+            raise CommandError(f"Could not open {path!r}: {exc}") from exc
+
+    def _build_location(self, record_number, record):
+        """Validate a record and build an unsaved location from it, or return None if it is invalid."""
+        try:
+            latitude = quantize_to_2_decimal_places(self._to_decimal(record.get("latitude")))
+            longitude = quantize_to_2_decimal_places(self._to_decimal(record.get("longitude")))
+            validate_latitude(latitude)
+            validate_longitude(longitude)
+        except ValidationError as exc:
+            self._report_invalid(record_number, "; ".join(exc.messages))
+            return None
+        except DecimalException:
+            self._report_invalid(record_number, "Invalid coordinate")
+            return None
+        return self.WeatherLocationModel(
+            name=record.get("name") or None,
+            latitude=latitude,
+            longitude=longitude,
+            timezone=record.get("timezone") or None,
+        )
+
+    @staticmethod
+    def _to_decimal(value):
+        """Convert a raw coordinate value to a Decimal."""
+        if value is None or value == "":
+            raise ValidationError("Missing coordinate")
+        try:
+            decimal_value = Decimal(str(value).strip())
+        except DecimalException as exc:
+            raise ValidationError(f"Invalid coordinate {value!r}") from exc
+        if not decimal_value.is_finite():
+            raise ValidationError(f"Invalid coordinate {value!r}")
+        return decimal_value
+
+    def _report_invalid(self, record_number, message):
+        """Count an invalid record, reporting the first few."""
+        self.stats["invalid"] += 1
+        if self.stats["invalid"] <= self.max_reported_errors:
+            self.stderr.write(f"Record {record_number}: {message}")
+        elif self.stats["invalid"] == self.max_reported_errors + 1:
+            self.stderr.write("Further invalid records will not be reported individually.")
+
+    def _insert_batch(self, batch):
+        """Insert a batch of locations, skipping those whose coordinates already exist."""
+        # Narrow the lookup with two IN clauses, then match exact coordinate pairs in Python
+        candidates = self.WeatherLocationModel.objects.filter(
+            latitude__in={latitude for latitude, _ in batch}, longitude__in={longitude for _, longitude in batch}
+        ).values_list("latitude", "longitude")
+        existing = {(Decimal(latitude), Decimal(longitude)) for latitude, longitude in candidates.iterator()}
+        existing |= self.dry_run_keys & batch.keys()
+        new_locations = [location for key, location in batch.items() if key not in existing]
+        self.stats["duplicates"] += len(batch) - len(new_locations)
+
+        if self.dry_run:
+            self.dry_run_keys.update(key for key in batch if key not in existing)
+        elif new_locations:
+            with transaction.atomic():
+                self.WeatherLocationModel.objects.bulk_create(new_locations)
+        self.stats["created"] += len(new_locations)
+
+        self.stdout.write(
+            f"Processed {self.stats['processed']} records: {self.stats['created']} created, "
+            f"{self.stats['duplicates']} duplicates, {self.stats['invalid']} invalid"
+        )
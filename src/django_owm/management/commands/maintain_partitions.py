@@ -0,0 +1,65 @@
+"""Management command to create upcoming partitions and expire old ones for partitioned weather tables."""
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from ...app_settings import owm_settings
+from ...utils.partitioning import get_model_connection
+from ...utils.partitioning import maintain_partitions
+
+
+class Command(BaseCommand):
+    """Management command to create upcoming partitions and expire old ones for partitioned weather tables."""
+
+    help = (
+        "Create the partitions that the tables in OWM_PARTITIONING need ahead of time, and drop the partitions that "
+        "are past their retention. Run it at least once per partition interval."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            "--models", nargs="+", metavar="MODEL", help="Only maintain these models (e.g. MinutelyWeather)"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Show the partitions that would be created and expired"
+        )
+        parser.add_argument(
+            "--detach-only",
+            action="store_true",
+            help="Detach expired partitions without dropping them, e.g. to archive them first",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        model_names = options["models"] or list(owm_settings.OWM_PARTITIONING)
+        unknown = [model_name for model_name in model_names if model_name not in owm_settings.OWM_PARTITIONING]
+        if unknown:
+            raise CommandError(f"Not set in OWM_PARTITIONING: {', '.join(unknown)}.")
+        # Each model is checked on the database the routers write its rows to
+        not_postgresql = [
+            f"{model_name} (database {connection.alias!r}, {connection.vendor})"
+            for model_name, connection in ((name, get_model_connection(name)) for name in model_names)
+            if connection.vendor != "postgresql"
+        ]
+        if not_postgresql:
+            raise CommandError(f"Partitioning needs PostgreSQL: {', '.join(not_postgresql)}.")
+
+        expire_verb, expired = ("detach", "detached") if options["detach_only"] else ("drop", "dropped")
+        for model_name in model_names:
+            plan = maintain_partitions(model_name, dry_run=options["dry_run"], detach_only=options["detach_only"])
+            if plan is None:
+                self.stderr.write(self.style.WARNING(f"{model_name}: the table is not partitioned; skipped."))
+                continue
+            for partition in plan.create:
+                self.stdout.write(f"{'Would create' if options['dry_run'] else 'Created'} {partition.name}")
+            for partition in plan.expire:
+                action = f"Would {expire_verb}" if options["dry_run"] else expired.capitalize()
+                self.stdout.write(f"{action} {partition.name}")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model_name}: {len(plan.create)} partitions to create, {len(plan.expire)} to {expire_verb}."
+                    if options["dry_run"]
+                    else f"{model_name}: {len(plan.create)} partitions created, {len(plan.expire)} {expired}."
+                )
+            )
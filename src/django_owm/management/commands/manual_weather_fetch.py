@@ -6,8 +6,7 @@ from django.apps import apps
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
-from ...app_settings import OWM_MODEL_MAPPINGS
-from ...app_settings import OWM_USE_UUID
+from ...app_settings import owm_settings
 from ...tasks import fetch_weather
 
 
@@ -18,7 +17,7 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         """Add arguments to the command."""
-        if OWM_USE_UUID:
+        if owm_settings.OWM_USE_UUID:
             parser.add_argument("location_id", type=Decimal, help="ID of the location to fetch weather for")
         else:
             parser.add_argument("location_id", type=int, help="ID of the location to fetch weather for")
@@ -26,7 +25,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         """Handle the command."""
         location_id = options["location_id"]
-        WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+        WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
 
         try:
             location = WeatherLocationModel.objects.get(pk=location_id)
@@ -0,0 +1,40 @@
+"""Management command to save stored weather snapshots to the weather tables."""
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from ...utils.snapshots import get_snapshot_model
+from ...utils.snapshots import materialize_pending
+
+
+class Command(BaseCommand):
+    """Management command to save stored weather snapshots to the weather tables."""
+
+    help = (
+        "Save pending weather snapshots to the current, minutely, hourly, daily and alert tables, oldest first. "
+        "With --replay, snapshots saved before are saved again, to rebuild the tables after emptying them."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument("--ids", nargs="+", metavar="ID", help="Only materialize snapshots of these locations")
+        parser.add_argument("--limit", type=int, help="Materialize at most this many snapshots")
+        parser.add_argument(
+            "--replay",
+            action="store_true",
+            help="Also materialize snapshots that were materialized before; empty the weather tables first",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        if get_snapshot_model() is None:
+            raise CommandError("No WeatherSnapshot model is set in OWM_MODEL_MAPPINGS.")
+        if options["limit"] is not None and options["limit"] < 1:
+            raise CommandError("--limit must be at least 1.")
+        try:
+            materialized = materialize_pending(
+                limit=options["limit"], location_ids=options["ids"], replay=options["replay"]
+            )
+        except (ValueError, TypeError) as exc:
+            raise CommandError(f"Invalid location IDs: {exc}") from exc
+        self.stdout.write(self.style.SUCCESS(f"Materialized {materialized} weather snapshots."))
@@ -0,0 +1,58 @@
+"""Management command to run a local stub of the OpenWeatherMap One Call API."""
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from ...utils.transports import RECORDED_RESPONSES_DIR
+from ...utils.transports import ReplayTransport
+from ...utils.transports import StubServer
+
+
+class Command(BaseCommand):
+    """Management command to run a local stub of the OpenWeatherMap One Call API."""
+
+    help = (
+        "Serve recorded One Call API responses over HTTP, with optional synthetic latency and errors. "
+        "Set OWM_API_BASE_URL to the printed URL to fetch weather data from the stub."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument("--host", default="127.0.0.1", help="Host to listen on")
+        parser.add_argument("--port", type=int, default=8099, help="Port to listen on")
+        parser.add_argument(
+            "--responses-dir",
+            default=str(RECORDED_RESPONSES_DIR),
+            help="Directory of recorded One Call API responses (*.json) to serve",
+        )
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+        parser.add_argument(
+            "--latency-jitter", type=float, default=0.0, help="Random variation of the latency, in seconds"
+        )
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="Fraction of requests (0-1) answered with an error"
+        )
+        parser.add_argument("--seed", type=int, help="Random seed, for reproducible latencies and errors")
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        try:
+            transport = ReplayTransport(
+                responses_dir=options["responses_dir"],
+                latency=options["latency"],
+                latency_jitter=options["latency_jitter"],
+                error_rate=options["error_rate"],
+                seed=options["seed"],
+            )
+            server = StubServer(options["host"], options["port"], transport=transport)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        self.stdout.write(self.style.SUCCESS(f"Serving the One Call API stub at {server.url}"))
+        self.stdout.write("Quit with CONTROL-C.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
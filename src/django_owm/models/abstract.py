@@ -1,27 +1,37 @@
 """Models for OpenWeatherMap API data storage in django_owm."""
 
+import datetime
+import hashlib
+import json
+import zlib
+from functools import cached_property
+from typing import Any
+
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from ..app_settings import OWM_BASE_MODEL
-from ..app_settings import OWM_MODEL_MAPPINGS
-from ..app_settings import OWM_USE_UUID
+from ..app_settings import owm_settings
+from ..utils.geo import GEOHASH_PRECISION
+from ..utils.geo import encode_geohash
 from ..validators import validate_latitude
 from ..validators import validate_longitude
 from .base import AbstractBaseWeatherData
+from .fields import measurement_field
+from .managers import WeatherLocationManager
 
 
-if OWM_USE_UUID:
+if owm_settings.OWM_USE_UUID:
     import uuid
 
-if callable(OWM_BASE_MODEL):
-    OWM_BASE_MODEL = OWM_BASE_MODEL()
+# The class that the models extend, as set with OWM_BASE_MODEL (the same class for every model)
+OWM_BASE_MODEL = owm_settings.OWM_BASE_MODEL
 
 
 class AbstractWeatherLocation(OWM_BASE_MODEL):
     """Abstract model for storing weather location data."""
 
-    if OWM_USE_UUID:
+    if owm_settings.OWM_USE_UUID:
         uuid = models.UUIDField(
             primary_key=True,
             editable=False,
@@ -62,6 +72,49 @@ class AbstractWeatherLocation(OWM_BASE_MODEL):
         null=True,
         help_text=_("Offset from UTC in seconds"),
     )
+    geohash = models.CharField(
+        _("Geohash"),
+        max_length=12,
+        blank=True,
+        default="",
+        editable=False,
+        db_index=True,
+        help_text=_("Geohash of the coordinates, used for nearest-location lookups"),
+    )
+    refresh_interval = models.DurationField(
+        _("Refresh Interval"),
+        blank=True,
+        null=True,
+        help_text=_("How often to fetch weather data for this location. Leave empty to use the default interval."),
+    )
+    priority = models.SmallIntegerField(
+        _("Priority"),
+        default=0,
+        help_text=_("Locations with a higher priority are fetched first when several are due"),
+    )
+    last_fetched_at = models.DateTimeField(
+        _("Last Fetched At"),
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    next_fetch_at = models.DateTimeField(
+        _("Next Fetch At"),
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text=_("When weather data is next due to be fetched. Empty if it has never been fetched."),
+    )
+    block_hashes = models.JSONField(
+        _("Block Hashes"),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("Hash of each block of the last saved response, used to skip unchanged blocks"),
+    )
+
+    objects = WeatherLocationManager()
 
     class Meta(OWM_BASE_MODEL.Meta):
         """Meta options for the AbstractWeatherLocation model."""
@@ -71,11 +124,23 @@ class AbstractWeatherLocation(OWM_BASE_MODEL):
     def __str__(self):  # noqa: D105
         return str(self.name) if self.name else f"{self.latitude}, {self.longitude}"
 
+    def update_geohash(self):
+        """Set the geohash from the current latitude and longitude."""
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude, GEOHASH_PRECISION)
+
+    def save(self, *args, **kwargs):  # noqa: D102
+        self.update_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
 
 class AbstractCurrentWeather(AbstractBaseWeatherData):
     """Abstract model for storing current weather data."""
 
-    if OWM_USE_UUID:
+    if owm_settings.OWM_USE_UUID:
         uuid = models.UUIDField(
             primary_key=True,
             editable=False,
@@ -85,39 +150,31 @@ class AbstractCurrentWeather(AbstractBaseWeatherData):
 
     sunrise = models.DateTimeField(blank=True, null=True)
     sunset = models.DateTimeField(blank=True, null=True)
-    temp = models.DecimalField(
+    temp = measurement_field(
         _("Temperature"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    feels_like = models.DecimalField(
+    feels_like = measurement_field(
         _("Feels Like Temperature"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
     visibility = models.IntegerField(blank=True, null=True)
-    rain_1h = models.DecimalField(
+    rain_1h = measurement_field(
         _("Rain (1h)"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
         help_text=_("Precipitation in mm/h"),
     )
-    snow_1h = models.DecimalField(
+    snow_1h = measurement_field(
         _("Snow (1h)"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
         help_text=_("Snowfall in mm/h"),
     )
 
-    class Meta:
+    class Meta(AbstractBaseWeatherData.Meta):
         """Meta options for the AbstractCurrentWeather model."""
 
         abstract = True
@@ -129,7 +186,7 @@ class AbstractCurrentWeather(AbstractBaseWeatherData):
 class AbstractMinutelyWeather(OWM_BASE_MODEL):
     """Abstract model for storing minutely weather data."""
 
-    if OWM_USE_UUID:
+    if owm_settings.OWM_USE_UUID:
         uuid = models.UUIDField(
             primary_key=True,
             editable=False,
@@ -138,7 +195,7 @@ class AbstractMinutelyWeather(OWM_BASE_MODEL):
         )
 
     location = models.ForeignKey(
-        OWM_MODEL_MAPPINGS["WeatherLocation"],
+        owm_settings.OWM_MODEL_MAPPINGS["WeatherLocation"],
         on_delete=models.CASCADE,
         related_name="minutely_weather",
         help_text=_("Location for this weather data by minute"),
@@ -147,16 +204,15 @@ class AbstractMinutelyWeather(OWM_BASE_MODEL):
         _("Timestamp"),
         help_text=_("Unix timestamp converted to DateTime"),
     )
-    precipitation = models.DecimalField(
+    precipitation = measurement_field(
         _("Precipitation"),
-        max_digits=5,
-        decimal_places=2,
     )
 
     class Meta(OWM_BASE_MODEL.Meta):
         """Meta options for the AbstractMinutelyWeather model."""
 
         abstract = True
+        indexes = [models.Index(fields=["location", "timestamp"]), models.Index(fields=["timestamp"])]
 
     def __str__(self):  # noqa: D105
         return f"{self.location.name} - {self.timestamp}"
@@ -165,7 +221,7 @@ class AbstractMinutelyWeather(OWM_BASE_MODEL):
 class AbstractHourlyWeather(AbstractBaseWeatherData):
     """Abstract model for storing hourly weather data."""
 
-    if OWM_USE_UUID:
+    if owm_settings.OWM_USE_UUID:
         uuid = models.UUIDField(
             primary_key=True,
             editable=False,
@@ -173,44 +229,34 @@ class AbstractHourlyWeather(AbstractBaseWeatherData):
             default=uuid.uuid4,
         )
 
-    temp = models.DecimalField(
+    temp = measurement_field(
         _("Temperature"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    feels_like = models.DecimalField(
+    feels_like = measurement_field(
         _("Feels Like Temperature"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
     visibility = models.IntegerField(blank=True, null=True)
-    pop = models.DecimalField(
+    pop = measurement_field(
         _("Probability of Precipitation"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    rain_1h = models.DecimalField(
+    rain_1h = measurement_field(
         _("Rain (1h)"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    snow_1h = models.DecimalField(
+    snow_1h = measurement_field(
         _("Snow (1h)"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
 
-    class Meta:
+    class Meta(AbstractBaseWeatherData.Meta):
         """Meta options for the AbstractHourlyWeather model."""
 
         abstract = True
@@ -222,7 +268,7 @@ class AbstractHourlyWeather(AbstractBaseWeatherData):
 class AbstractDailyWeather(AbstractBaseWeatherData):
     """Abstract model for storing daily weather data."""
 
-    if OWM_USE_UUID:
+    if owm_settings.OWM_USE_UUID:
         uuid = models.UUIDField(
             primary_key=True,
             editable=False,
@@ -234,107 +280,79 @@ class AbstractDailyWeather(AbstractBaseWeatherData):
     sunset = models.DateTimeField(blank=True, null=True)
     moonrise = models.DateTimeField(blank=True, null=True)
     moonset = models.DateTimeField(blank=True, null=True)
-    moon_phase = models.DecimalField(
+    moon_phase = measurement_field(
         _("Moon Phase"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
     summary = models.TextField(blank=True, null=True)
-    temp_min = models.DecimalField(
+    temp_min = measurement_field(
         _("Temperature Min"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    temp_max = models.DecimalField(
+    temp_max = measurement_field(
         _("Temperature Max"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    temp_morn = models.DecimalField(
+    temp_morn = measurement_field(
         _("Morning Temperature"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    temp_day = models.DecimalField(
+    temp_day = measurement_field(
         _("Day Temperature"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    temp_eve = models.DecimalField(
+    temp_eve = measurement_field(
         _("Evening Temperature"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    temp_night = models.DecimalField(
+    temp_night = measurement_field(
         _("Night Temperature"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    feels_like_morn = models.DecimalField(
+    feels_like_morn = measurement_field(
         _("Feels Like - Morning"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    feels_like_day = models.DecimalField(
+    feels_like_day = measurement_field(
         _("Feels Like - Day"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    feels_like_eve = models.DecimalField(
+    feels_like_eve = measurement_field(
         _("Feels Like - Evening"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    feels_like_night = models.DecimalField(
+    feels_like_night = measurement_field(
         _("Feels Like - Night"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    pop = models.DecimalField(
+    pop = measurement_field(
         _("Probability of Precipitation"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    rain = models.DecimalField(
+    rain = measurement_field(
         _("Rain"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    snow = models.DecimalField(
+    snow = measurement_field(
         _("Snow"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
 
-    class Meta:
+    class Meta(AbstractBaseWeatherData.Meta):
         """Meta options for the AbstractDailyWeather model."""
 
         abstract = True
@@ -369,7 +387,7 @@ class AbstractDailyWeather(AbstractBaseWeatherData):
 class AbstractWeatherAlert(OWM_BASE_MODEL):
     """Abstract model for storing weather alerts."""
 
-    if OWM_USE_UUID:
+    if owm_settings.OWM_USE_UUID:
         uuid = models.UUIDField(
             primary_key=True,
             editable=False,
@@ -378,7 +396,7 @@ class AbstractWeatherAlert(OWM_BASE_MODEL):
         )
 
     location = models.ForeignKey(
-        OWM_MODEL_MAPPINGS["WeatherLocation"],
+        owm_settings.OWM_MODEL_MAPPINGS["WeatherLocation"],
         on_delete=models.CASCADE,
         related_name="weather_alerts",
     )
@@ -388,20 +406,107 @@ class AbstractWeatherAlert(OWM_BASE_MODEL):
     end = models.DateTimeField(_("End Time"), help_text=_("End time of the alert"))
     description = models.TextField()
     tags = models.JSONField(default=list, blank=True, null=True)
+    signature = models.CharField(
+        _("Signature"),
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        help_text=_("Hash of the sender, event, start, end and description, identifying the alert across fetches"),
+    )
+    first_seen = models.DateTimeField(_("First Seen"), default=timezone.now)
+    last_seen = models.DateTimeField(_("Last Seen"), default=timezone.now)
+    cleared_at = models.DateTimeField(
+        _("Cleared At"),
+        blank=True,
+        null=True,
+        help_text=_("When the alert was first missing from a response, i.e. withdrawn by its sender"),
+    )
 
     class Meta(OWM_BASE_MODEL.Meta):
         """Meta options for the AbstractWeatherAlert model."""
 
         abstract = True
+        indexes = [models.Index(fields=["location", "end"])]
+        constraints = [
+            models.UniqueConstraint(fields=["location", "signature"], name="%(app_label)s_%(class)s_unique_signature")
+        ]
 
     def __str__(self):  # noqa: D105
         return f"{self.location.name} - ({self.start} - {self.end})"
 
+    @staticmethod
+    def build_signature(
+        sender_name: str, event: str, start: datetime.datetime, end: datetime.datetime, description: str
+    ) -> str:
+        """Return the signature that identifies the same alert in successive responses."""
+        key = f"{sender_name}\n{event}\n{int(start.timestamp())}\n{int(end.timestamp())}\n{description or ''}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):  # noqa: D102
+        if not self.signature:
+            self.signature = self.build_signature(self.sender_name, self.event, self.start, self.end, self.description)
+        super().save(*args, **kwargs)
+
+
+class AbstractWeatherSnapshot(OWM_BASE_MODEL):
+    """Abstract model for storing the One Call API response of one fetch, compressed.
+
+    Snapshots are optional: they are stored when ``OWM_SNAPSHOT_MODE`` is ``"archive"`` or ``"lazy"`` and a model is
+    mapped as ``WeatherSnapshot`` in ``OWM_MODEL_MAPPINGS``. ``materialized_at`` is set once the response has been
+    saved to the weather tables.
+    """
+
+    if owm_settings.OWM_USE_UUID:
+        uuid = models.UUIDField(
+            primary_key=True,
+            editable=False,
+            unique=True,
+            default=uuid.uuid4,
+        )
+
+    location = models.ForeignKey(
+        owm_settings.OWM_MODEL_MAPPINGS["WeatherLocation"],
+        on_delete=models.CASCADE,
+        related_name="weather_snapshots",
+    )
+    fetched_at = models.DateTimeField(_("Fetched At"), default=timezone.now)
+    payload = models.BinaryField(_("Payload"), help_text=_("The API response as zlib-compressed JSON"))
+    materialized_at = models.DateTimeField(
+        _("Materialized At"),
+        blank=True,
+        null=True,
+        help_text=_("When the response was saved to the weather tables"),
+    )
+
+    class Meta(OWM_BASE_MODEL.Meta):
+        """Meta options for the AbstractWeatherSnapshot model."""
+
+        abstract = True
+        indexes = [
+            models.Index(fields=["location", "fetched_at"]),
+            models.Index(fields=["location", "materialized_at"]),
+            models.Index(fields=["materialized_at", "fetched_at"]),
+        ]
+
+    def __str__(self):  # noqa: D105
+        return f"{self.location.name} - {self.fetched_at}"
+
+    @staticmethod
+    def compress_payload(data: dict[str, Any]) -> bytes:
+        """Return the payload stored for an API response."""
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode())
+
+    @cached_property
+    def data(self) -> dict[str, Any]:
+        """Return the API response stored in the payload."""
+        return json.loads(zlib.decompress(self.payload))
+
 
 class AbstractWeatherErrorLog(OWM_BASE_MODEL):
     """Abstract model for storing weather API error logs."""
 
-    if OWM_USE_UUID:
+    if owm_settings.OWM_USE_UUID:
         uuid = models.UUIDField(
             primary_key=True,
             editable=False,
@@ -411,27 +516,58 @@ class AbstractWeatherErrorLog(OWM_BASE_MODEL):
 
     timestamp = models.DateTimeField(auto_now_add=True)
     location = models.ForeignKey(
-        OWM_MODEL_MAPPINGS["WeatherLocation"],
+        owm_settings.OWM_MODEL_MAPPINGS["WeatherLocation"],
         on_delete=models.CASCADE,
         related_name="error_logs",
     )
     api_name = models.CharField(max_length=255)
     error_message = models.TextField()
     response_data = models.TextField(blank=True, null=True)
+    signature = models.CharField(
+        _("Signature"),
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        help_text=_("Hash of the API name and error message, used to group repeated errors"),
+    )
+    occurrences = models.PositiveIntegerField(
+        _("Occurrences"),
+        default=1,
+        help_text=_("Number of times this error occurred between first and last seen"),
+    )
+    first_seen = models.DateTimeField(_("First Seen"), default=timezone.now)
+    last_seen = models.DateTimeField(_("Last Seen"), default=timezone.now)
 
     class Meta(OWM_BASE_MODEL.Meta):
         """Meta options for the AbstractWeatherErrorLog model."""
 
         abstract = True
+        indexes = [
+            models.Index(fields=["location", "timestamp"]),
+            models.Index(fields=["timestamp"]),
+            models.Index(fields=["location", "last_seen"]),
+            models.Index(fields=["location", "signature"]),
+        ]
 
     def __str__(self):  # noqa: D105
         return f"{self.api_name} - {self.timestamp}"
 
+    @staticmethod
+    def build_signature(api_name: str, error_message: str) -> str:
+        """Return the signature that groups occurrences of the same error."""
+        return hashlib.sha256(f"{api_name}\n{error_message}".encode()).hexdigest()
+
+    def save(self, *args, **kwargs):  # noqa: D102
+        if not self.signature:
+            self.signature = self.build_signature(self.api_name, self.error_message)
+        super().save(*args, **kwargs)
+
 
 class AbstractAPICallLog(OWM_BASE_MODEL):
     """Abstract model for storing API call logs."""
 
-    if OWM_USE_UUID:
+    if owm_settings.OWM_USE_UUID:
         uuid = models.UUIDField(
             primary_key=True,
             editable=False,
@@ -460,6 +596,7 @@ class AbstractAPICallLog(OWM_BASE_MODEL):
         """Meta options for the AbstractAPICallLog model."""
 
         abstract = True
+        indexes = [models.Index(fields=["api_name", "timestamp"])]
 
     def __str__(self):  # noqa: D105
         return f"{self.api_name} - {self.timestamp}"
@@ -3,19 +3,19 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from ..app_settings import OWM_BASE_MODEL
-from ..app_settings import OWM_MODEL_MAPPINGS
+from ..app_settings import owm_settings
+from .fields import measurement_field
 
 
-if callable(OWM_BASE_MODEL):
-    OWM_BASE_MODEL = OWM_BASE_MODEL()
+# The class that the models extend, as set with OWM_BASE_MODEL (the same class for every model)
+OWM_BASE_MODEL = owm_settings.OWM_BASE_MODEL
 
 
 class AbstractBaseWeatherData(OWM_BASE_MODEL):
     """Abstract base model for storing weather data. Not intended to be used directly."""
 
     location = models.ForeignKey(
-        OWM_MODEL_MAPPINGS["WeatherLocation"],
+        owm_settings.OWM_MODEL_MAPPINGS["WeatherLocation"],
         on_delete=models.CASCADE,
         related_name="%(app_label)s_%(class)s_weather_data",
         related_query_name="%(app_label)s_%(class)ss",
@@ -27,33 +27,25 @@ class AbstractBaseWeatherData(OWM_BASE_MODEL):
     )
     pressure = models.IntegerField(blank=True, null=True)
     humidity = models.IntegerField(blank=True, null=True)
-    dew_point = models.DecimalField(
+    dew_point = measurement_field(
         _("Dew Point"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
-    uvi = models.DecimalField(
+    uvi = measurement_field(
         _("UV Index"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
     clouds = models.IntegerField(blank=True, null=True)
-    wind_speed = models.DecimalField(
+    wind_speed = measurement_field(
         _("Wind Speed"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
     wind_deg = models.IntegerField(blank=True, null=True)
-    wind_gust = models.DecimalField(
+    wind_gust = measurement_field(
         _("Wind Gust"),
-        max_digits=5,
-        decimal_places=2,
         blank=True,
         null=True,
     )
@@ -66,6 +58,7 @@ class AbstractBaseWeatherData(OWM_BASE_MODEL):
         """Meta options for the WeatherData model."""
 
         abstract = True
+        indexes = [models.Index(fields=["location", "timestamp"]), models.Index(fields=["timestamp"])]
 
     @property
     def icon_url(self):
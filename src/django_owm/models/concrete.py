@@ -1,6 +1,6 @@
 """Optional concrete models for django_owm app."""
 
-from ..app_settings import OWM_USE_BUILTIN_CONCRETE_MODELS
+from ..app_settings import owm_settings
 from .abstract import AbstractAPICallLog
 from .abstract import AbstractCurrentWeather
 from .abstract import AbstractDailyWeather
@@ -9,9 +9,10 @@ from .abstract import AbstractMinutelyWeather
 from .abstract import AbstractWeatherAlert
 from .abstract import AbstractWeatherErrorLog
 from .abstract import AbstractWeatherLocation
+from .abstract import AbstractWeatherSnapshot
 
 
-if OWM_USE_BUILTIN_CONCRETE_MODELS:
+if owm_settings.OWM_USE_BUILTIN_CONCRETE_MODELS:
     # Create concrete models for each of the abstract models
 
     class WeatherLocation(AbstractWeatherLocation):
@@ -32,6 +33,9 @@ if OWM_USE_BUILTIN_CONCRETE_MODELS:
     class WeatherAlert(AbstractWeatherAlert):
         """Concrete model for AbstractWeatherAlert."""
 
+    class WeatherSnapshot(AbstractWeatherSnapshot):
+        """Concrete model for AbstractWeatherSnapshot."""
+
     class WeatherErrorLog(AbstractWeatherErrorLog):
         """Concrete model for AbstractWeatherErrorLog."""
 
@@ -0,0 +1,98 @@
+"""Fields for the weather measurements of django_owm models.
+
+Measurements (temperatures, wind speeds, precipitation, ...) have at most 3 digits before and 2 after the decimal
+point. By default they are stored in ``DecimalField``s, which build a ``Decimal`` for every value read. The
+``OWM_NUMERIC_STORAGE`` setting chooses a more compact schema instead:
+
+- ``"decimal"`` (default): ``DecimalField(max_digits=5, decimal_places=2)``; values are read as ``Decimal``.
+- ``"float"``: ``FloatField``; values are read as ``float``.
+- ``"scaled"``: ``ScaledIntegerField``, an integer column holding hundredths (e.g. centi-degrees); values are read as
+  ``float`` rounded to 2 decimal places, and written from any number or numeric string.
+
+The setting changes the columns of every concrete weather model, so choose it before creating the tables, or make
+and apply a migration for your models when changing it.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django import forms
+from django.core import exceptions
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from ..app_settings import owm_settings
+
+
+NUMERIC_STORAGES = ("decimal", "float", "scaled")
+
+
+class ScaledIntegerField(models.Field):
+    """Store a number with up to ``decimal_places`` decimal places as an integer, scaled by ``10 ** decimal_places``.
+
+    The scaling is transparent: values are given and read back as numbers (floats, once read from the database), and
+    lookups such as ``temp__gte=20.5`` are scaled as well. This does not subclass ``IntegerField``, whose lookups
+    round float arguments to integers before they are scaled.
+    """
+
+    description = _("Number stored as a scaled integer")
+    default_error_messages = {"invalid": _("“%(value)s” value must be a number.")}
+
+    def __init__(self, *args, decimal_places: int = 2, **kwargs):
+        self.decimal_places = decimal_places
+        self.scale = 10**decimal_places
+        super().__init__(*args, **kwargs)
+
+    def get_internal_type(self):  # noqa: D102
+        return "IntegerField"
+
+    def deconstruct(self):  # noqa: D102
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["decimal_places"] = self.decimal_places
+        return name, path, args, kwargs
+
+    def get_prep_value(self, value):
+        """Return the scaled integer stored for a value."""
+        value = super().get_prep_value(value)
+        if value is None:
+            return None
+        try:
+            return round(Decimal(str(value)) * self.scale)
+        except ArithmeticError as exc:
+            raise exceptions.ValidationError(
+                self.error_messages["invalid"], code="invalid", params={"value": value}
+            ) from exc
+
+    def from_db_value(self, value, expression, connection):
+        """Return the value for a stored integer."""
+        if value is None:
+            return None
+        # Division is correctly rounded, so this is the float closest to the decimal value, as float("21.46") is
+        return value / self.scale
+
+    def to_python(self, value):
+        """Return a value as a float rounded to the field's decimal places."""
+        if value is None:
+            return None
+        try:
+            return round(float(value), self.decimal_places)
+        except (TypeError, ValueError) as exc:
+            raise exceptions.ValidationError(
+                self.error_messages["invalid"], code="invalid", params={"value": value}
+            ) from exc
+
+    def formfield(self, **kwargs):  # noqa: D102
+        return super().formfield(**{"form_class": forms.FloatField, **kwargs})
+
+
+def measurement_field(*args, **kwargs) -> models.Field:
+    """Return a field for a measurement with up to 3 digits before and 2 after the decimal point.
+
+    The type of field depends on the ``OWM_NUMERIC_STORAGE`` setting; arguments are passed to the field.
+    """
+    if owm_settings.OWM_NUMERIC_STORAGE == "float":
+        return models.FloatField(*args, **kwargs)
+    if owm_settings.OWM_NUMERIC_STORAGE == "scaled":
+        return ScaledIntegerField(*args, decimal_places=2, **kwargs)
+    return models.DecimalField(*args, max_digits=5, decimal_places=2, **kwargs)
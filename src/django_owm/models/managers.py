@@ -0,0 +1,58 @@
+"""Managers and QuerySets for django_owm models."""
+
+from django.db import models
+from django.db import transaction
+
+from ..utils.geo import GEOHASH_PRECISION
+from ..utils.geo import encode_geohash
+from ..utils.geo import nearest_locations
+
+
+COORDINATE_FIELDS = {"latitude", "longitude"}
+
+
+class WeatherLocationQuerySet(models.QuerySet):
+    """QuerySet for weather locations."""
+
+    def nearest(self, latitude, longitude, k: int = 1) -> list:
+        """Return the ``k`` locations nearest to a point, closest first, each with a ``distance_km`` attribute."""
+        return nearest_locations(self, latitude, longitude, k)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Bulk create locations, filling in the geohash that ``save()`` would otherwise set."""
+        objs = list(objs)
+        for obj in objs:
+            obj.update_geohash()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Bulk update locations, updating the geohash too when the latitude or longitude is among ``fields``."""
+        if COORDINATE_FIELDS & set(fields):
+            objs = list(objs)
+            for obj in objs:
+                obj.update_geohash()
+            fields = [*fields, "geohash"]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        """Update locations, keeping the geohash in sync when the latitude or longitude changes.
+
+        When both coordinates are given as values, the geohash is set by the same query. Otherwise (one coordinate, or
+        an expression such as ``F()``), the geohashes are recomputed from the updated rows in the same transaction.
+        """
+        if not COORDINATE_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        coordinates = [kwargs.get("latitude"), kwargs.get("longitude")]
+        if all(value is not None and not hasattr(value, "resolve_expression") for value in coordinates):
+            return super().update(**kwargs, geohash=encode_geohash(*coordinates, GEOHASH_PRECISION))
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list("pk", flat=True))
+            updated = super().update(**kwargs)
+            locations = list(self.model._base_manager.using(self.db).filter(pk__in=pks).only("latitude", "longitude"))
+            for location in locations:
+                location.update_geohash()
+            self.model._base_manager.using(self.db).bulk_update(locations, ["geohash"])
+        return updated
+
+
+WeatherLocationManager = models.Manager.from_queryset(WeatherLocationQuerySet)
@@ -0,0 +1,19 @@
+"""Signals sent by the django_owm app.
+
+``fetch_stage_completed`` is sent after each timed stage of the fetch pipeline (see ``utils.instrumentation``), with
+``stage`` (the stage name) and ``duration`` (seconds) arguments. Stages of bulk fetches run in worker threads, so
+receivers may be called from any thread and should be quick.
+
+``fetch_run_completed`` is sent at the end of each ``fetch_weather`` run and bulk fetch, with a ``summary`` argument
+holding the run's ``FetchRunSummary``.
+
+Both signals are sent with the name of the run, such as ``"fetch_weather"``, as the sender, or None for stages that
+run outside a fetch run.
+"""
+
+from django.dispatch import Signal
+
+
+fetch_stage_completed = Signal()
+
+fetch_run_completed = Signal()
@@ -1,19 +1,29 @@
 """Celery tasks for fetching weather data from OpenWeatherMap API for django_owm."""
 
 import logging
-from decimal import Decimal
+import uuid
 
 from celery import shared_task
 from django.apps import apps
 
-from .app_settings import OWM_API_RATE_LIMITS
-from .app_settings import OWM_MODEL_MAPPINGS
+from .app_settings import owm_settings
 from .utils.api import check_api_limits
 from .utils.api import get_api_call_counts
 from .utils.api import log_api_call
 from .utils.api import make_api_call
-from .utils.saving import save_error_log
-from .utils.saving import save_weather_data
+from .utils.circuit_breaker import OPEN
+from .utils.circuit_breaker import get_circuit_breaker
+from .utils.instrumentation import FAILED
+from .utils.instrumentation import SUCCEEDED
+from .utils.instrumentation import FetchRunSummary
+from .utils.instrumentation import fetch_run
+from .utils.locking import run_lock
+from .utils.partitioning import maintain_all_partitions
+from .utils.saving import ErrorLogAggregator
+from .utils.scheduling import claim_due_locations
+from .utils.scheduling import schedule_next_fetch
+from .utils.snapshots import materialize_pending
+from .utils.snapshots import store_weather_data
 
 
 logger = logging.getLogger(__name__)
@@ -21,32 +31,100 @@ logger = logging.getLogger(__name__)
 
 @shared_task
 @check_api_limits
-def fetch_weather(location_ids: Decimal | int | None = None) -> None:
-    """Fetch current weather data for all locations."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+def fetch_weather(location_ids: list[int | uuid.UUID] | None = None) -> dict | None:
+    """Fetch weather data for the given locations, or for every location that is due.
 
-    if location_ids is not None:
-        locations = WeatherLocationModel.objects.filter(id__in=location_ids)
-    else:
-        locations = WeatherLocationModel.objects.all()
+    Without ``location_ids``, only locations whose ``next_fetch_at`` has passed (or that have never been fetched) are
+    fetched, highest priority and most overdue first, up to the calls remaining in the per-minute quota. Such runs
+    hold a run lock, so a scheduled run is skipped while the previous one is still going, and claim their locations
+    with a lease, so workers running at the same time never fetch the same location.
+
+    Returns a summary of the run (see ``FetchRunSummary.as_dict``) with the locations fetched, rows written and time
+    spent in each stage of the pipeline.
+    """
+    WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
 
     if not WeatherLocationModel:
         logger.error("WeatherLocation model is not configured.")
-        locations = []
-    else:
-        locations = WeatherLocationModel.objects.all()
+        return None
+
+    with fetch_run("fetch_weather") as summary:
+        _fetch_weather(WeatherLocationModel, location_ids, summary)
+    return summary.as_dict()
+
+
+def _fetch_weather(WeatherLocationModel, location_ids: list[int | uuid.UUID] | None, summary: FetchRunSummary) -> None:
+    """Select the locations to fetch within the quota, and fetch them."""
+    api_name = "one_call"
+    calls_last_minute, _ = get_api_call_counts(api_name)
+    remaining_calls = owm_settings.OWM_API_RATE_LIMITS.get(api_name, {}).get("calls_per_minute", 60) - calls_last_minute
+    if remaining_calls <= 0:
+        logger.warning("API call limit per minute exceeded. Stopping task.")
+        return
+
+    if location_ids is not None:
+        locations = WeatherLocationModel.objects.filter(pk__in=location_ids).order_by("pk")[:remaining_calls]
+        _fetch_locations(locations, summary)
+        return
+
+    with run_lock("fetch_weather") as acquired:
+        if not acquired:
+            logger.warning("A previous fetch_weather run is still in progress. Skipping this run.")
+            return
+        locations = claim_due_locations(WeatherLocationModel.objects.all(), limit=remaining_calls)
+        _fetch_locations(locations, summary)
+
+
+def _fetch_locations(locations, summary: FetchRunSummary) -> None:
+    """Fetch and save weather data for each location, then schedule its next fetch."""
     api_name = "one_call"
+    circuit_breaker = get_circuit_breaker(api_name)
+    errors = ErrorLogAggregator()
+    try:
+        for location in locations:
+            if circuit_breaker.state() == OPEN:
+                # Remaining locations stay due (claimed ones once their lease expires) and are fetched by a later run
+                logger.warning("The OpenWeatherMap API is failing. Stopping the run until the circuit breaker closes.")
+                break
+            data = make_api_call(location.latitude, location.longitude)
+            if data:
+                rows_by_model = store_weather_data(location, data)
+                log_api_call(api_name)
+                summary.record_location(SUCCEEDED, rows_by_model)
+            else:
+                error_message = "Failed to fetch weather data"
+                errors.add(location, api_name, error_message)
+                summary.record_location(FAILED)
+            schedule_next_fetch(location)
+    finally:
+        errors.flush()
+
+
+@shared_task
+def materialize_snapshots(limit: int | None = None) -> int:
+    """Save pending weather snapshots to the weather tables, oldest first, returning the number saved.
+
+    Schedule this when ``OWM_SNAPSHOT_MODE`` is ``"lazy"``, so that locations are materialized in the background
+    rather than when their weather is first read.
+    """
+    return materialize_pending(limit=limit)
+
+
+@shared_task
+def maintain_partitions() -> dict[str, dict[str, list[str]] | None]:
+    """Create upcoming partitions and drop expired ones for every model in ``OWM_PARTITIONING``.
 
-    for location in locations:
-        calls_last_minute, _ = get_api_call_counts(api_name)
-        if calls_last_minute >= OWM_API_RATE_LIMITS.get(api_name, {}).get("calls_per_minute", 60):
-            logger.warning("API call limit per minute exceeded. Stopping task.")
-            break
-
-        data = make_api_call(location.latitude, location.longitude)
-        if data:
-            save_weather_data(location, data)
-            log_api_call(api_name)
-        else:
-            error_message = "Failed to fetch weather data"
-            save_error_log(location, api_name, error_message)
+    Schedule this at least once per partition interval. Returns the names of the partitions created and dropped per
+    model, or None for models whose table is not partitioned.
+    """
+    return {
+        model_name: (
+            {
+                "created": [partition.name for partition in plan.create],
+                "dropped": [partition.name for partition in plan.expire],
+            }
+            if plan
+            else None
+        )
+        for model_name, plan in maintain_all_partitions().items()
+    }
@@ -3,15 +3,17 @@
 from django.urls import path
 
 from . import views
-from .app_settings import OWM_USE_UUID
+from .app_settings import owm_settings
 
 
 app_name = "django_owm"
 
-if OWM_USE_UUID:
+if owm_settings.OWM_USE_UUID:
     urlpatterns = [
         path("locations/", views.list_locations, name="list_locations"),
         path("locations/create/", views.create_location, name="create_location"),
+        path("locations/geojson/", views.locations_geojson, name="locations_geojson"),
+        path("metrics/", views.metrics, name="metrics"),
         path("locations/<uuid:location_id>/delete/", views.delete_location, name="delete_location"),
         path("locations/<uuid:location_id>/update/", views.update_location, name="update_location"),
         path("weather/<uuid:location_id>/", views.weather_detail, name="weather_detail"),
@@ -29,11 +31,18 @@ if OWM_USE_UUID:
         ),
         path("weather/<uuid:location_id>/alerts/partial/", views.weather_alerts_partial, name="weather_alerts_partial"),
         path("weather/<uuid:location_id>/errors/partial/", views.weather_errors_partial, name="weather_errors_partial"),
+        path(
+            "weather/<uuid:location_id>/dashboard/partial/",
+            views.weather_dashboard_partial,
+            name="weather_dashboard_partial",
+        ),
     ]
 else:
     urlpatterns = [
         path("locations/", views.list_locations, name="list_locations"),
         path("locations/create/", views.create_location, name="create_location"),
+        path("locations/geojson/", views.locations_geojson, name="locations_geojson"),
+        path("metrics/", views.metrics, name="metrics"),
         path("locations/<int:location_id>/delete/", views.delete_location, name="delete_location"),
         path("locations/<int:location_id>/update/", views.update_location, name="update_location"),
         path("weather/<int:location_id>/", views.weather_detail, name="weather_detail"),
@@ -51,4 +60,9 @@ else:
         ),
         path("weather/<int:location_id>/alerts/partial/", views.weather_alerts_partial, name="weather_alerts_partial"),
         path("weather/<int:location_id>/errors/partial/", views.weather_errors_partial, name="weather_errors_partial"),
+        path(
+            "weather/<int:location_id>/dashboard/partial/",
+            views.weather_dashboard_partial,
+            name="weather_dashboard_partial",
+        ),
     ]
@@ -1,33 +1,51 @@
 """Utility functions for working with the OpenWeatherMap API."""
 
+import datetime
 import logging
+import random
+import time
 from collections.abc import Callable
+from dataclasses import dataclass
 from decimal import Decimal
+from email.utils import parsedate_to_datetime
 from functools import wraps
 
 import requests
 from django.apps import apps
 from django.utils import timezone
 
-from ..app_settings import OWM_API_KEY
-from ..app_settings import OWM_API_RATE_LIMITS
-from ..app_settings import OWM_MODEL_MAPPINGS
+from ..app_settings import owm_settings
+from .circuit_breaker import get_circuit_breaker
+from .instrumentation import current_run
+from .instrumentation import stage
+from .instrumentation import timed_stage
+from .metrics import get_metrics
+from .transports import get_transport
 
 
 logger = logging.getLogger(__name__)
 
+INVALID_RESPONSE = "Invalid response"
 
+# Seconds to wait for each API request
+REQUEST_TIMEOUT = 10
+
+
+def count_api_calls(api_name: str, since: datetime.datetime) -> int:
+    """Count the API calls logged since a time; unlike ``get_api_call_counts``, this is not timed as a fetch stage."""
+    model_string = owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog")
+    APICallLog = apps.get_model(model_string) if model_string else None
+    if not APICallLog:
+        return 0
+    return APICallLog.objects.filter(api_name=api_name, timestamp__gte=since).count()
+
+
+@timed_stage("rate_limit_check")
 def get_api_call_counts(api_name: str) -> tuple[int, int]:
     """Get the number of API calls made in the last minute and last month."""
     now = timezone.now()
-    one_minute_ago = now - timezone.timedelta(minutes=1)
-    one_month_ago = now - timezone.timedelta(days=30)
-    model_string = OWM_MODEL_MAPPINGS.get("APICallLog")
-    APICallLog = apps.get_model(model_string) if model_string else None
-    if not APICallLog:
-        return 0, 0
-    calls_last_minute = APICallLog.objects.filter(api_name=api_name, timestamp__gte=one_minute_ago).count()
-    calls_last_month = APICallLog.objects.filter(api_name=api_name, timestamp__gte=one_month_ago).count()
+    calls_last_minute = count_api_calls(api_name, now - timezone.timedelta(minutes=1))
+    calls_last_month = count_api_calls(api_name, now - timezone.timedelta(days=30))
     return calls_last_minute, calls_last_month
 
 
@@ -38,7 +56,7 @@ def check_api_limits(func: Callable) -> Callable:
     def wrapper(*args, **kwargs) -> bool | Callable:
         """Check API call limits before running the task."""
         api_name = "one_call"
-        rate_limits = OWM_API_RATE_LIMITS.get(api_name, {})
+        rate_limits = owm_settings.OWM_API_RATE_LIMITS.get(api_name, {})
         calls_per_minute = rate_limits.get("calls_per_minute", 60)
         calls_per_month = rate_limits.get("calls_per_month", 1000000)
 
@@ -52,45 +70,206 @@ def check_api_limits(func: Callable) -> Callable:
     return wrapper
 
 
+@timed_stage("log_api_call")
 def log_api_call(api_name: str) -> None:
     """Log an API call to the database."""
-    model_string = OWM_MODEL_MAPPINGS.get("APICallLog")
+    model_string = owm_settings.OWM_MODEL_MAPPINGS.get("APICallLog")
     APICallLog = apps.get_model(model_string) if model_string else None
     if APICallLog:
         APICallLog.objects.create(api_name=api_name)
 
 
-def make_api_call(lat: Decimal, lon: Decimal, exclude: list[str] | None = None) -> dict | None:
-    """Make an API call to OpenWeatherMap."""
-    api_key = OWM_API_KEY
-    if not api_key:
-        logger.error("OpenWeatherMap API key not set. Please set OWM_API_KEY in your settings.")
-        return None
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a failed API call.
+
+    Network errors, 429 and 5xx responses are retried; other errors, such as 401 (bad API key) or 404, are not. The
+    wait before retry ``n`` is ``backoff_base * 2 ** (n - 1)`` seconds, capped at ``backoff_max``, and with ``jitter``
+    a random time up to that. A ``Retry-After`` header on a 429 response is honoured instead, unless it asks for a
+    longer wait than ``backoff_max``, in which case the call is not retried.
+    """
 
-    exclude = ""
-    if exclude is not None:
-        exclude = ",".join(exclude)
+    max_attempts: int = 3
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    jitter: bool = True
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
 
-    url = "https://api.openweathermap.org/data/3.0/onecall?" f"lat={lat}&lon={lon}&exclude={exclude}&appid={api_key}"
+    def worst_case_seconds(self, timeout: float) -> float:
+        """Return the longest a call can take, with every attempt timing out and waiting ``backoff_max`` to retry."""
+        return self.max_attempts * timeout + (self.max_attempts - 1) * self.backoff_max
+
+    def backoff(self, retry_number: int) -> float:
+        """Return the number of seconds to wait before the given retry (1 for the first retry)."""
+        delay = min(self.backoff_base * 2 ** (retry_number - 1), self.backoff_max)
+        return random.uniform(0, delay) if self.jitter else delay  # noqa: S311
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the retry policy configured with the ``OWM_API_RETRY`` setting."""
+    return RetryPolicy(**owm_settings.OWM_API_RETRY)
+
+
+@dataclass
+class APICallResult:
+    """The outcome of an API request, including any retries."""
+
+    data: dict | None = None
+    attempts: int = 0
+    status_code: int | None = None
+    error: str | None = None
+    circuit_open: bool = False
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a ``Retry-After`` header, given either in seconds or as an HTTP date, into seconds from now."""
+    if not value:
+        return None
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            if hasattr(response, "json"):
-                data = response.json()
-            elif hasattr(response, "json_response"):
-                data = response.json_response()
-            else:
-                logger.error("Error parsing JSON response.")
-                return None
-
-            # Convert relevant float values to Decimal
-            current = data.get("current", {})
-            for key in ["temp", "feels_like", "dew_point", "uvi", "wind_speed", "wind_gust"]:
-                if key in current:
-                    current[key] = str(current[key])
-            return data
-        logger.error("Error fetching weather data: %s", response.text)
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - timezone.now()).total_seconds(), 0.0)
+
+
+@timed_stage("json_decode")
+def _parse_response_data(response) -> dict | None:
+    """Decode the JSON body of a successful response.
+
+    Raises ``ValueError`` if the body is not a JSON object.
+    """
+    if hasattr(response, "json"):
+        data = response.json()
+    elif hasattr(response, "json_response"):
+        data = response.json_response()
+    else:
+        logger.error("Error parsing JSON response.")
         return None
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+
+    # Convert relevant float values to Decimal
+    current = data.get("current", {})
+    for key in ["temp", "feels_like", "dew_point", "uvi", "wind_speed", "wind_gust"]:
+        if key in current:
+            current[key] = str(current[key])
+    return data
+
+
+def _count_response(status_code: int | None) -> None:
+    """Count an API response, or a request that got no response, in the metrics backend and the current run."""
+    get_metrics().increment("api.requests", tags={"status": "error" if status_code is None else str(status_code)})
+    run = current_run()
+    if run is not None:
+        run.record_response(status_code)
+
+
+def _attempt_request(url: str, result: APICallResult, retry_policy: RetryPolicy) -> tuple[bool, float | None]:
+    """Make a single request, recording the outcome in ``result``.
+
+    Returns whether the attempt failed in a way that may be retried, and the delay the API asked for, if any.
+    """
+    try:
+        with stage("http_request"):
+            response = get_transport().get(url, timeout=REQUEST_TIMEOUT)
     except requests.RequestException as e:
         logger.exception("Error fetching weather data: %s", e)
-        return None
+        result.status_code, result.error = None, str(e)
+        _count_response(None)
+        return True, None
+
+    result.status_code = response.status_code
+    _count_response(response.status_code)
+    if response.status_code == 200:
+        try:
+            result.data = _parse_response_data(response)
+        except ValueError as e:
+            logger.error("Error decoding weather data: %s", e)
+            result.data = None
+        result.error = None if result.data else INVALID_RESPONSE
+        return False, None
+
+    logger.error("Error fetching weather data: %s", response.text)
+    result.error = f"HTTP {response.status_code}"
+    if response.status_code not in retry_policy.retry_statuses:
+        return False, None
+    if response.status_code == 429:
+        return True, parse_retry_after(getattr(response, "headers", {}).get("Retry-After"))
+    return True, None
+
+
+def request_weather_data(
+    lat: Decimal,
+    lon: Decimal,
+    exclude: list[str] | None = None,
+    retry_policy: RetryPolicy | None = None,
+    before_retry: Callable[[], None] | None = None,
+) -> APICallResult:
+    """Request One Call API data for a point, retrying transient failures according to the retry policy.
+
+    This does not touch the database, so it is safe to call from worker threads. ``before_retry`` is called before
+    each retry, e.g. to wait for the rate limiter. While the circuit breaker is open, no request is made and the
+    result has ``circuit_open`` set.
+    """
+    api_key = owm_settings.OWM_API_KEY
+    if not api_key:
+        logger.error("OpenWeatherMap API key not set. Please set OWM_API_KEY in your settings.")
+        return APICallResult(error="API key not set")
+
+    retry_policy = retry_policy or get_retry_policy()
+    exclude = ",".join(exclude) if exclude else ""
+    url = f"{owm_settings.OWM_API_BASE_URL}?lat={lat}&lon={lon}&exclude={exclude}&appid={api_key}"
+
+    circuit_breaker = get_circuit_breaker()
+    result = APICallResult()
+    while True:
+        if not circuit_breaker.allow_request():
+            logger.warning("Not calling the API: the circuit breaker is open after repeated failures.")
+            result.circuit_open = True
+            result.error = result.error or "Circuit breaker open"
+            return result
+        result.attempts += 1
+        retryable, delay = _attempt_request(url, result, retry_policy)
+        if result.error == INVALID_RESPONSE:
+            # A 200 whose body cannot be used is as much an upstream failure as a 5xx
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record(result.status_code)
+        if not retryable or result.attempts >= retry_policy.max_attempts:
+            return result
+        if delay is None:
+            delay = retry_policy.backoff(result.attempts)
+        elif delay > retry_policy.backoff_max:
+            logger.warning("Not retrying: the API asked to wait %.0f seconds before retrying.", delay)
+            return result
+        logger.warning(
+            "Retrying API call in %.2f seconds (attempt %s of %s failed: %s).",
+            delay,
+            result.attempts,
+            retry_policy.max_attempts,
+            result.error,
+        )
+        time.sleep(delay)
+        if before_retry is not None:
+            before_retry()
+
+
+def make_api_call(lat: Decimal, lon: Decimal, exclude: list[str] | None = None) -> dict | None:
+    """Make an API call to OpenWeatherMap, retrying transient failures.
+
+    Retried attempts are logged as API calls, so that they count against the rate limits. The final attempt is left
+    for the caller to log, as before.
+    """
+    result = request_weather_data(lat, lon, exclude)
+    log_retried_calls("one_call", result)
+    return result.data
+
+
+def log_retried_calls(api_name: str, result: APICallResult) -> None:
+    """Log an API call for every attempt that was retried."""
+    for _ in range(max(result.attempts - 1, 0)):
+        log_api_call(api_name)
@@ -0,0 +1,124 @@
+"""Circuit breaker that stops calling the OpenWeatherMap API while it is failing.
+
+The breaker's state is kept in Django's default cache, so that every worker sharing the cache sees the same state.
+After ``failure_threshold`` consecutive failed calls the circuit opens, and calls fail immediately for
+``open_seconds``. After that, a single probe call is let through (half-open): if it succeeds the circuit closes,
+and if it fails the circuit opens again. Other client errors, such as 400 or 404, are a problem with one request
+rather than with the upstream, so they leave the state alone and let another call probe.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+
+from django.core.cache import cache
+
+from ..app_settings import owm_settings
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Statuses showing that the upstream (or our access to it) is unhealthy, as opposed to a problem with one request
+FAILURE_STATUSES = frozenset({401, 403, 429})
+
+
+def is_upstream_failure(status_code: int | None) -> bool:
+    """Return whether a call's outcome counts as a failure of the upstream; None means no response at all."""
+    return status_code is None or status_code >= 500 or status_code in FAILURE_STATUSES
+
+
+def is_upstream_success(status_code: int | None) -> bool:
+    """Return whether a call's outcome shows that the upstream is healthy."""
+    return status_code is not None and status_code < 400
+
+
+@dataclass
+class CircuitBreaker:
+    """A circuit breaker whose state is shared through the cache."""
+
+    name: str
+    failure_threshold: int = 5
+    open_seconds: float = 60.0
+
+    def _key(self, suffix: str) -> str:
+        return f"django_owm:circuit:{self.name}:{suffix}"
+
+    @property
+    def _state_timeout(self) -> float:
+        # Keep state long enough to outlive the open period, but let it expire if nothing touches it for a while
+        return max(self.open_seconds * 10, 600)
+
+    def state(self) -> str:
+        """Return the current state of the circuit."""
+        opened_at = cache.get(self._key("opened_at"))
+        if opened_at is None:
+            return CLOSED
+        if time.time() - opened_at < self.open_seconds:
+            return OPEN
+        return HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """Return whether a call may be made now, claiming the probe call if the circuit is half-open."""
+        state = self.state()
+        if state == CLOSED:
+            return True
+        if state == OPEN:
+            return False
+        # Only one caller gets to probe the upstream per open period
+        return cache.add(self._key("probe"), True, self.open_seconds)
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the circuit."""
+        if cache.get(self._key("opened_at")) is not None:
+            logger.info("Circuit %r closed: the upstream is responding again.", self.name)
+        cache.delete_many([self._key("failures"), self._key("opened_at"), self._key("probe")])
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit once the failure threshold is reached."""
+        if cache.get(self._key("opened_at")) is not None:
+            # A failed probe (or a call that was in flight when the circuit opened) starts a new open period
+            self._open()
+            return
+        cache.add(self._key("failures"), 0, self._state_timeout)
+        try:
+            failures = cache.incr(self._key("failures"))
+        except ValueError:
+            # The counter expired between add() and incr()
+            cache.set(self._key("failures"), 1, self._state_timeout)
+            failures = 1
+        if failures >= self.failure_threshold:
+            logger.warning(
+                "Circuit %r opened after %s consecutive failures; calls will fail fast for %s seconds.",
+                self.name,
+                failures,
+                self.open_seconds,
+            )
+            self._open()
+
+    def record_neutral(self) -> None:
+        """Record a call that says nothing about the upstream's health, releasing the probe if it was one."""
+        cache.delete(self._key("probe"))
+
+    def record(self, status_code: int | None) -> None:
+        """Record the outcome of a call from its status code (None if there was no response)."""
+        if is_upstream_failure(status_code):
+            self.record_failure()
+        elif is_upstream_success(status_code):
+            self.record_success()
+        else:
+            self.record_neutral()
+
+    def _open(self) -> None:
+        cache.set(self._key("opened_at"), time.time(), self._state_timeout)
+        cache.delete(self._key("probe"))
+
+
+def get_circuit_breaker(api_name: str = "one_call") -> CircuitBreaker:
+    """Return the circuit breaker for an API, configured with the ``OWM_API_CIRCUIT_BREAKER`` setting."""
+    return CircuitBreaker(name=api_name, **owm_settings.OWM_API_CIRCUIT_BREAKER)
@@ -0,0 +1,280 @@
+"""Metrics of the django_owm app in the Prometheus text exposition format, served by the ``metrics`` view.
+
+Counters from fetch runs (locations fetched per outcome, rows written per model, API responses per class, and
+histograms of stage and run durations) are added to totals kept in Django's default cache when each run ends, so that
+the totals of every worker sharing the cache are served together. Durations are kept in whole microseconds, since the
+cache can only increment integers. The totals are lost if the cache is cleared, which Prometheus handles as a counter
+reset.
+
+Everything else is computed when the metrics are scraped, from counts that an index answers: the API calls made in
+the last minute (``APICallLog`` is indexed on ``api_name`` and ``timestamp``) and how overdue locations are
+(``next_fetch_at`` is indexed). The API calls made in the last 30 days cover most of ``APICallLog``, so that count is
+cached for ``MONTH_COUNT_TTL`` seconds and shared by the scrapes in that time. These counts are not timed as stages of
+the fetch pipeline.
+"""
+
+from __future__ import annotations
+
+import datetime
+from bisect import bisect_left
+
+from django.apps import apps
+from django.core.cache import cache
+from django.utils import timezone
+
+from ..app_settings import owm_settings
+from .api import count_api_calls
+from .circuit_breaker import CLOSED
+from .circuit_breaker import HALF_OPEN
+from .circuit_breaker import OPEN
+from .circuit_breaker import get_circuit_breaker
+from .fetching import get_rate_limits
+from .instrumentation import LATENCY_BUCKETS
+from .instrumentation import OUTCOMES
+from .instrumentation import RESPONSE_CLASSES
+from .instrumentation import STAGES
+from .instrumentation import FetchRunSummary
+from .saving import WEATHER_BLOCK_MODELS
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Names of the fetch runs whose counters are served
+RUN_NAMES = ("fetch_weather", "fetch_weather_bulk")
+
+# Upper bounds, in seconds, of the run duration histogram buckets
+RUN_DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# How overdue, in seconds, locations are counted as being
+STALENESS_THRESHOLDS = (0, 300, 900, 3600, 21600, 86400)
+
+# Seconds that the count of API calls made in the last 30 days is cached for between scrapes
+MONTH_COUNT_TTL = 300
+
+# Models whose written rows are counted; snapshots are only written with OWM_SNAPSHOT_MODE
+ROW_MODELS = (*WEATHER_BLOCK_MODELS.values(), "WeatherSnapshot")
+
+_KEY_PREFIX = "django_owm:metrics"
+
+
+def _key(*parts: str | int) -> str:
+    return ":".join((_KEY_PREFIX, *(str(part) for part in parts)))
+
+
+def _add_histogram(counters: dict[str, int], name: str, buckets: list[int], count: int, seconds: float) -> None:
+    for index, observations in enumerate(buckets):
+        counters[_key(name, "bucket", index)] = observations
+    counters[_key(name, "count")] = count
+    counters[_key(name, "sum_us")] = round(seconds * 1_000_000)
+
+
+def run_counters(summary: FetchRunSummary) -> dict[str, int]:
+    """Return the cache keys of the totals a fetch run adds to, with the amount added to each."""
+    counters = {}
+    for outcome in OUTCOMES:
+        counters[_key("locations", summary.name, outcome)] = getattr(summary, outcome)
+    run_buckets = [0] * (len(RUN_DURATION_BUCKETS) + 1)
+    run_buckets[bisect_left(RUN_DURATION_BUCKETS, summary.elapsed)] = 1
+    _add_histogram(counters, f"run:{summary.name}", run_buckets, 1, summary.elapsed)
+    for stage_name, stats in summary.stages.items():
+        _add_histogram(counters, f"stage:{stage_name}", stats.buckets, stats.count, stats.seconds)
+    for model_name, rows in summary.rows_by_model.items():
+        counters[_key("rows", model_name)] = rows
+    for response_class, responses in summary.responses.items():
+        counters[_key("responses", response_class)] = responses
+    return {key: value for key, value in counters.items() if value}
+
+
+def publish_run(sender=None, summary: FetchRunSummary | None = None, **kwargs) -> None:
+    """Add a finished fetch run's counters to the totals in the cache.
+
+    This is connected to the ``fetch_run_completed`` signal, and does nothing unless the ``OWM_ENABLE_METRICS_VIEW``
+    setting is on.
+    """
+    if summary is None or not owm_settings.OWM_ENABLE_METRICS_VIEW:
+        return
+    for key, value in run_counters(summary).items():
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            # The key was evicted since it was added
+            cache.set(key, value, None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Exposition:
+    """Builds the lines of a text exposition, one metric family at a time."""
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name: str, kind: str, help_text: str, samples: list[tuple[str, dict[str, str], float]]) -> None:
+        """Add a metric family; each sample is a (name suffix, labels, value) tuple."""
+        name = f"django_owm_{name}"
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            label_text = ",".join(f'{label}="{_escape(label_value)}"' for label, label_value in labels.items())
+            self.lines.append(
+                f"{name}{suffix}{{{label_text}}} {_format_value(value)}"
+                if labels
+                else f"{name}{suffix} {_format_value(value)}"
+            )
+
+    def render(self) -> str:
+        """Return the exposition as text."""
+        return "\n".join(self.lines) + "\n"
+
+
+def _histogram_samples(
+    totals: dict[str, int], name: str, bounds: tuple[float, ...], labels: dict[str, str]
+) -> list[tuple[str, dict[str, str], float]]:
+    samples = []
+    cumulative = 0
+    for index, bound in enumerate(bounds):
+        cumulative += totals.get(_key(name, "bucket", index), 0)
+        samples.append(("_bucket", {**labels, "le": _format_value(float(bound))}, cumulative))
+    count = totals.get(_key(name, "count"), 0)
+    samples.append(("_bucket", {**labels, "le": "+Inf"}, count))
+    samples.append(("_sum", labels, totals.get(_key(name, "sum_us"), 0) / 1_000_000))
+    samples.append(("_count", labels, count))
+    return samples
+
+
+def _all_counter_keys() -> list[str]:
+    keys = []
+    for run_name in RUN_NAMES:
+        keys += [_key("locations", run_name, outcome) for outcome in OUTCOMES]
+        keys += [_key(f"run:{run_name}", "bucket", index) for index in range(len(RUN_DURATION_BUCKETS) + 1)]
+        keys += [_key(f"run:{run_name}", suffix) for suffix in ("count", "sum_us")]
+    for stage_name in STAGES:
+        keys += [_key(f"stage:{stage_name}", "bucket", index) for index in range(len(LATENCY_BUCKETS) + 1)]
+        keys += [_key(f"stage:{stage_name}", suffix) for suffix in ("count", "sum_us")]
+    keys += [_key("rows", model_name) for model_name in ROW_MODELS]
+    keys += [_key("responses", response_class) for response_class in RESPONSE_CLASSES]
+    return keys
+
+
+def _add_run_metrics(exposition: _Exposition) -> None:
+    totals = cache.get_many(_all_counter_keys())
+    exposition.family(
+        "fetch_locations_total",
+        "counter",
+        "Locations processed by fetch runs, by outcome.",
+        [
+            ("", {"run": run, "outcome": outcome}, totals.get(_key("locations", run, outcome), 0))
+            for run in RUN_NAMES
+            for outcome in OUTCOMES
+        ],
+    )
+    exposition.family(
+        "fetch_run_duration_seconds",
+        "histogram",
+        "Duration of fetch runs.",
+        [
+            sample
+            for run in RUN_NAMES
+            for sample in _histogram_samples(totals, f"run:{run}", RUN_DURATION_BUCKETS, {"run": run})
+        ],
+    )
+    exposition.family(
+        "fetch_stage_duration_seconds",
+        "histogram",
+        "Duration of each stage of the fetch pipeline.",
+        [
+            sample
+            for stage_name in STAGES
+            for sample in _histogram_samples(totals, f"stage:{stage_name}", LATENCY_BUCKETS, {"stage": stage_name})
+        ],
+    )
+    exposition.family(
+        "rows_written_total",
+        "counter",
+        "Weather rows written by fetch runs, by model.",
+        [("", {"model": model_name}, totals.get(_key("rows", model_name), 0)) for model_name in ROW_MODELS],
+    )
+    exposition.family(
+        "api_responses_total",
+        "counter",
+        'OpenWeatherMap API responses received by fetch runs, by status class; "error" counts requests without one.',
+        [
+            ("", {"status": response_class}, totals.get(_key("responses", response_class), 0))
+            for response_class in RESPONSE_CLASSES
+        ],
+    )
+
+
+def _api_call_counts(api_name: str) -> tuple[int, int]:
+    now = timezone.now()
+    calls_last_minute = count_api_calls(api_name, now - datetime.timedelta(minutes=1))
+    calls_last_month = cache.get_or_set(
+        _key("api_calls_month", api_name),
+        lambda: count_api_calls(api_name, now - datetime.timedelta(days=30)),
+        MONTH_COUNT_TTL,
+    )
+    return calls_last_minute, calls_last_month
+
+
+def _add_api_metrics(exposition: _Exposition) -> None:
+    calls, limits, circuit_states = [], [], []
+    for api_name in owm_settings.OWM_API_RATE_LIMITS:
+        calls_last_minute, calls_last_month = _api_call_counts(api_name)
+        calls_per_minute, calls_per_month = get_rate_limits(api_name)
+        calls += [
+            ("", {"api": api_name, "window": "minute"}, calls_last_minute),
+            ("", {"api": api_name, "window": "month"}, calls_last_month),
+        ]
+        limits += [
+            ("", {"api": api_name, "window": "minute"}, calls_per_minute),
+            ("", {"api": api_name, "window": "month"}, calls_per_month),
+        ]
+        state = get_circuit_breaker(api_name).state()
+        circuit_states += [
+            ("", {"api": api_name, "state": name}, int(state == name)) for name in (CLOSED, OPEN, HALF_OPEN)
+        ]
+    exposition.family("api_calls", "gauge", "API calls logged in the last minute and the last 30 days.", calls)
+    exposition.family("api_call_limit", "gauge", "Configured API call limits per minute and per month.", limits)
+    exposition.family("circuit_breaker_state", "gauge", "Current state of each API's circuit breaker.", circuit_states)
+
+
+def _add_location_metrics(exposition: _Exposition) -> None:
+    WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    now = timezone.now()
+    exposition.family(
+        "locations_never_fetched",
+        "gauge",
+        "Locations that have never been fetched.",
+        [("", {}, WeatherLocationModel.objects.filter(next_fetch_at__isnull=True).count())],
+    )
+    exposition.family(
+        "locations_overdue",
+        "gauge",
+        "Locations whose next fetch has been due for at least min_seconds.",
+        [
+            (
+                "",
+                {"min_seconds": str(threshold)},
+                WeatherLocationModel.objects.filter(
+                    next_fetch_at__lte=now - datetime.timedelta(seconds=threshold)
+                ).count(),
+            )
+            for threshold in STALENESS_THRESHOLDS
+        ],
+    )
+
+
+def render_metrics() -> str:
+    """Return the app's metrics in the Prometheus text exposition format."""
+    exposition = _Exposition()
+    _add_api_metrics(exposition)
+    _add_run_metrics(exposition)
+    _add_location_metrics(exposition)
+    return exposition.render()
@@ -0,0 +1,268 @@
+"""Concurrent fetching of weather data for many locations.
+
+API calls are network bound, so they are made from a pool of worker threads, while the results are saved to the
+database from the calling thread as they arrive. This keeps all database access on a single connection (and inside
+any transaction the caller has open) and means the worker threads never touch the ORM. Retries happen in the worker
+threads, paced by the shared rate limiter, and are logged as API calls once the result reaches the calling thread.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+
+from ..app_settings import owm_settings
+from .api import APICallResult
+from .api import get_api_call_counts
+from .api import log_api_call
+from .api import log_retried_calls
+from .api import request_weather_data
+from .circuit_breaker import OPEN
+from .circuit_breaker import get_circuit_breaker
+from .instrumentation import FAILED
+from .instrumentation import SKIPPED
+from .instrumentation import SUCCEEDED
+from .instrumentation import FetchRunSummary
+from .instrumentation import StageStats
+from .instrumentation import fetch_run
+from .saving import ErrorLogAggregator
+from .scheduling import schedule_next_fetch
+from .snapshots import store_weather_data
+
+
+if TYPE_CHECKING:
+    from ..models import AbstractWeatherLocation
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALLS_PER_MINUTE = 60
+DEFAULT_CALLS_PER_MONTH = 1000000
+
+
+def get_rate_limits(api_name: str) -> tuple[int, int]:
+    """Return the configured (calls per minute, calls per month) limits for an API."""
+    rate_limits = owm_settings.OWM_API_RATE_LIMITS.get(api_name, {})
+    return (
+        rate_limits.get("calls_per_minute", DEFAULT_CALLS_PER_MINUTE),
+        rate_limits.get("calls_per_month", DEFAULT_CALLS_PER_MONTH),
+    )
+
+
+@dataclass
+class FetchPlan:
+    """The API calls a bulk fetch would make, checked against the configured quotas."""
+
+    calls: int
+    calls_last_minute: int
+    calls_last_month: int
+    calls_per_minute: int
+    calls_per_month: int
+
+    @property
+    def remaining_this_minute(self) -> int:
+        """Return the number of calls left in the current minute."""
+        return max(self.calls_per_minute - self.calls_last_minute, 0)
+
+    @property
+    def remaining_this_month(self) -> int:
+        """Return the number of calls left in the current month."""
+        return max(self.calls_per_month - self.calls_last_month, 0)
+
+    @property
+    def fits_minute_quota(self) -> bool:
+        """Return whether every call fits in the current minute's quota."""
+        return self.calls <= self.remaining_this_minute
+
+    @property
+    def fits_month_quota(self) -> bool:
+        """Return whether every call fits in the current month's quota."""
+        return self.calls <= self.remaining_this_month
+
+    @property
+    def minimum_minutes(self) -> int:
+        """Return the minimum number of minutes needed to make every call within the per-minute quota."""
+        if self.calls <= self.remaining_this_minute:
+            return 1 if self.calls else 0
+        return 1 + math.ceil((self.calls - self.remaining_this_minute) / max(self.calls_per_minute, 1))
+
+
+def plan_fetch(calls: int, api_name: str = "one_call") -> FetchPlan:
+    """Check a number of planned API calls against the quotas and the calls already made."""
+    calls_last_minute, calls_last_month = get_api_call_counts(api_name)
+    calls_per_minute, calls_per_month = get_rate_limits(api_name)
+    return FetchPlan(
+        calls=calls,
+        calls_last_minute=calls_last_minute,
+        calls_last_month=calls_last_month,
+        calls_per_minute=calls_per_minute,
+        calls_per_month=calls_per_month,
+    )
+
+
+@dataclass
+class BulkFetchSummary:
+    """Throughput statistics for a bulk fetch, with the time spent in each stage of the pipeline."""
+
+    calls: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    rows_written: int = 0
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    stages: dict[str, StageStats] = field(default_factory=dict)
+
+    @property
+    def calls_per_second(self) -> float:
+        """Return the number of API calls completed per second."""
+        return self.calls / self.elapsed if self.elapsed else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        """Return the given percentile (0-100) of the API call latencies in seconds, using the nearest rank."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(math.ceil(percentile / 100 * len(ordered)), 1)
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+class MinuteRateLimiter:
+    """Space out calls so that no more than ``calls_per_minute`` start in any sliding minute.
+
+    The limiter is thread-safe, so that worker threads can acquire it before retrying a call.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: int,
+        calls_already_made: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.calls_per_minute = calls_per_minute
+        self.clock = clock
+        self.sleep = sleep
+        # Calls already logged in the last minute are assumed to have just been made
+        now = clock()
+        self.call_times = deque([now] * min(calls_already_made, calls_per_minute))
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Wait until another call can be made, then record it."""
+        with self.lock:
+            while True:
+                now = self.clock()
+                while self.call_times and now - self.call_times[0] >= 60:
+                    self.call_times.popleft()
+                if len(self.call_times) < self.calls_per_minute:
+                    self.call_times.append(now)
+                    return
+                self.sleep(60 - (now - self.call_times[0]))
+
+
+def _timed_api_call(location: AbstractWeatherLocation, rate_limiter: MinuteRateLimiter) -> tuple[APICallResult, float]:
+    """Make the API call for a location, returning the result and the call's latency in seconds."""
+    started = time.perf_counter()
+    result = request_weather_data(location.latitude, location.longitude, before_retry=rate_limiter.acquire)
+    return result, time.perf_counter() - started
+
+
+def _record_result(
+    summary: BulkFetchSummary,
+    run: FetchRunSummary,
+    location: AbstractWeatherLocation,
+    result: APICallResult,
+    latency: float,
+    api_name: str,
+    errors: ErrorLogAggregator,
+) -> None:
+    """Save the outcome of one location's API call and add it to the summaries."""
+    log_retried_calls(api_name, result)
+    if result.circuit_open and not result.attempts:
+        # No request was made, so the location was skipped rather than failed
+        summary.skipped += 1
+        run.record_location(SKIPPED)
+        return
+    summary.calls += 1
+    summary.latencies.append(latency)
+    if result.data:
+        rows_by_model = store_weather_data(location, result.data)
+        log_api_call(api_name)
+        summary.succeeded += 1
+        summary.rows_written += sum(rows_by_model.values())
+        run.record_location(SUCCEEDED, rows_by_model)
+    else:
+        errors.add(location, api_name, "Failed to fetch weather data")
+        summary.failed += 1
+        run.record_location(FAILED)
+    schedule_next_fetch(location)
+
+
+def fetch_locations_concurrently(
+    locations: Iterable[AbstractWeatherLocation],
+    workers: int = 4,
+    api_name: str = "one_call",
+    rate_limiter: MinuteRateLimiter | None = None,
+) -> BulkFetchSummary:
+    """Fetch and save weather data for many locations, making up to ``workers`` API calls at once.
+
+    Calls are paced to the per-minute quota, and the run stops early once the monthly quota is used up or the circuit
+    breaker opens; locations that are not fetched are counted as skipped. At most ``2 * workers`` calls are in flight
+    at any time, so ``locations`` can be a lazily evaluated iterator over any number of locations.
+    """
+    summary = BulkFetchSummary()
+    with fetch_run("fetch_weather_bulk") as run:
+        calls_last_minute, calls_last_month = get_api_call_counts(api_name)
+        calls_per_minute, calls_per_month = get_rate_limits(api_name)
+        remaining_this_month = max(calls_per_month - calls_last_month, 0)
+        if rate_limiter is None:
+            rate_limiter = MinuteRateLimiter(calls_per_minute, calls_already_made=calls_last_minute)
+        circuit_breaker = get_circuit_breaker(api_name)
+        errors = ErrorLogAggregator()
+
+        def handle(future, location):
+            result, latency = future.result()
+            _record_result(summary, run, location, result, latency, api_name, errors)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            pending = {}
+            for location in locations:
+                if remaining_this_month <= 0 or circuit_breaker.state() == OPEN:
+                    summary.skipped += 1
+                    run.record_location(SKIPPED)
+                    continue
+                while len(pending) >= 2 * max(workers, 1):
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(future, pending.pop(future))
+                rate_limiter.acquire()
+                remaining_this_month -= 1
+                # Run the call in a copy of this context, so that its stage timings are recorded in this run
+                context = contextvars.copy_context()
+                pending[executor.submit(context.run, _timed_api_call, location, rate_limiter)] = location
+            for future in list(pending):
+                handle(future, pending.pop(future))
+        errors.flush()
+        summary.elapsed = time.perf_counter() - started
+    summary.stages = run.stages
+
+    if summary.skipped:
+        logger.warning(
+            "Skipped %s locations because the monthly API call limit was reached or the circuit breaker is open.",
+            summary.skipped,
+        )
+    return summary
@@ -0,0 +1,225 @@
+"""Geographic helpers for querying and clustering weather locations."""
+
+from __future__ import annotations
+
+import math
+
+from django.db.models import Avg
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import FloatField
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.db.models.functions import Cast
+from django.db.models.functions import Floor
+
+
+MIN_ZOOM = 0
+MAX_ZOOM = 20
+
+# Above this zoom level locations are no longer clustered
+CLUSTER_MAX_ZOOM = 12
+
+# Number of grid cells per 256px map tile, along each axis. 4 gives clusters roughly 64px apart.
+CLUSTER_CELLS_PER_TILE = 4
+
+# If a bounding box holds no more than this many locations, they are returned as individual points
+MAX_UNCLUSTERED_POINTS = 250
+
+
+def parse_bbox(value: str | None) -> tuple[float, float, float, float]:
+    """Parse a ``west,south,east,north`` bounding box string.
+
+    A box where ``west`` is greater than ``east`` crosses the antimeridian.
+    """
+    if not value:
+        raise ValueError("A bbox of the form 'west,south,east,north' is required.")
+    try:
+        west, south, east, north = (float(part) for part in value.split(","))
+    except ValueError as exc:
+        raise ValueError("bbox must contain four comma-separated numbers: west,south,east,north.") from exc
+
+    # Map widgets report longitudes outside (-180; 180) after panning across the antimeridian
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west = (west + 180) % 360 - 180
+        east = (east + 180) % 360 - 180
+    south = max(south, -90.0)
+    north = min(north, 90.0)
+    if south > north:
+        raise ValueError("bbox south must not be greater than north.")
+    return west, south, east, north
+
+
+def parse_zoom(value: str | int | None, default: int = 2) -> int:
+    """Parse a map zoom level, clamping it to the supported range."""
+    try:
+        zoom = int(value)
+    except (TypeError, ValueError):
+        zoom = default
+    return min(max(zoom, MIN_ZOOM), MAX_ZOOM)
+
+
+def filter_bbox(queryset: QuerySet, west: float, south: float, east: float, north: float) -> QuerySet:
+    """Filter a WeatherLocation queryset to the locations inside a bounding box."""
+    queryset = queryset.filter(latitude__gte=south, latitude__lte=north)
+    if west <= east:
+        return queryset.filter(longitude__gte=west, longitude__lte=east)
+    return queryset.filter(Q(longitude__gte=west) | Q(longitude__lte=east))
+
+
+def grid_cell_size(zoom: int) -> float:
+    """Return the size in degrees of a clustering grid cell at the given zoom level."""
+    return 360.0 / (2**zoom) / CLUSTER_CELLS_PER_TILE
+
+
+def cluster_locations(queryset: QuerySet, zoom: int) -> QuerySet:
+    """Bucket a WeatherLocation queryset into grid cells, aggregating in the database.
+
+    Returns a values queryset with one row per non-empty cell, holding the number of locations and their mean
+    coordinates.
+    """
+    cell_size = grid_cell_size(zoom)
+    return (
+        queryset.annotate(
+            cell_x=Floor(Cast(F("longitude"), FloatField()) / cell_size),
+            cell_y=Floor(Cast(F("latitude"), FloatField()) / cell_size),
+        )
+        .values("cell_x", "cell_y")
+        .annotate(
+            count=Count("pk"),
+            center_latitude=Avg(Cast(F("latitude"), FloatField())),
+            center_longitude=Avg(Cast(F("longitude"), FloatField())),
+        )
+        .order_by()
+    )
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precision of the geohash stored on each location. 8 characters is roughly 38m x 19m, finer than the 0.01 degree
+# precision of the stored coordinates.
+GEOHASH_PRECISION = 8
+
+# Finest precision tried first by nearest-location searches (roughly 1.2km x 0.6km cells)
+NEAREST_SEARCH_PRECISION = 6
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate pair as a geohash string of the given precision."""
+    latitude, longitude = float(latitude), float(longitude)
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even_bit = True
+    while len(geohash) < precision:
+        if even_bit:
+            value, coordinate_range = longitude, lon_range
+        else:
+            value, coordinate_range = latitude, lat_range
+        middle = (coordinate_range[0] + coordinate_range[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            coordinate_range[0] = middle
+        else:
+            bits <<= 1
+            coordinate_range[1] = middle
+        even_bit = not even_bit
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(geohash)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """Return the (latitude, longitude) size in degrees of a geohash cell of the given precision."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def geohash_neighbourhood(latitude: float, longitude: float, precision: int) -> set[str]:
+    """Return the geohash cell containing a point together with its (up to) eight neighbouring cells."""
+    latitude, longitude = float(latitude), float(longitude)
+    lat_size, lon_size = geohash_cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        neighbour_lat = latitude + lat_step * lat_size
+        if not -90.0 <= neighbour_lat <= 90.0:
+            continue
+        for lon_step in (-1, 0, 1):
+            neighbour_lon = (longitude + lon_step * lon_size + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(neighbour_lat, neighbour_lon, precision))
+    return cells
+
+
+def geohash_prefix_filter(prefix: str, field_name: str = "geohash") -> Q:
+    """Return a filter matching geohashes that start with ``prefix``.
+
+    This is expressed as a range rather than ``startswith``, so that it can use a plain B-tree index on every
+    database (SQLite's case-insensitive ``LIKE`` cannot).
+    """
+    upper = prefix.rstrip(GEOHASH_ALPHABET[-1])
+    if not upper:
+        return Q(**{f"{field_name}__gte": prefix})
+    upper = upper[:-1] + GEOHASH_ALPHABET[GEOHASH_ALPHABET.index(upper[-1]) + 1]
+    return Q(**{f"{field_name}__gte": prefix, f"{field_name}__lt": upper})
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance in kilometres between two points."""
+    lat1, lon1, lat2, lon2 = (math.radians(float(value)) for value in (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def guaranteed_search_radius_km(latitude: float, precision: int) -> float:
+    """Return the radius around a point that is fully covered by its geohash neighbourhood at ``precision``.
+
+    Any point outside the neighbourhood is at least one full cell away, so this is the smaller of the cell's height
+    and its width at the given latitude (taking the cell edge nearest the pole).
+    """
+    lat_size, lon_size = geohash_cell_size(precision)
+    km_per_degree = math.pi * EARTH_RADIUS_KM / 180.0
+    widest_lat = min(abs(float(latitude)) + lat_size, 90.0)
+    return min(lat_size * km_per_degree, lon_size * km_per_degree * math.cos(math.radians(widest_lat)))
+
+
+def nearest_locations(queryset: QuerySet, latitude: float, longitude: float, k: int = 1) -> list:
+    """Return the ``k`` locations in ``queryset`` nearest to a point, closest first.
+
+    Candidates are selected with index-backed geohash range lookups on the cell containing the point and its
+    neighbours, starting with small cells and widening until the ``k`` nearest candidates are provably closer than
+    anything outside the searched cells. Candidates are then ranked by haversine distance. Each returned location has a
+    ``distance_km`` attribute.
+    """
+    if k < 1:
+        return []
+    latitude, longitude = float(latitude), float(longitude)
+
+    def rank(candidates):
+        for candidate in candidates:
+            candidate.distance_km = haversine_km(latitude, longitude, candidate.latitude, candidate.longitude)
+        return sorted(candidates, key=lambda candidate: candidate.distance_km)[:k]
+
+    for precision in range(NEAREST_SEARCH_PRECISION, 0, -1):
+        prefix_filter = Q()
+        for cell in geohash_neighbourhood(latitude, longitude, precision):
+            prefix_filter |= geohash_prefix_filter(cell)
+        candidates = list(queryset.filter(prefix_filter))
+        if len(candidates) < k:
+            continue
+        ranked = rank(candidates)
+        if ranked[-1].distance_km <= guaranteed_search_radius_km(latitude, precision):
+            return ranked
+
+    # Too few locations near the point for the neighbourhood search to be conclusive; rank everything
+    return rank(list(queryset))
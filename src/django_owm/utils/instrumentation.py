@@ -0,0 +1,226 @@
+"""Timings and counters for the stages of the fetch pipeline.
+
+Each stage of fetching weather data (checking the rate limits, the HTTP request, decoding the JSON response, each
+``save_*`` function, logging the API call, ...) is timed with ``stage`` or ``timed_stage``. Every timing is sent to the
+metrics backend as ``fetch.stage.duration`` tagged with the stage name, and with the ``fetch_stage_completed``
+signal. Inside a ``fetch_run``, timings are also added up per stage in the run's ``FetchRunSummary``, along with the
+number of locations fetched, failed and skipped, the rows written per model and the API responses per status class.
+The summary is sent with the ``fetch_run_completed`` signal when the run ends, and returned by the ``fetch_weather``
+task.
+
+``requests`` does not report the DNS lookup, connection and transfer times separately, so ``http_request`` covers all
+of them, from sending the request to having read the whole response body.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from functools import wraps
+from typing import Any
+
+from ..signals import fetch_run_completed
+from ..signals import fetch_stage_completed
+from .metrics import get_metrics
+
+
+STAGES = (
+    "rate_limit_check",
+    "http_request",
+    "json_decode",
+    "save_current_weather",
+    "save_minutely_weather",
+    "save_hourly_weather",
+    "save_daily_weather",
+    "save_alerts",
+    "log_api_call",
+    "save_error_logs",
+    "schedule_next_fetch",
+)
+
+# Outcomes of fetching a location
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+OUTCOMES = (SUCCEEDED, FAILED, SKIPPED)
+
+# Upper bounds, in seconds, of the latency histogram buckets kept for each stage
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Classes of API responses counted per run; "error" means no response was received
+RESPONSE_CLASSES = ("2xx", "4xx", "429", "5xx", "error")
+
+
+def response_class(status_code: int | None) -> str:
+    """Return the class of an API response status for the per-run counters."""
+    if status_code is None:
+        return "error"
+    if status_code == 429:
+        return "429"
+    if status_code >= 500:
+        return "5xx"
+    if status_code >= 400:
+        return "4xx"
+    return "2xx"
+
+
+@dataclass
+class StageStats:
+    """The number of times a stage ran, its total duration and a histogram of its durations.
+
+    ``buckets[i]`` counts the durations of at most ``LATENCY_BUCKETS[i]`` seconds that are longer than the previous
+    bound; the last item counts durations longer than every bound.
+    """
+
+    count: int = 0
+    seconds: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def add(self, seconds: float) -> None:
+        """Add a duration."""
+        self.count += 1
+        self.seconds += seconds
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    @property
+    def mean(self) -> float:
+        """Return the mean duration of the stage in seconds."""
+        return self.seconds / self.count if self.count else 0.0
+
+
+@dataclass
+class FetchRunSummary:
+    """Counters and per-stage timings for one fetch run.
+
+    Stages may be recorded from worker threads, so updates are made under a lock.
+    """
+
+    name: str
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    rows_written: int = 0
+    elapsed: float = 0.0
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    rows_by_model: dict[str, int] = field(default_factory=dict)
+    responses: dict[str, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def locations(self) -> int:
+        """Return the number of locations fetched or attempted."""
+        return self.succeeded + self.failed
+
+    @property
+    def locations_per_second(self) -> float:
+        """Return the number of locations fetched or attempted per second."""
+        return self.locations / self.elapsed if self.elapsed else 0.0
+
+    def add_stage(self, stage_name: str, seconds: float) -> None:
+        """Add a timing for a stage."""
+        with self.lock:
+            self.stages.setdefault(stage_name, StageStats()).add(seconds)
+
+    def record_response(self, status_code: int | None) -> None:
+        """Count an API response (or a request that got no response) by class."""
+        key = response_class(status_code)
+        with self.lock:
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def record_location(self, outcome: str, rows_by_model: dict[str, int] | None = None) -> None:
+        """Count a location as succeeded, failed or skipped, and the rows written for it per model."""
+        rows_written = sum(rows_by_model.values()) if rows_by_model else 0
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.rows_written += rows_written
+            for model_name, rows in (rows_by_model or {}).items():
+                self.rows_by_model[model_name] = self.rows_by_model.get(model_name, 0) + rows
+        metrics = get_metrics()
+        metrics.increment("fetch.locations", tags={"run": self.name, "outcome": outcome})
+        if rows_written:
+            metrics.increment("fetch.rows_written", rows_written, tags={"run": self.name})
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the summary as a JSON-serializable dict, e.g. as a task result."""
+        return {
+            "name": self.name,
+            "locations": self.locations,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "rows_written": self.rows_written,
+            "rows_by_model": dict(self.rows_by_model),
+            "responses": dict(self.responses),
+            "elapsed": round(self.elapsed, 6),
+            "locations_per_second": round(self.locations_per_second, 3),
+            "stages": {
+                name: {"count": stats.count, "seconds": round(stats.seconds, 6)} for name, stats in self.stages.items()
+            },
+        }
+
+
+_current_run: ContextVar[FetchRunSummary | None] = ContextVar("django_owm_fetch_run", default=None)
+
+
+def current_run() -> FetchRunSummary | None:
+    """Return the summary of the fetch run in progress, if any."""
+    return _current_run.get()
+
+
+@contextmanager
+def fetch_run(name: str) -> Iterator[FetchRunSummary]:
+    """Collect stage timings and counters for a fetch run, sending the summary when it ends.
+
+    Code run in worker threads only records into the run if it is run in a copy of the caller's context
+    (``contextvars.copy_context().run``).
+    """
+    summary = FetchRunSummary(name=name)
+    token = _current_run.set(summary)
+    started = time.perf_counter()
+    try:
+        yield summary
+    finally:
+        summary.elapsed = time.perf_counter() - started
+        _current_run.reset(token)
+        get_metrics().timing("fetch.run.duration", summary.elapsed, tags={"run": name})
+        fetch_run_completed.send(sender=name, summary=summary)
+
+
+def record_stage(stage_name: str, seconds: float) -> None:
+    """Record a stage timing in the current run, the metrics backend and the ``fetch_stage_completed`` signal."""
+    run = _current_run.get()
+    if run is not None:
+        run.add_stage(stage_name, seconds)
+    get_metrics().timing("fetch.stage.duration", seconds, tags={"stage": stage_name})
+    fetch_stage_completed.send(sender=run.name if run else None, stage=stage_name, duration=seconds)
+
+
+@contextmanager
+def stage(stage_name: str) -> Iterator[None]:
+    """Time the enclosed block as a pipeline stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage_name, time.perf_counter() - started)
+
+
+def timed_stage(stage_name: str) -> Callable[[Callable], Callable]:
+    """Decorator to time every call of a function as a pipeline stage."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
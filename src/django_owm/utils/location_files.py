@@ -0,0 +1,211 @@
+"""Streaming readers and writers for files of weather locations.
+
+Supported formats are CSV (``name,latitude,longitude,timezone`` columns), GeoJSON (a FeatureCollection of Point
+features with ``name`` and ``timezone`` properties) and NDJSON (one JSON object per line, with the same keys as the
+CSV columns). Every reader and writer works on one record at a time, so memory use does not grow with file size.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import IO
+from typing import Any
+
+
+FORMATS = ("csv", "geojson", "ndjson")
+
+FIELDS = ("name", "latitude", "longitude", "timezone")
+
+_GEOJSON_CHUNK_SIZE = 64 * 1024
+
+
+def detect_format(path: str, default: str = "csv") -> str:
+    """Guess the file format from a path's extension."""
+    lowered = path.lower()
+    if lowered.endswith((".geojson", ".geo.json")):
+        return "geojson"
+    if lowered.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if lowered.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def read_locations(stream: IO[str], file_format: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield ``(record_number, record)`` pairs from a locations file.
+
+    Each record is a dict with ``name``, ``latitude``, ``longitude`` and ``timezone`` keys; values are not validated.
+    """
+    readers = {"csv": _read_csv, "geojson": _read_geojson, "ndjson": _read_ndjson}
+    return readers[file_format](stream)
+
+
+def _read_csv(stream: IO[str]) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield records from a CSV file with a header row."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        # Report the line number of the row in the file, counting the header
+        yield reader.line_num, {field: (row.get(field) or None) for field in FIELDS}
+
+
+def _read_ndjson(stream: IO[str]) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield records from a newline-delimited JSON file."""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line, parse_float=str)
+        except json.JSONDecodeError:
+            yield line_number, {}
+            continue
+        yield line_number, {field: obj.get(field) for field in FIELDS} if isinstance(obj, dict) else {}
+
+
+def _read_geojson(stream: IO[str]) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield records from the features of a GeoJSON FeatureCollection, decoding one feature at a time."""
+    for feature_number, feature in enumerate(_iter_geojson_features(stream), start=1):
+        if not isinstance(feature, dict):
+            yield feature_number, {}
+            continue
+        geometry = feature.get("geometry") or {}
+        properties = feature.get("properties") or {}
+        coordinates = geometry.get("coordinates") if geometry.get("type") == "Point" else None
+        if not coordinates or len(coordinates) < 2:
+            yield feature_number, {}
+            continue
+        yield feature_number, {
+            "name": properties.get("name"),
+            "latitude": coordinates[1],
+            "longitude": coordinates[0],
+            "timezone": properties.get("timezone"),
+        }
+
+
+def _iter_geojson_features(stream: IO[str]) -> Iterator[Any]:
+    """Incrementally decode the objects in the ``features`` array of a GeoJSON document."""
+    reader = _ChunkedJSONReader(stream)
+    reader.seek_past('"features"', "[")
+    while True:
+        if not reader.skip(" \t\r\n,"):
+            raise ValueError("Unterminated 'features' array in GeoJSON input.")
+        if reader.peek() == "]":
+            return
+        yield reader.decode()
+
+
+class _ChunkedJSONReader:
+    """Read JSON values from a text stream one chunk at a time, keeping only the unread part of the input."""
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.decoder = json.JSONDecoder(parse_float=str)
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self) -> None:
+        """Discard the consumed part of the buffer and read the next chunk."""
+        chunk = self.stream.read(_GEOJSON_CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+
+    def seek_past(self, key: str, opening: str) -> None:
+        """Move past the first ``opening`` character that follows ``key``."""
+        while True:
+            key_index = self.buffer.find(key, self.position)
+            if key_index != -1:
+                opening_index = self.buffer.find(opening, key_index)
+                if opening_index != -1:
+                    self.position = opening_index + 1
+                    return
+            if self.eof:
+                raise ValueError(f"No {key} array found in GeoJSON input.")
+            # Keep enough of the tail to match a key split across chunks
+            self.position = max(self.position, len(self.buffer) - 64)
+            self.fill()
+
+    def skip(self, characters: str) -> bool:
+        """Skip over any of ``characters``, returning False if the input ends first."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in characters:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return True
+            if self.eof:
+                return False
+            self.fill()
+
+    def peek(self) -> str:
+        """Return the next unread character."""
+        return self.buffer[self.position]
+
+    def decode(self) -> Any:
+        """Decode the JSON value starting at the current position, reading more input as needed."""
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as exc:
+                if self.eof:
+                    raise ValueError(f"Invalid GeoJSON feature: {exc}") from exc
+                self.fill()
+                continue
+            self.position = end
+            return obj
+
+
+def write_locations(stream: IO[str], records: Iterable[dict[str, Any]], file_format: str) -> int:
+    """Write location records to a stream in the given format, returning the number written."""
+    writers = {"csv": _write_csv, "geojson": _write_geojson, "ndjson": _write_ndjson}
+    return writers[file_format](stream, records)
+
+
+def _write_csv(stream: IO[str], records: Iterable[dict[str, Any]]) -> int:
+    """Write records as CSV with a header row."""
+    writer = csv.DictWriter(stream, fieldnames=FIELDS)
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow({field: "" if record.get(field) is None else record[field] for field in FIELDS})
+        count += 1
+    return count
+
+
+def _write_ndjson(stream: IO[str], records: Iterable[dict[str, Any]]) -> int:
+    """Write records as newline-delimited JSON."""
+    count = 0
+    for record in records:
+        stream.write(json.dumps(_json_record(record)) + "\n")
+        count += 1
+    return count
+
+
+def _write_geojson(stream: IO[str], records: Iterable[dict[str, Any]]) -> int:
+    """Write records as a GeoJSON FeatureCollection, one feature at a time."""
+    stream.write('{"type": "FeatureCollection", "features": [\n')
+    count = 0
+    for record in records:
+        record = _json_record(record)
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [record["longitude"], record["latitude"]]},
+            "properties": {"name": record["name"], "timezone": record["timezone"]},
+        }
+        stream.write((",\n" if count else "") + json.dumps(feature))
+        count += 1
+    stream.write("\n]}\n")
+    return count
+
+
+def _json_record(record: dict[str, Any]) -> dict[str, Any]:
+    """Return a record with its coordinates converted to JSON numbers."""
+    return {
+        "name": record.get("name"),
+        "latitude": float(record["latitude"]),
+        "longitude": float(record["longitude"]),
+        "timezone": record.get("timezone"),
+    }
@@ -0,0 +1,40 @@
+"""Locks that stop scheduled fetch runs from overlapping.
+
+The run lock is stored in Django's default cache, so it is only shared between processes when the cache backend is
+(e.g. Redis or Memcached, not the default local-memory cache). Per-location leases, which let several workers share
+one fetch cycle, are taken in the database instead; see ``utils.scheduling.claim_due_locations``.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+# Longest time a run may hold its lock. If a run dies without releasing it, the lock expires after this many seconds.
+DEFAULT_RUN_LOCK_TIMEOUT = 15 * 60
+
+
+@contextmanager
+def run_lock(name: str, timeout: int = DEFAULT_RUN_LOCK_TIMEOUT) -> Iterator[bool]:
+    """Try to take a named lock for the duration of the block, yielding whether it was taken.
+
+    The lock is not waited for: if another run holds it, the block runs with ``False`` and should do nothing.
+    """
+    key = f"django_owm:run_lock:{name}"
+    token = uuid.uuid4().hex
+    acquired = cache.add(key, token, timeout)
+    if not acquired:
+        logger.info("Run lock %r is held by another run.", name)
+    try:
+        yield acquired
+    finally:
+        # Only release the lock if it is still ours, i.e. it has not expired and been taken by another run
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
@@ -0,0 +1,141 @@
+"""Pluggable backends for the metrics of the django_owm app.
+
+A backend has ``increment(name, value, tags)``, ``timing(name, seconds, tags)`` and ``gauge(name, value, tags)``
+methods, where ``tags`` is a dict of label names to values. The backend is chosen with the ``OWM_METRICS_BACKEND``
+setting::
+
+    DJANGO_OWM = {
+        "OWM_METRICS_BACKEND": {
+            "BACKEND": "django_owm.utils.metrics.StatsdMetrics",
+            "OPTIONS": {"host": "localhost", "port": 8125},
+        },
+    }
+
+Without the setting, metrics are discarded by ``NullMetrics``.
+"""
+
+from __future__ import annotations
+
+import socket
+import threading
+from functools import cache
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from ..app_settings import owm_settings
+
+
+class NullMetrics:
+    """Discard every metric. This is the default backend."""
+
+    def increment(self, name: str, value: float = 1, tags: dict[str, str] | None = None) -> None:
+        """Add to a counter."""
+
+    def timing(self, name: str, seconds: float, tags: dict[str, str] | None = None) -> None:
+        """Record a duration."""
+
+    def gauge(self, name: str, value: float, tags: dict[str, str] | None = None) -> None:
+        """Set a gauge."""
+
+
+class StatsdMetrics:
+    """Send metrics to a StatsD server over UDP, with tags in the DogStatsD format.
+
+    Sending never blocks or raises, so an unreachable server does not slow down or break fetching.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 8125, prefix: str = "django_owm", tags: bool = True):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.tags = tags
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def increment(self, name: str, value: float = 1, tags: dict[str, str] | None = None) -> None:
+        """Add to a counter."""
+        self.send(name, value, "c", tags)
+
+    def timing(self, name: str, seconds: float, tags: dict[str, str] | None = None) -> None:
+        """Record a duration, sent in milliseconds."""
+        self.send(name, round(seconds * 1000, 3), "ms", tags)
+
+    def gauge(self, name: str, value: float, tags: dict[str, str] | None = None) -> None:
+        """Set a gauge."""
+        self.send(name, value, "g", tags)
+
+    def send(self, name: str, value: float, metric_type: str, tags: dict[str, str] | None) -> None:
+        """Send one metric."""
+        line = f"{self.prefix}.{name}:{value}|{metric_type}" if self.prefix else f"{name}:{value}|{metric_type}"
+        if tags and self.tags:
+            line += "|#" + ",".join(f"{key}:{value}" for key, value in sorted(tags.items()))
+        try:
+            self.socket.sendto(line.encode(), self.address)
+        except OSError:
+            pass
+
+
+class PrometheusMetrics:
+    """Record metrics with ``prometheus_client``, which must be installed.
+
+    Counters, histograms (for timings, in seconds) and gauges are created on first use, named after the metric with
+    dots replaced by underscores and prefixed with ``namespace``. Expose them with ``prometheus_client``'s own HTTP
+    server or WSGI app; see also the ``metrics`` view.
+    """
+
+    def __init__(self, namespace: str = "django_owm", registry=None):
+        try:
+            import prometheus_client
+        except ImportError as exc:
+            raise ImproperlyConfigured("PrometheusMetrics requires the prometheus_client package.") from exc
+        self.prometheus_client = prometheus_client
+        self.namespace = namespace
+        self.registry = registry or prometheus_client.REGISTRY
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _metric(self, metric_class, name: str, suffix: str, tags: dict[str, str] | None):
+        """Return the metric for a name and set of labels, creating it on first use."""
+        labels = tuple(sorted(tags or {}))
+        key = (metric_class, name, labels)
+        with self.lock:
+            if key not in self.metrics:
+                self.metrics[key] = metric_class(
+                    name.replace(".", "_") + suffix,
+                    f"django_owm {name}",
+                    labelnames=labels,
+                    namespace=self.namespace,
+                    registry=self.registry,
+                )
+        metric = self.metrics[key]
+        return metric.labels(**tags) if tags else metric
+
+    def increment(self, name: str, value: float = 1, tags: dict[str, str] | None = None) -> None:
+        """Add to a counter."""
+        self._metric(self.prometheus_client.Counter, name, "", tags).inc(value)
+
+    def timing(self, name: str, seconds: float, tags: dict[str, str] | None = None) -> None:
+        """Record a duration in a histogram."""
+        self._metric(self.prometheus_client.Histogram, name, "_seconds", tags).observe(seconds)
+
+    def gauge(self, name: str, value: float, tags: dict[str, str] | None = None) -> None:
+        """Set a gauge."""
+        self._metric(self.prometheus_client.Gauge, name, "", tags).set(value)
+
+
+@cache
+def get_metrics():
+    """Return the metrics backend configured with the ``OWM_METRICS_BACKEND`` setting."""
+    if not owm_settings.OWM_METRICS_BACKEND:
+        return NullMetrics()
+    backend_class = import_string(owm_settings.OWM_METRICS_BACKEND["BACKEND"])
+    return backend_class(**owm_settings.OWM_METRICS_BACKEND.get("OPTIONS", {}))
+
+
+@receiver(setting_changed)
+def reset_metrics(*, setting: str, **kwargs) -> None:  # pylint: disable=W0613
+    """Discard the cached metrics backend when ``DJANGO_OWM`` changes, so that the next call uses the new setting."""
+    if setting == "DJANGO_OWM":
+        get_metrics.cache_clear()
@@ -0,0 +1,416 @@
+"""Range partitioning of the time-series weather tables by timestamp, on PostgreSQL.
+
+A partitioned table is split into one partition per day, week or month of its timestamps. Expired data is removed by
+dropping (or detaching) whole partitions, which takes the same time however many rows they hold, and queries that
+filter on the timestamp only read the partitions that can match.
+
+Tables are converted with the ``PartitionByTimestamp`` migration operation:
+
+    from django_owm.utils.partitioning import PartitionByTimestamp
+
+    class Migration(migrations.Migration):
+        dependencies = [("myapp", "0001_initial")]
+        operations = [PartitionByTimestamp("MinutelyWeather", interval="day")]
+
+The existing table becomes the first partition, holding every row older than the end of the interval of its newest
+row, and partitions are created from there on. Attaching it scans the table once, and its primary key index is rebuilt
+to include the timestamp, as PostgreSQL requires of partitioned tables. The operation does nothing on other databases.
+
+Partitions are then created ahead of time and expired by the ``maintain_partitions`` command or task, as configured
+by the ``OWM_PARTITIONING`` setting. Rows can only be inserted into a partition that exists, so run either at least
+once per interval.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import re
+from dataclasses import dataclass
+from dataclasses import field
+
+from django.apps import apps
+from django.db import connections
+from django.db import router
+from django.db.migrations.operations.base import Operation
+from django.db.models import Model
+from django.utils import timezone
+
+from ..app_settings import owm_settings
+
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ("day", "week", "month")
+
+# The timestamp column each model can be partitioned by
+PARTITION_COLUMNS = {
+    "CurrentWeather": "timestamp",
+    "MinutelyWeather": "timestamp",
+    "HourlyWeather": "timestamp",
+    "DailyWeather": "timestamp",
+    "WeatherSnapshot": "fetched_at",
+}
+
+# How far past the time of a fetch each model's timestamps reach, for forecasts; partitions must exist that far ahead
+FORECAST_HORIZONS = {
+    "CurrentWeather": datetime.timedelta(0),
+    "MinutelyWeather": datetime.timedelta(hours=1),
+    "HourlyWeather": datetime.timedelta(hours=48),
+    "DailyWeather": datetime.timedelta(days=8),
+    "WeatherSnapshot": datetime.timedelta(0),
+}
+
+# Partitions created beyond the forecast horizon, so that a missed maintenance run does not stop inserts
+DEFAULT_PREMAKE = 2
+
+_BOUND_PATTERN = re.compile(r"FOR VALUES FROM \((?P<start>.+?)\) TO \((?P<end>.+?)\)")
+
+
+def interval_start(moment: datetime.datetime, interval: str) -> datetime.datetime:
+    """Return the start, in UTC, of the day, week (starting on Monday) or month containing a moment."""
+    moment = moment.astimezone(datetime.timezone.utc)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "week":
+        return start - datetime.timedelta(days=start.weekday())
+    if interval == "month":
+        return start.replace(day=1)
+    return start
+
+
+def next_interval(start: datetime.datetime, interval: str) -> datetime.datetime:
+    """Return the start of the interval after the one starting at ``start``."""
+    if interval == "week":
+        return start + datetime.timedelta(weeks=1)
+    if interval == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + datetime.timedelta(days=1)
+
+
+@dataclass(frozen=True)
+class Partition:
+    """A partition of a table, holding the rows from ``start`` (inclusive) to ``end`` (exclusive).
+
+    A bound of None is unbounded (``MINVALUE`` or ``MAXVALUE``).
+    """
+
+    name: str
+    start: datetime.datetime | None
+    end: datetime.datetime | None
+
+    def bound_sql(self) -> str:
+        """Return the ``FOR VALUES`` clause of the partition."""
+        start = f"'{self.start.isoformat()}'" if self.start else "MINVALUE"
+        end = f"'{self.end.isoformat()}'" if self.end else "MAXVALUE"
+        return f"FOR VALUES FROM ({start}) TO ({end})"
+
+
+@dataclass
+class PartitionPlan:
+    """The partitions of a table to create and to expire."""
+
+    table: str
+    create: list[Partition] = field(default_factory=list)
+    expire: list[Partition] = field(default_factory=list)
+
+
+def partition_name(table: str, start: datetime.datetime) -> str:
+    """Return the name of the partition of a table starting at ``start``."""
+    return f"{table}_p{start:%Y%m%d}"
+
+
+def plan_partitions(
+    table: str,
+    existing: list[Partition],
+    interval: str,
+    now: datetime.datetime | None = None,
+    horizon: datetime.timedelta = datetime.timedelta(0),
+    premake: int = DEFAULT_PREMAKE,
+    retention: datetime.timedelta | None = None,
+) -> PartitionPlan:
+    """Plan the partitions to create and expire, given a table's existing partitions.
+
+    Partitions are created from the end of the newest existing partition (or the start of the current interval) until
+    ``premake`` intervals past ``now + horizon``. With a ``retention``, partitions whose rows are all older than
+    ``now - retention`` are expired, and no partitions are created for that period.
+    """
+    now = now or timezone.now()
+    plan = PartitionPlan(table=table)
+    cutoff = now - retention if retention is not None else None
+    if cutoff is not None:
+        plan.expire = [partition for partition in existing if partition.end is not None and partition.end <= cutoff]
+
+    if any(partition.end is None for partition in existing):
+        # A partition holds every row from some point on, so none can be added after it
+        return plan
+    start = max((partition.end for partition in existing), default=interval_start(now, interval))
+    if cutoff is not None:
+        start = max(start, interval_start(cutoff, interval))
+    until = interval_start(now + horizon, interval)
+    for _ in range(premake + 1):
+        until = next_interval(until, interval)
+    while start < until:
+        end = next_interval(interval_start(start, interval), interval)
+        plan.create.append(Partition(partition_name(table, start), start, end))
+        start = end
+    return plan
+
+
+def parse_bound(bound: str) -> tuple[datetime.datetime | None, datetime.datetime | None] | None:
+    """Return the (start, end) of a partition bound as shown by ``pg_get_expr``, or None for a default partition."""
+    match = _BOUND_PATTERN.search(bound)
+    if not match:
+        return None
+
+    def parse(value: str) -> datetime.datetime | None:
+        if value in ("MINVALUE", "MAXVALUE"):
+            return None
+        value = value.strip("'")
+        # PostgreSQL shows offsets as "+00", which fromisoformat only accepts from Python 3.11
+        if re.search(r"[+-]\d\d$", value):
+            value += ":00"
+        return datetime.datetime.fromisoformat(value)
+
+    return parse(match["start"]), parse(match["end"])
+
+
+def is_partitioned(connection, table: str) -> bool:
+    """Return whether a table is partitioned."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass)",
+            [connection.ops.quote_name(table)],
+        )
+        return cursor.fetchone()[0]
+
+
+def list_partitions(connection, table: str) -> list[Partition]:
+    """Return the range partitions of a table, oldest first; a default partition is left out."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            """,
+            [connection.ops.quote_name(table)],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        bounds = parse_bound(bound)
+        if bounds is not None:
+            partitions.append(Partition(name, *bounds))
+    minimum = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+    return sorted(partitions, key=lambda partition: partition.start or minimum)
+
+
+def apply_plan(connection, plan: PartitionPlan, detach_only: bool = False) -> None:
+    """Create and expire the partitions of a plan.
+
+    Expired partitions are detached, then dropped unless ``detach_only``, which keeps them as tables of their own.
+    """
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for partition in plan.create:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {quote_name(partition.name)} "
+                f"PARTITION OF {quote_name(plan.table)} {partition.bound_sql()}"
+            )
+        for partition in plan.expire:
+            cursor.execute(f"ALTER TABLE {quote_name(plan.table)} DETACH PARTITION {quote_name(partition.name)}")
+            if not detach_only:
+                cursor.execute(f"DROP TABLE {quote_name(partition.name)}")
+
+
+def get_partitioning_config(model_name: str) -> dict:
+    """Return the ``OWM_PARTITIONING`` options of a model, with defaults filled in."""
+    options = owm_settings.OWM_PARTITIONING[model_name]
+    return {
+        "interval": options.get("interval", "month"),
+        "retention": options.get("retention"),
+        "premake": options.get("premake", DEFAULT_PREMAKE),
+    }
+
+
+def get_model_connection(model_name: str):
+    """Return the connection to the database that a model's rows are written to, as chosen by the routers."""
+    model = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS[model_name])
+    return connections[router.db_for_write(model)]
+
+
+def maintain_partitions(
+    model_name: str, now: datetime.datetime | None = None, dry_run: bool = False, detach_only: bool = False
+) -> PartitionPlan | None:
+    """Create the partitions a model's table needs ahead of time and expire old ones, as set in ``OWM_PARTITIONING``.
+
+    Returns the plan carried out, or None if the table is not partitioned.
+    """
+    model = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS[model_name])
+    connection = get_model_connection(model_name)
+    table = model._meta.db_table
+    if not is_partitioned(connection, table):
+        logger.warning("Table %s of %s is not partitioned.", table, model_name)
+        return None
+    options = get_partitioning_config(model_name)
+    plan = plan_partitions(
+        table,
+        list_partitions(connection, table),
+        options["interval"],
+        now=now,
+        horizon=FORECAST_HORIZONS[model_name],
+        premake=options["premake"],
+        retention=options["retention"],
+    )
+    if not dry_run:
+        apply_plan(connection, plan, detach_only=detach_only)
+    return plan
+
+
+def maintain_all_partitions(
+    now: datetime.datetime | None = None, dry_run: bool = False, detach_only: bool = False
+) -> dict[str, PartitionPlan | None]:
+    """Maintain the partitions of every model in ``OWM_PARTITIONING``, returning the plan carried out for each."""
+    return {
+        model_name: maintain_partitions(model_name, now=now, dry_run=dry_run, detach_only=detach_only)
+        for model_name in owm_settings.OWM_PARTITIONING
+    }
+
+
+def partition_table(schema_editor, model: type[Model], column: str, interval: str) -> None:
+    """Convert a model's table into a table partitioned by range of ``column``, keeping its rows.
+
+    The table is renamed and attached as the first partition of a new partitioned table with the same columns,
+    indexes and foreign keys. Integer primary keys keep counting from the largest one in the table.
+    """
+    connection = schema_editor.connection
+    quote_name = schema_editor.quote_name
+    table = model._meta.db_table
+    old_table = f"{table[:50]}_unpartitioned"
+    pk_column = model._meta.pk.column
+    integer_pk = model._meta.pk.get_internal_type() in ("AutoField", "BigAutoField", "SmallAutoField")
+
+    # Django's foreign keys are deferred, and PostgreSQL cannot alter a table with checks pending from rows written
+    # earlier in the transaction, so run them now
+    connection.check_constraints()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT MAX({quote_name(column)}) FROM {quote_name(table)}")
+        newest = cursor.fetchone()[0]
+        cursor.execute(
+            """
+            SELECT index_class.relname, pg_get_indexdef(index_class.oid), pg_index.indisunique
+            FROM pg_index
+            JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+            WHERE pg_index.indrelid = %s::regclass AND NOT pg_index.indisprimary
+            """,
+            [quote_name(table)],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'f')",
+            [quote_name(table)],
+        )
+        constraints = cursor.fetchall()
+    primary_keys = [name for name, kind, _ in constraints if kind == "p"]
+    foreign_keys = [(name, definition) for name, kind, definition in constraints if kind == "f"]
+    if any(unique for _, _, unique in indexes):
+        raise ValueError(f"{table} has unique indexes, which a table partitioned by {column} cannot keep.")
+
+    if newest:
+        cutover = next_interval(interval_start(newest, interval), interval)
+    else:
+        cutover = interval_start(timezone.now(), interval)
+    statements = [f"ALTER TABLE {quote_name(table)} RENAME TO {quote_name(old_table)}"]
+    # Attaching the table gives it the partitioned table's primary key, which it can only have one of
+    statements += [
+        f"ALTER TABLE {quote_name(old_table)} DROP CONSTRAINT {quote_name(name)}" for name in primary_keys
+    ]
+    # Free the names of the indexes for those of the partitioned table
+    statements += [f"ALTER INDEX {quote_name(name)} RENAME TO {quote_name(name[:61] + '_u')}" for name, _, _ in indexes]
+    statements.append(
+        f"CREATE TABLE {quote_name(table)} (LIKE {quote_name(old_table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+        f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE ({quote_name(column)})"
+    )
+    if integer_pk:
+        # Identity columns are only supported on partitioned tables from PostgreSQL 17, so use a sequence
+        sequence = f"{table[:55]}_pk_seq"
+        statements += [
+            f"ALTER TABLE {quote_name(old_table)} ALTER COLUMN {quote_name(pk_column)} DROP IDENTITY IF EXISTS",
+            f"ALTER TABLE {quote_name(old_table)} ALTER COLUMN {quote_name(pk_column)} DROP DEFAULT",
+            f"ALTER TABLE {quote_name(table)} ALTER COLUMN {quote_name(pk_column)} DROP DEFAULT",
+            f"CREATE SEQUENCE {quote_name(sequence)} OWNED BY {quote_name(table)}.{quote_name(pk_column)}",
+            f"SELECT setval('{quote_name(sequence)}', COALESCE((SELECT MAX({quote_name(pk_column)}) "
+            f"FROM {quote_name(old_table)}), 0) + 1, false)",
+            f"ALTER TABLE {quote_name(table)} ALTER COLUMN {quote_name(pk_column)} "
+            f"SET DEFAULT nextval('{quote_name(sequence)}')",
+        ]
+    # A partitioned table's primary key must include the partitioning column
+    statements.append(
+        f"ALTER TABLE {quote_name(table)} ADD PRIMARY KEY ({quote_name(pk_column)}, {quote_name(column)})"
+    )
+    statements += [
+        f"ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(name)} {definition}"
+        for name, definition in foreign_keys
+    ]
+    # The definitions were read before the renames, so they create the indexes on the partitioned table
+    statements += [definition for _, definition, _ in indexes]
+    statements.append(
+        f"ALTER TABLE {quote_name(table)} ATTACH PARTITION {quote_name(old_table)} "
+        f"{Partition(old_table, None, cutover).bound_sql()}"
+    )
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+    plan = plan_partitions(
+        table, [Partition(old_table, None, cutover)], interval, horizon=max(FORECAST_HORIZONS.values())
+    )
+    apply_plan(connection, plan)
+
+
+class PartitionByTimestamp(Operation):
+    """Migration operation converting a model's table into one partitioned by range of its timestamp, on PostgreSQL.
+
+    The table keeps its rows (see ``partition_table``). On other databases, the operation does nothing. It cannot be
+    reversed.
+    """
+
+    reversible = False
+
+    def __init__(self, model_name: str, interval: str = "month", column: str = "timestamp"):
+        if interval not in INTERVALS:
+            raise ValueError(f"Unknown partition interval {interval!r}; use one of {', '.join(INTERVALS)}.")
+        self.model_name = model_name
+        self.interval = interval
+        self.column = column
+
+    def deconstruct(self):  # noqa: D102
+        return (
+            self.__class__.__name__,
+            [self.model_name],
+            {"interval": self.interval, "column": self.column},
+        )
+
+    def state_forwards(self, app_label, state):  # noqa: D102
+        # Partitioning does not change the model
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):  # noqa: D102
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            partition_table(schema_editor, model, self.column, self.interval)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):  # noqa: D102
+        raise NotImplementedError("Partitioning a table cannot be reversed.")
+
+    def describe(self):  # noqa: D102
+        return f"Partition {self.model_name} by {self.interval} of {self.column}"
+
+    @property
+    def migration_name_fragment(self):  # noqa: D102
+        return f"partition_{self.model_name.lower()}"
@@ -0,0 +1,191 @@
+"""Data-access helpers shared by the django_owm views.
+
+These helpers centralize the location lookup and the querysets behind each weather panel, and load pages of data in
+as few queries as possible. Where the database supports window functions, the total row count used for pagination
+is computed in the same query as the page itself, so each panel costs a single query.
+"""
+
+from __future__ import annotations
+
+import datetime
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.core.paginator import EmptyPage
+from django.core.paginator import Page
+from django.core.paginator import PageNotAnInteger
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count
+from django.db.models import QuerySet
+from django.db.models import Window
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from ..app_settings import owm_settings
+from .snapshots import lazy_materialization_enabled
+from .snapshots import materialize_location
+
+
+if TYPE_CHECKING:
+    from ..models import AbstractWeatherLocation
+
+
+PAGE_SIZE = 5
+
+_TOTAL_COUNT_ANNOTATION = "_owm_total_count"
+
+
+def _location_lookup(location_id: int | uuid.UUID) -> dict[str, Any]:
+    """Return the lookup kwargs used to find a location by its ID."""
+    if owm_settings.OWM_USE_UUID:
+        return {"uuid": location_id}
+    return {"pk": location_id}
+
+
+def get_location(location_id: int | uuid.UUID) -> AbstractWeatherLocation:
+    """Get a weather location by its ID, raising Http404 if it does not exist."""
+    WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    return get_object_or_404(WeatherLocationModel, **_location_lookup(location_id))
+
+
+async def aget_location(location_id: int | uuid.UUID) -> AbstractWeatherLocation:
+    """Asynchronously get a weather location by its ID, raising Http404 if it does not exist.
+
+    With ``OWM_SNAPSHOT_MODE = "lazy"``, the location's pending snapshots are materialized first, so that its weather
+    can be read from the weather tables.
+    """
+    WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    try:
+        location = await WeatherLocationModel.objects.aget(**_location_lookup(location_id))
+    except WeatherLocationModel.DoesNotExist as exc:
+        raise Http404(f"No {WeatherLocationModel._meta.object_name} matches the given query.") from exc
+    if lazy_materialization_enabled():
+        await sync_to_async(materialize_location)(location)
+    return location
+
+
+def current_weather_queryset(location: AbstractWeatherLocation) -> QuerySet:
+    """Return the current weather records for a location, newest first."""
+    CurrentWeatherModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    return CurrentWeatherModel.objects.filter(location=location).order_by("-timestamp")
+
+
+def hourly_forecast_queryset(location: AbstractWeatherLocation, now: datetime.datetime | None = None) -> QuerySet:
+    """Return the upcoming hourly forecast records for a location."""
+    HourlyWeatherModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather"))
+    now = now or timezone.now()
+    return HourlyWeatherModel.objects.filter(location=location, timestamp__gte=now).order_by("timestamp")
+
+
+def daily_forecast_queryset(location: AbstractWeatherLocation, now: datetime.datetime | None = None) -> QuerySet:
+    """Return the upcoming daily forecast records for a location."""
+    DailyWeatherModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("DailyWeather"))
+    now = now or timezone.now()
+    return DailyWeatherModel.objects.filter(location=location, timestamp__gte=now).order_by("timestamp")
+
+
+def alerts_queryset(location: AbstractWeatherLocation, now: datetime.datetime | None = None) -> QuerySet:
+    """Return the active weather alerts for a location, leaving out alerts that have ended or been cleared."""
+    WeatherAlertModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    now = now or timezone.now()
+    return WeatherAlertModel.objects.filter(location=location, end__gte=now, cleared_at__isnull=True).order_by("start")
+
+
+def errors_queryset(location: AbstractWeatherLocation) -> QuerySet:
+    """Return the error logs for a location, most recently seen first."""
+    WeatherErrorLogModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    return WeatherErrorLogModel.objects.filter(location=location).order_by("-last_seen", "-pk")
+
+
+async def alist(queryset: QuerySet) -> list:
+    """Asynchronously evaluate a queryset into a list."""
+    return [obj async for obj in queryset]
+
+
+def _requested_page_number(page_number: int | str | None) -> int:
+    """Convert a requested page number to an int, falling back to the first page."""
+    try:
+        number = int(page_number)
+    except (TypeError, ValueError):
+        return 1
+    return max(number, 1)
+
+
+async def aget_page(queryset: QuerySet, page_number: int | str | None, per_page: int = PAGE_SIZE) -> Page:
+    """Asynchronously build a page of ``queryset``, following the semantics of ``Paginator.get_page``.
+
+    When the database supports window functions, the page and the total count are loaded in a single query.
+    """
+    paginator = Paginator(queryset, per_page)
+    number = _requested_page_number(page_number)
+    bottom = (number - 1) * per_page
+
+    if connections[queryset.db].features.supports_over_clause:
+        windowed = queryset.annotate(**{_TOTAL_COUNT_ANNOTATION: Window(expression=Count("pk"))})
+        object_list = await alist(windowed[bottom : bottom + per_page])
+        if object_list:
+            paginator.count = getattr(object_list[0], _TOTAL_COUNT_ANNOTATION)
+            return Page(object_list, number, paginator)
+        if number == 1:
+            paginator.count = 0
+            return Page(object_list, number, paginator)
+
+    # Either window functions are unavailable or the requested page is out of range; count, then load the page.
+    paginator.count = await queryset.acount()
+    try:
+        number = paginator.validate_number(number)
+    except (PageNotAnInteger, EmptyPage):
+        number = paginator.num_pages
+    bottom = (number - 1) * per_page
+    object_list = await alist(queryset[bottom : bottom + per_page])
+    return Page(object_list, number, paginator)
+
+
+@dataclass
+class WeatherDashboard:
+    """All of the data needed to render the weather panels for a location."""
+
+    location: AbstractWeatherLocation
+    history_page: Page
+    hourly_page: Page
+    daily_page: Page
+    alerts_page: Page
+    errors_page: Page
+
+    @property
+    def current_weather(self):
+        """Return the most recent current weather record, if it is on the loaded history page."""
+        if self.history_page.number == 1 and self.history_page.object_list:
+            return self.history_page.object_list[0]
+        return None
+
+
+async def aget_dashboard(
+    location: AbstractWeatherLocation,
+    history_page: int | str | None = 1,
+    hourly_page: int | str | None = 1,
+    daily_page: int | str | None = 1,
+    alerts_page: int | str | None = 1,
+    errors_page: int | str | None = 1,
+) -> WeatherDashboard:
+    """Asynchronously load the requested page of every weather panel for a location.
+
+    With window function support this is one query per panel, regardless of how much data the location has. The
+    queries run one after another: Django runs async ORM calls on a single thread per request, so gathering them would
+    not overlap them.
+    """
+    now = timezone.now()
+    return WeatherDashboard(
+        location,
+        history_page=await aget_page(current_weather_queryset(location), history_page),
+        hourly_page=await aget_page(hourly_forecast_queryset(location, now), hourly_page),
+        daily_page=await aget_page(daily_forecast_queryset(location, now), daily_page),
+        alerts_page=await aget_page(alerts_queryset(location, now), alerts_page),
+        errors_page=await aget_page(errors_queryset(location), errors_page),
+    )
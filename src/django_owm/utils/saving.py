@@ -3,14 +3,23 @@
 from __future__ import annotations
 
 import datetime
+import functools
+import hashlib
+import json
 import logging
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 from typing import Any
 
 from django.apps import apps
+from django.db import connections
+from django.db import router
+from django.db import transaction
+from django.db.models import Model
 from django.utils import timezone
 
-from ..app_settings import OWM_MODEL_MAPPINGS
+from ..app_settings import owm_settings
+from .instrumentation import timed_stage
 
 
 logger = logging.getLogger(__name__)
@@ -19,24 +28,155 @@ if TYPE_CHECKING:
     from ..models import AbstractWeatherLocation
 
 
-def save_weather_data(location: AbstractWeatherLocation, data: dict[str, Any]) -> None:
-    """Save weather data to the database."""
-    if data:
-        # If `location` does not have a timezone, apply it from the `data`
-        if hasattr(location, "timezone") and not location.timezone:
-            location.timezone = data.get("timezone")
-            location.save()
-
-        save_current_weather(location, data)
-        save_minutely_weather(location, data)
-        save_hourly_weather(location, data)
-        save_daily_weather(location, data)
-        save_alerts(location, data)
-
-
+# The model (as named in ``OWM_MODEL_MAPPINGS``) saving each block of a One Call API response
+WEATHER_BLOCK_MODELS = {
+    "current": "CurrentWeather",
+    "minutely": "MinutelyWeather",
+    "hourly": "HourlyWeather",
+    "daily": "DailyWeather",
+    "alerts": "WeatherAlert",
+}
+
+
+# The fields of a stored alert that are updated when it is in a response again
+ALERT_UPDATE_FIELDS = ["tags", "last_seen", "cleared_at"]
+
+
+# The blocks that are skipped when unchanged, with ``OWM_CHANGE_DETECTION``
+CHANGE_DETECTED_BLOCKS = ("current", "hourly", "daily", "alerts")
+
+
+def count_weather_rows_by_model(data: dict[str, Any]) -> dict[str, int]:
+    """Return the number of weather rows saved for a One Call API response, per model."""
+    counts = {}
+    for block, model_name in WEATHER_BLOCK_MODELS.items():
+        value = data.get(block)
+        rows = (1 if value else 0) if block == "current" else len(value or [])
+        if rows:
+            counts[model_name] = rows
+    return counts
+
+
+def count_weather_rows(data: dict[str, Any]) -> int:
+    """Return the number of weather rows saved for a One Call API response."""
+    return sum(count_weather_rows_by_model(data).values())
+
+
+def hash_block(value: Any) -> str:
+    """Return the hash of a block of a One Call API response; a missing block hashes like an empty one."""
+    return hashlib.sha256(json.dumps(value or None, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def save_weather_data(
+    location: AbstractWeatherLocation, data: dict[str, Any], fetched_at: datetime.datetime | None = None
+) -> dict[str, int]:
+    """Save weather data to the database, returning the number of rows written per model.
+
+    ``fetched_at`` is when the response was fetched, if not just now; alerts are recorded as seen (or cleared) then.
+    With ``OWM_CHANGE_DETECTION``, the current, hourly, daily and alerts blocks are skipped when their hash is the
+    same as in the location's last saved response; see ``save_changed_weather_data``.
+    """
+    if not data:
+        return {}
+    # If `location` does not have a timezone, apply it from the `data`
+    if hasattr(location, "timezone") and not location.timezone:
+        location.timezone = data.get("timezone")
+        location.save()
+
+    if owm_settings.OWM_CHANGE_DETECTION:
+        return save_changed_weather_data(location, data, fetched_at)
+    save_current_weather(location, data)
+    save_minutely_weather(location, data)
+    save_hourly_weather(location, data)
+    save_daily_weather(location, data)
+    save_alerts(location, data, now=fetched_at)
+    return count_weather_rows_by_model(data)
+
+
+def save_changed_weather_data(
+    location: AbstractWeatherLocation, data: dict[str, Any], fetched_at: datetime.datetime | None = None
+) -> dict[str, int]:
+    """Save the blocks of a response that changed since the location's last saved response.
+
+    Each block in ``CHANGE_DETECTED_BLOCKS`` is hashed and compared with the hash stored in the location's
+    ``block_hashes``; unchanged blocks are not written at all. Changed hourly and daily blocks only update the rows
+    whose values changed (see ``save_forecast_rows``). Minutely data changes with every fetch, so it is always saved.
+    Unchanged alerts are still active, so their ``last_seen`` time is refreshed with one update (see
+    ``refresh_alerts_last_seen``), which is not counted as rows written. The new hashes are stored with one update
+    once the blocks are saved. Returns the number of rows written per model.
+    """
+    hashes = dict(location.block_hashes or {})
+    counts = {}
+    for block, save in (
+        ("current", save_current_weather),
+        ("minutely", save_minutely_weather),
+        ("hourly", save_hourly_weather),
+        ("daily", save_daily_weather),
+        ("alerts", functools.partial(save_alerts, now=fetched_at)),
+    ):
+        if block in CHANGE_DETECTED_BLOCKS:
+            digest = hash_block(data.get(block))
+            if hashes.get(block) == digest:
+                if block == "alerts" and data.get("alerts"):
+                    refresh_alerts_last_seen(location, now=fetched_at)
+                continue
+            hashes[block] = digest
+        written = save(location, data)
+        if written is None:
+            written = count_weather_rows_by_model({block: data.get(block)}).get(WEATHER_BLOCK_MODELS[block], 0)
+        if written:
+            counts[WEATHER_BLOCK_MODELS[block]] = written
+
+    if hashes != location.block_hashes:
+        location.block_hashes = hashes
+        type(location).objects.filter(pk=location.pk).update(block_hashes=hashes)
+    return counts
+
+
+def save_forecast_rows(model: type[Model], location: AbstractWeatherLocation, rows: list[dict[str, Any]]) -> int:
+    """Save forecast rows for a location, updating the rows stored for the same timestamps instead of adding rows.
+
+    The stored rows for the timestamps are read with one query. Rows whose values are all equal are left alone, those
+    with changed values are updated with one ``bulk_update``, and rows for new timestamps are added with one
+    ``bulk_create``. Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    connection = connections[router.db_for_write(model)]
+    fields = {name: model._meta.get_field(name) for name in rows[0]}
+    existing = model.objects.filter(location=location, timestamp__in=[values["timestamp"] for values in rows])
+    # In ascending order of primary keys, so that the most recent row for a timestamp is the one kept
+    stored = {row.timestamp: row for row in existing.order_by("pk")}
+
+    to_create, to_update, changed_fields = [], [], set()
+    for values in rows:
+        row = stored.get(values["timestamp"])
+        if row is None:
+            to_create.append(model(location=location, **values))
+            continue
+        changed = {
+            name
+            for name, value in values.items()
+            if fields[name].get_db_prep_save(value, connection)
+            != fields[name].get_db_prep_save(getattr(row, name), connection)
+        }
+        if changed:
+            for name in changed:
+                setattr(row, name, values[name])
+            to_update.append(row)
+            changed_fields |= changed
+
+    with transaction.atomic(using=connection.alias):
+        model.objects.bulk_create(to_create)
+        if to_update:
+            model.objects.bulk_update(to_update, sorted(changed_fields))
+    return len(to_create) + len(to_update)
+
+
+@timed_stage("save_current_weather")
 def save_current_weather(location: AbstractWeatherLocation, data: dict[str, Any]) -> None:
     """Save current weather data to the database."""
-    CurrentWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    CurrentWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("CurrentWeather"))
 
     if not CurrentWeather:
         logger.error("CurrentWeather is not configured.")
@@ -72,9 +212,14 @@ def save_current_weather(location: AbstractWeatherLocation, data: dict[str, Any]
     )
 
 
+@timed_stage("save_minutely_weather")
 def save_minutely_weather(location: AbstractWeatherLocation, data: dict[str, Any]) -> None:
-    """Save minutely weather data to the database."""
-    MinutelyWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("MinutelyWeather"))
+    """Save minutely weather data to the database.
+
+    With ``OWM_MINUTELY_ROLLING_WINDOW``, the location's previous minutely rows are replaced by the new ones in one
+    transaction, so that each location only keeps the window from its latest fetch (61 rows for the next hour).
+    """
+    MinutelyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("MinutelyWeather"))
 
     if not MinutelyWeather:
         logger.error("MinutelyWeather is not configured.")
@@ -84,6 +229,20 @@ def save_minutely_weather(location: AbstractWeatherLocation, data: dict[str, Any
     if not minutely_data:
         return
 
+    if owm_settings.OWM_MINUTELY_ROLLING_WINDOW:
+        rows = [
+            MinutelyWeather(
+                location=location,
+                timestamp=timezone.datetime.fromtimestamp(minute_data["dt"], tz=datetime.timezone.utc),
+                precipitation=minute_data.get("precipitation"),
+            )
+            for minute_data in minutely_data
+        ]
+        with transaction.atomic(using=router.db_for_write(MinutelyWeather)):
+            MinutelyWeather.objects.filter(location=location).delete()
+            MinutelyWeather.objects.bulk_create(rows)
+        return
+
     for minute_data in minutely_data:
         timestamp = timezone.datetime.fromtimestamp(minute_data["dt"], tz=datetime.timezone.utc)
         MinutelyWeather.objects.create(
@@ -93,126 +252,197 @@ def save_minutely_weather(location: AbstractWeatherLocation, data: dict[str, Any
         )
 
 
-def save_hourly_weather(location: AbstractWeatherLocation, data: dict[str, Any]) -> None:
-    """Save hourly weather data to the database."""
-    HourlyWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("HourlyWeather"))
+@timed_stage("save_hourly_weather")
+def save_hourly_weather(location: AbstractWeatherLocation, data: dict[str, Any]) -> int | None:
+    """Save hourly weather data to the database.
+
+    With ``OWM_CHANGE_DETECTION``, the rows stored for the same hours are updated instead, and the number of rows
+    written is returned.
+    """
+    HourlyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("HourlyWeather"))
 
     if not HourlyWeather:
         logger.error("HourlyWeather is not configured.")
-        return
+        return None
 
     hourly_data = data.get("hourly", [])
     if not hourly_data:
-        return
+        return None
 
+    rows = []
     for hour_data in hourly_data:
-        timestamp = timezone.datetime.fromtimestamp(hour_data["dt"], tz=datetime.timezone.utc)
         weather_condition = hour_data.get("weather", None)
         weather_condition = weather_condition[0] if weather_condition else {}
-        HourlyWeather.objects.create(
-            location=location,
-            timestamp=timestamp,
-            temp=hour_data.get("temp"),
-            feels_like=hour_data.get("feels_like"),
-            pressure=hour_data.get("pressure"),
-            humidity=hour_data.get("humidity"),
-            dew_point=hour_data.get("dew_point"),
-            uvi=hour_data.get("uvi"),
-            clouds=hour_data.get("clouds"),
-            visibility=hour_data.get("visibility"),
-            wind_speed=hour_data.get("wind_speed"),
-            wind_deg=hour_data.get("wind_deg"),
-            wind_gust=hour_data.get("wind_gust"),
-            rain_1h=hour_data.get("rain", {}).get("1h"),
-            snow_1h=hour_data.get("snow", {}).get("1h"),
-            weather_condition_id=weather_condition.get("id"),
-            weather_condition_main=weather_condition.get("main"),
-            weather_condition_description=weather_condition.get("description"),
-            weather_condition_icon=weather_condition.get("icon"),
+        rows.append(
+            {
+                "timestamp": timezone.datetime.fromtimestamp(hour_data["dt"], tz=datetime.timezone.utc),
+                "temp": hour_data.get("temp"),
+                "feels_like": hour_data.get("feels_like"),
+                "pressure": hour_data.get("pressure"),
+                "humidity": hour_data.get("humidity"),
+                "dew_point": hour_data.get("dew_point"),
+                "uvi": hour_data.get("uvi"),
+                "clouds": hour_data.get("clouds"),
+                "visibility": hour_data.get("visibility"),
+                "wind_speed": hour_data.get("wind_speed"),
+                "wind_deg": hour_data.get("wind_deg"),
+                "wind_gust": hour_data.get("wind_gust"),
+                "rain_1h": hour_data.get("rain", {}).get("1h"),
+                "snow_1h": hour_data.get("snow", {}).get("1h"),
+                "weather_condition_id": weather_condition.get("id"),
+                "weather_condition_main": weather_condition.get("main"),
+                "weather_condition_description": weather_condition.get("description"),
+                "weather_condition_icon": weather_condition.get("icon"),
+            }
         )
+    if owm_settings.OWM_CHANGE_DETECTION:
+        return save_forecast_rows(HourlyWeather, location, rows)
+    for values in rows:
+        HourlyWeather.objects.create(location=location, **values)
+    return None
+
 
+@timed_stage("save_daily_weather")
+def save_daily_weather(location: AbstractWeatherLocation, data: dict[str, Any]) -> int | None:
+    """Save daily weather data to the database.
 
-def save_daily_weather(location: AbstractWeatherLocation, data: dict[str, Any]) -> None:
-    """Save daily weather data to the database."""
-    DailyWeather = apps.get_model(OWM_MODEL_MAPPINGS.get("DailyWeather"))
+    With ``OWM_CHANGE_DETECTION``, the rows stored for the same days are updated instead, and the number of rows
+    written is returned.
+    """
+    DailyWeather = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("DailyWeather"))
 
     if not DailyWeather:
         logger.error("DailyWeather is not configured.")
-        return
+        return None
 
     daily_data = data.get("daily", [])
     if not daily_data:
-        return
+        return None
 
+    rows = []
     for day_data in daily_data:
-        timestamp = timezone.datetime.fromtimestamp(day_data["dt"], tz=datetime.timezone.utc)
         weather_condition = day_data.get("weather", None)
         weather_condition = weather_condition[0] if weather_condition else {}
-        DailyWeather.objects.create(
-            location=location,
-            timestamp=timestamp,
-            sunrise=(
-                timezone.datetime.fromtimestamp(day_data.get("sunrise"), tz=datetime.timezone.utc)
-                if day_data.get("sunrise")
-                else None
-            ),
-            sunset=(
-                timezone.datetime.fromtimestamp(day_data.get("sunset"), tz=datetime.timezone.utc)
-                if day_data.get("sunset")
-                else None
-            ),
-            temp_day=day_data.get("temp", {}).get("day"),
-            temp_min=day_data.get("temp", {}).get("min"),
-            temp_max=day_data.get("temp", {}).get("max"),
-            temp_night=day_data.get("temp", {}).get("night"),
-            temp_eve=day_data.get("temp", {}).get("eve"),
-            temp_morn=day_data.get("temp", {}).get("morn"),
-            feels_like_day=day_data.get("feels_like", {}).get("day"),
-            feels_like_night=day_data.get("feels_like", {}).get("night"),
-            feels_like_eve=day_data.get("feels_like", {}).get("eve"),
-            feels_like_morn=day_data.get("feels_like", {}).get("morn"),
-            pressure=day_data.get("pressure"),
-            humidity=day_data.get("humidity"),
-            dew_point=day_data.get("dew_point"),
-            uvi=day_data.get("uvi"),
-            clouds=day_data.get("clouds"),
-            wind_speed=day_data.get("wind_speed"),
-            wind_deg=day_data.get("wind_deg"),
-            wind_gust=day_data.get("wind_gust"),
-            rain=day_data.get("rain"),
-            snow=day_data.get("snow"),
-            weather_condition_id=weather_condition.get("id"),
-            weather_condition_main=weather_condition.get("main"),
-            weather_condition_description=weather_condition.get("description"),
-            weather_condition_icon=weather_condition.get("icon"),
+        rows.append(
+            {
+                "timestamp": timezone.datetime.fromtimestamp(day_data["dt"], tz=datetime.timezone.utc),
+                "sunrise": (
+                    timezone.datetime.fromtimestamp(day_data.get("sunrise"), tz=datetime.timezone.utc)
+                    if day_data.get("sunrise")
+                    else None
+                ),
+                "sunset": (
+                    timezone.datetime.fromtimestamp(day_data.get("sunset"), tz=datetime.timezone.utc)
+                    if day_data.get("sunset")
+                    else None
+                ),
+                "temp_day": day_data.get("temp", {}).get("day"),
+                "temp_min": day_data.get("temp", {}).get("min"),
+                "temp_max": day_data.get("temp", {}).get("max"),
+                "temp_night": day_data.get("temp", {}).get("night"),
+                "temp_eve": day_data.get("temp", {}).get("eve"),
+                "temp_morn": day_data.get("temp", {}).get("morn"),
+                "feels_like_day": day_data.get("feels_like", {}).get("day"),
+                "feels_like_night": day_data.get("feels_like", {}).get("night"),
+                "feels_like_eve": day_data.get("feels_like", {}).get("eve"),
+                "feels_like_morn": day_data.get("feels_like", {}).get("morn"),
+                "pressure": day_data.get("pressure"),
+                "humidity": day_data.get("humidity"),
+                "dew_point": day_data.get("dew_point"),
+                "uvi": day_data.get("uvi"),
+                "clouds": day_data.get("clouds"),
+                "wind_speed": day_data.get("wind_speed"),
+                "wind_deg": day_data.get("wind_deg"),
+                "wind_gust": day_data.get("wind_gust"),
+                "rain": day_data.get("rain"),
+                "snow": day_data.get("snow"),
+                "weather_condition_id": weather_condition.get("id"),
+                "weather_condition_main": weather_condition.get("main"),
+                "weather_condition_description": weather_condition.get("description"),
+                "weather_condition_icon": weather_condition.get("icon"),
+            }
         )
+    if owm_settings.OWM_CHANGE_DETECTION:
+        return save_forecast_rows(DailyWeather, location, rows)
+    for values in rows:
+        DailyWeather.objects.create(location=location, **values)
+    return None
+
 
+@timed_stage("save_alerts")
+def save_alerts(location: AbstractWeatherLocation, data: dict[str, Any], now: datetime.datetime | None = None) -> None:
+    """Save weather alerts to the database, as seen at ``now`` (by default, the current time).
 
-def save_alerts(location: AbstractWeatherLocation, data: dict[str, Any]) -> None:
-    """Save weather alerts to the database."""
-    WeatherAlert = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    Alerts are identified by their ``signature``, so an alert repeated in every response is stored once: new alerts
+    are inserted and known ones have their ``last_seen`` time updated, with one upsert (or, on databases that cannot
+    upsert on a unique constraint, one query to read the known alerts, one update and one insert). The location's
+    alerts that are missing from the response are marked as cleared.
+    """
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
 
     if not WeatherAlert:
         logger.error("WeatherAlert is not configured.")
         return
 
-    alerts = data.get("alerts", [])
-    if not alerts:
-        return
-
-    for alert in alerts:
+    now = now or timezone.now()
+    rows = {}
+    for alert in data.get("alerts", []):
         start = timezone.datetime.fromtimestamp(alert["start"], tz=datetime.timezone.utc)
         end = timezone.datetime.fromtimestamp(alert["end"], tz=datetime.timezone.utc)
-        WeatherAlert.objects.create(
+        signature = WeatherAlert.build_signature(
+            alert.get("sender_name"), alert.get("event"), start, end, alert.get("description")
+        )
+        rows[signature] = WeatherAlert(
             location=location,
             sender_name=alert.get("sender_name"),
             event=alert.get("event"),
             start=start,
             end=end,
             description=alert.get("description"),
+            tags=alert.get("tags", []),
+            signature=signature,
+            first_seen=now,
+            last_seen=now,
+        )
+
+    connection = connections[router.db_for_write(WeatherAlert)]
+    with transaction.atomic(using=connection.alias):
+        if rows and connection.features.supports_update_conflicts_with_target:
+            WeatherAlert.objects.bulk_create(
+                rows.values(),
+                update_conflicts=True,
+                unique_fields=["location", "signature"],
+                update_fields=ALERT_UPDATE_FIELDS,
+            )
+        elif rows:
+            _update_or_create_alerts(WeatherAlert, location, rows)
+        WeatherAlert.objects.filter(location=location, cleared_at__isnull=True).exclude(signature__in=rows).update(
+            cleared_at=now
         )
 
 
+def _update_or_create_alerts(WeatherAlert: type[Model], location: AbstractWeatherLocation, rows: dict) -> None:
+    """Save alerts keyed by signature without an upsert, for databases such as MySQL and MariaDB.
+
+    These cannot name the unique constraint that an upsert conflicts on, so the stored alerts are read first, then
+    updated with one ``bulk_update``, and the new alerts are added with one ``bulk_create``.
+    """
+    stored = {alert.signature: alert for alert in WeatherAlert.objects.filter(location=location, signature__in=rows)}
+    to_update = []
+    for signature, alert in stored.items():
+        for name in ALERT_UPDATE_FIELDS:
+            setattr(alert, name, getattr(rows[signature], name))
+        to_update.append(alert)
+    WeatherAlert.objects.bulk_update(to_update, ALERT_UPDATE_FIELDS)
+    WeatherAlert.objects.bulk_create([alert for signature, alert in rows.items() if signature not in stored])
+
+
+def refresh_alerts_last_seen(location: AbstractWeatherLocation, now: datetime.datetime | None = None) -> None:
+    """Set the ``last_seen`` time of a location's active alerts to ``now``, for a response repeating the same alerts."""
+    WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+    WeatherAlert.objects.filter(location=location, cleared_at__isnull=True).update(last_seen=now or timezone.now())
+
+
 def save_error_log(
     location: AbstractWeatherLocation,
     api_name: str,
@@ -220,7 +450,7 @@ def save_error_log(
     response_data: dict[str, Any] | None = None,
 ) -> None:
     """Save error log to the database."""
-    WeatherErrorLog = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+    WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
     if not WeatherErrorLog:
         logger.error("WeatherErrorLog is not configured.")
         return
@@ -230,3 +460,101 @@ def save_error_log(
         error_message=error_message,
         response_data=response_data,
     )
+
+
+# Occurrences of an error are added to the existing row for the same error if it was last seen within this window;
+# otherwise a new row is started, so that an error recurring after a quiet period shows up as a separate entry.
+ERROR_AGGREGATION_WINDOW = datetime.timedelta(days=1)
+
+
+@dataclass
+class _AggregatedError:
+    location: AbstractWeatherLocation
+    api_name: str
+    error_message: str
+    response_data: Any
+    occurrences: int
+    first_seen: datetime.datetime
+    last_seen: datetime.datetime
+
+
+class ErrorLogAggregator:
+    """Collect errors during a fetch run and write them as aggregated error logs at the end.
+
+    Errors are grouped by location, API name and error signature. Each group becomes one row, with an occurrence
+    count and first and last seen times; if a row for the same group was seen recently, it is updated instead. All
+    rows are written with one ``bulk_create`` and one ``bulk_update`` when ``flush`` is called.
+    """
+
+    def __init__(self):
+        self.errors: dict[tuple, _AggregatedError] = {}
+
+    def __len__(self):
+        return len(self.errors)
+
+    def add(
+        self,
+        location: AbstractWeatherLocation,
+        api_name: str,
+        error_message: str,
+        response_data: dict[str, Any] | None = None,
+    ) -> None:
+        """Record an error."""
+        WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+        key = (location.pk, api_name, WeatherErrorLog.build_signature(api_name, error_message))
+        now = timezone.now()
+        error = self.errors.get(key)
+        if error is None:
+            self.errors[key] = _AggregatedError(location, api_name, error_message, response_data, 1, now, now)
+        else:
+            error.occurrences += 1
+            error.last_seen = now
+            error.response_data = response_data
+
+    @timed_stage("save_error_logs")
+    def flush(self) -> int:
+        """Write the recorded errors to the database, returning the number of rows written."""
+        WeatherErrorLog = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
+        if not WeatherErrorLog:
+            logger.error("WeatherErrorLog is not configured.")
+            return 0
+        if not self.errors:
+            return 0
+
+        # Find the most recent row for each group that is still within the aggregation window
+        recent_rows = {}
+        candidates = WeatherErrorLog.objects.filter(
+            location_id__in={location_id for location_id, _, _ in self.errors},
+            signature__in={signature for _, _, signature in self.errors},
+            last_seen__gte=timezone.now() - ERROR_AGGREGATION_WINDOW,
+        ).order_by("last_seen")
+        for row in candidates:
+            recent_rows[(row.location_id, row.api_name, row.signature)] = row
+
+        to_create, to_update = [], []
+        for key, error in self.errors.items():
+            row = recent_rows.get(key)
+            if row is None:
+                to_create.append(
+                    WeatherErrorLog(
+                        location=error.location,
+                        api_name=error.api_name,
+                        error_message=error.error_message,
+                        response_data=error.response_data,
+                        signature=key[2],
+                        occurrences=error.occurrences,
+                        first_seen=error.first_seen,
+                        last_seen=error.last_seen,
+                    )
+                )
+            else:
+                row.occurrences += error.occurrences
+                row.last_seen = error.last_seen
+                row.response_data = error.response_data
+                to_update.append(row)
+
+        with transaction.atomic(using=router.db_for_write(WeatherErrorLog)):
+            WeatherErrorLog.objects.bulk_create(to_create)
+            WeatherErrorLog.objects.bulk_update(to_update, ["occurrences", "last_seen", "response_data"])
+        self.errors = {}
+        return len(to_create) + len(to_update)
@@ -0,0 +1,108 @@
+"""Helpers for scheduling weather data refreshes per location.
+
+Each location records when it is next due to be fetched (``next_fetch_at``, indexed), so that a scheduler tick only
+has to look at the locations that are due rather than at every location.
+
+Workers claim due locations by pushing their ``next_fetch_at`` forward by a lease inside a
+``SELECT ... FOR UPDATE SKIP LOCKED`` transaction, so that locations claimed by one worker are no longer due for any
+other. The lease is long enough to fetch every claimed location even if each call times out and is retried. Once
+fetched, a location is rescheduled for its next refresh; if the worker dies first, the lease expires and the location
+becomes due again.
+"""
+
+from __future__ import annotations
+
+import datetime
+import math
+from typing import TYPE_CHECKING
+
+from django.apps import apps
+from django.db import connections
+from django.db import transaction
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from ..app_settings import owm_settings
+from .api import REQUEST_TIMEOUT
+from .api import get_retry_policy
+from .instrumentation import timed_stage
+
+
+if TYPE_CHECKING:
+    from ..models import AbstractWeatherLocation
+
+
+# The shortest time claimed locations are reserved for the worker that claimed them
+MIN_LEASE = datetime.timedelta(minutes=5)
+
+
+def get_refresh_interval(location: AbstractWeatherLocation) -> datetime.timedelta:
+    """Return how often weather data should be fetched for a location."""
+    return location.refresh_interval or owm_settings.OWM_DEFAULT_REFRESH_INTERVAL
+
+
+def due_locations(queryset: QuerySet | None = None, now: datetime.datetime | None = None) -> QuerySet:
+    """Return the locations that are due to be fetched, in the order they should be fetched.
+
+    Locations that have never been fetched are always due. Higher priority locations come first, and locations with
+    the same priority are ordered from the most overdue.
+    """
+    if queryset is None:
+        WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+        queryset = WeatherLocationModel.objects.all()
+    now = now or timezone.now()
+    return queryset.filter(Q(next_fetch_at__isnull=True) | Q(next_fetch_at__lte=now)).order_by(
+        "-priority", F("next_fetch_at").asc(nulls_first=True), "pk"
+    )
+
+
+def get_claim_lease(count: int, workers: int = 1) -> datetime.timedelta:
+    """Return how long to reserve ``count`` locations that are fetched ``workers`` at a time.
+
+    This covers every call timing out and being retried as often as the retry policy allows, and is never shorter
+    than ``MIN_LEASE``.
+    """
+    rounds = math.ceil(count / max(workers, 1))
+    lease = datetime.timedelta(seconds=rounds * get_retry_policy().worst_case_seconds(REQUEST_TIMEOUT))
+    return max(lease, MIN_LEASE)
+
+
+def claim_due_locations(
+    queryset: QuerySet | None = None,
+    limit: int | None = None,
+    lease: datetime.timedelta | None = None,
+    now: datetime.datetime | None = None,
+    workers: int = 1,
+) -> list[AbstractWeatherLocation]:
+    """Claim up to ``limit`` due locations for the calling worker, in the order they should be fetched.
+
+    Rows already locked by another worker's claim are skipped rather than waited for. Claimed locations are not due
+    again until ``lease`` has passed, unless they are rescheduled with ``schedule_next_fetch`` first. By default, the
+    lease lasts as long as fetching the claimed locations ``workers`` at a time can take (see ``get_claim_lease``).
+    """
+    now = now or timezone.now()
+    locations = due_locations(queryset, now)
+    connection = connections[locations.db]
+    with transaction.atomic(using=locations.db):
+        locations = locations.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+        claimed = list(locations[:limit] if limit is not None else locations)
+        if claimed:
+            lease = lease if lease is not None else get_claim_lease(len(claimed), workers)
+            locations.model.objects.filter(pk__in=[location.pk for location in claimed]).update(
+                next_fetch_at=now + lease
+            )
+    return claimed
+
+
+@timed_stage("schedule_next_fetch")
+def schedule_next_fetch(location: AbstractWeatherLocation, now: datetime.datetime | None = None) -> None:
+    """Record that a location was just fetched, and when it is next due."""
+    now = now or timezone.now()
+    location.last_fetched_at = now
+    location.next_fetch_at = now + get_refresh_interval(location)
+    # Update the two columns directly, rather than saving the whole location
+    type(location).objects.filter(pk=location.pk).update(
+        last_fetched_at=location.last_fetched_at, next_fetch_at=location.next_fetch_at
+    )
@@ -0,0 +1,146 @@
+"""Storing One Call API responses as compressed snapshots, and materializing them into the weather tables.
+
+Each response is normally exploded into rows of the current, minutely, hourly, daily and alert models as soon as it is
+fetched (well over a hundred rows per location). With a ``WeatherSnapshot`` model configured in
+``OWM_MODEL_MAPPINGS``, the ``OWM_SNAPSHOT_MODE`` setting changes this:
+
+- ``"off"`` (default): responses are only saved to the weather tables.
+- ``"archive"``: each response is also kept as a snapshot, so that the weather tables can be rebuilt from them.
+- ``"lazy"``: fetching only inserts the snapshot, one row per location. The weather tables become materializations
+  of the snapshots, filled when a location's weather is first read by the views, or by the ``materialize_snapshots``
+  task or the ``materialize_weather_snapshots`` command.
+
+Snapshots are materialized oldest first. Each one is claimed with a conditional update before its rows are saved, so
+a snapshot is materialized once even when several readers or workers come across it at the same time.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+from typing import Any
+
+from django.apps import apps
+from django.db import router
+from django.db import transaction
+from django.db.models import Model
+from django.utils import timezone
+
+from ..app_settings import owm_settings
+from .saving import save_weather_data
+
+
+if TYPE_CHECKING:
+    from ..models import AbstractWeatherLocation
+    from ..models import AbstractWeatherSnapshot
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MODES = ("off", "archive", "lazy")
+
+# Snapshots materialized per query when materializing many locations
+MATERIALIZE_BATCH_SIZE = 100
+
+
+def get_snapshot_model() -> type[Model] | None:
+    """Return the configured WeatherSnapshot model, or None if there is none."""
+    model_string = owm_settings.OWM_MODEL_MAPPINGS.get("WeatherSnapshot")
+    return apps.get_model(model_string) if model_string else None
+
+
+def snapshots_enabled() -> bool:
+    """Return whether fetched responses are stored as snapshots."""
+    return owm_settings.OWM_SNAPSHOT_MODE in ("archive", "lazy") and get_snapshot_model() is not None
+
+
+def lazy_materialization_enabled() -> bool:
+    """Return whether the weather tables are only filled from snapshots when they are read."""
+    return owm_settings.OWM_SNAPSHOT_MODE == "lazy" and get_snapshot_model() is not None
+
+
+def store_weather_data(location: AbstractWeatherLocation, data: dict[str, Any]) -> dict[str, int]:
+    """Store a One Call API response for a location as set by ``OWM_SNAPSHOT_MODE``.
+
+    Returns the number of rows written per model.
+    """
+    if not snapshots_enabled():
+        return save_weather_data(location, data)
+    WeatherSnapshot = get_snapshot_model()
+    if lazy_materialization_enabled():
+        WeatherSnapshot.objects.create(location=location, payload=WeatherSnapshot.compress_payload(data))
+        return {"WeatherSnapshot": 1}
+    with transaction.atomic(using=router.db_for_write(WeatherSnapshot)):
+        rows_by_model = save_weather_data(location, data)
+        WeatherSnapshot.objects.create(
+            location=location, payload=WeatherSnapshot.compress_payload(data), materialized_at=timezone.now()
+        )
+    return {**rows_by_model, "WeatherSnapshot": 1}
+
+
+def materialize_snapshot(snapshot: AbstractWeatherSnapshot) -> bool:
+    """Save a snapshot's response to the weather tables, unless it has been materialized already.
+
+    Returns whether the snapshot was materialized by this call.
+    """
+    WeatherSnapshot = type(snapshot)
+    with transaction.atomic(using=router.db_for_write(WeatherSnapshot)):
+        claimed = WeatherSnapshot.objects.filter(pk=snapshot.pk, materialized_at__isnull=True).update(
+            materialized_at=timezone.now()
+        )
+        if not claimed:
+            return False
+        # Alerts are recorded as seen when the response was fetched, not when it is materialized
+        save_weather_data(snapshot.location, snapshot.data, fetched_at=snapshot.fetched_at)
+    return True
+
+
+def materialize_snapshots(snapshots: Iterable[AbstractWeatherSnapshot]) -> int:
+    """Materialize snapshots in the order given, returning the number materialized by this call."""
+    return sum(materialize_snapshot(snapshot) for snapshot in snapshots)
+
+
+def materialize_location(location: AbstractWeatherLocation) -> int:
+    """Materialize a location's pending snapshots, oldest first, returning the number materialized."""
+    WeatherSnapshot = get_snapshot_model()
+    if WeatherSnapshot is None:
+        return 0
+    pending = WeatherSnapshot.objects.filter(location=location, materialized_at__isnull=True).order_by("fetched_at")
+    snapshots = list(pending)
+    for snapshot in snapshots:
+        # Reuse the location that was passed in, so that it is not fetched again for each snapshot
+        snapshot.location = location
+    return materialize_snapshots(snapshots)
+
+
+def materialize_pending(limit: int | None = None, location_ids: Iterable | None = None, replay: bool = False) -> int:
+    """Materialize pending snapshots of every location (or of ``location_ids``), oldest first.
+
+    With ``replay``, snapshots that were materialized before are materialized again; use it to rebuild the weather
+    tables after emptying them. The block hashes of the locations are cleared too, so that ``OWM_CHANGE_DETECTION``
+    does not skip any block. Returns the number of snapshots materialized, at most ``limit``.
+    """
+    WeatherSnapshot = get_snapshot_model()
+    if WeatherSnapshot is None:
+        logger.error("WeatherSnapshot is not configured.")
+        return 0
+    snapshots = WeatherSnapshot.objects.select_related("location").order_by("fetched_at", "pk")
+    if location_ids is not None:
+        location_ids = list(location_ids)
+        snapshots = snapshots.filter(location__in=location_ids)
+    if replay:
+        snapshots.update(materialized_at=None)
+        WeatherLocation = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS["WeatherLocation"])
+        locations = WeatherLocation.objects.all()
+        if location_ids is not None:
+            locations = locations.filter(pk__in=location_ids)
+        locations.update(block_hashes={})
+    materialized = 0
+    while limit is None or materialized < limit:
+        batch_size = MATERIALIZE_BATCH_SIZE if limit is None else min(MATERIALIZE_BATCH_SIZE, limit - materialized)
+        batch = list(snapshots.filter(materialized_at__isnull=True)[:batch_size])
+        if not batch:
+            break
+        materialized += materialize_snapshots(batch)
+    return materialized
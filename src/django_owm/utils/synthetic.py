@@ -0,0 +1,335 @@
+"""Generation of synthetic weather data, for testing and benchmarking at production scale.
+
+``SyntheticWeatherGenerator`` creates locations and a history of hourly current weather, hourly and daily
+forecasts, minutely precipitation, alerts and API call logs for them. Values follow daily and seasonal temperature
+cycles, a random walk for pressure and spells of rain, so that the data looks like real weather to queries and
+charts. Each location's history comes from its own random generator seeded from ``seed``, so the same arguments
+always produce the same data. Locations are created with ``bulk_create``; weather rows are streamed to the database
+in batches with ``executemany``, so memory use does not depend on the number of rows.
+"""
+
+from __future__ import annotations
+
+import datetime
+import math
+import random
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from django.apps import apps
+from django.db import connections
+from django.db import models
+from django.db import router
+from django.db import transaction
+from django.utils import timezone
+
+from ..app_settings import owm_settings
+
+
+# Weather conditions by (is raining, cloud cover at least this much), checked in order
+_CONDITIONS = (
+    (True, 80, (502, "Rain", "heavy intensity rain", "10d")),
+    (True, 0, (500, "Rain", "light rain", "10d")),
+    (False, 85, (804, "Clouds", "overcast clouds", "04d")),
+    (False, 50, (803, "Clouds", "broken clouds", "04d")),
+    (False, 20, (801, "Clouds", "few clouds", "02d")),
+    (False, 0, (800, "Clear", "clear sky", "01d")),
+)
+
+_ALERT_EVENTS = ("Heat Advisory", "Wind Advisory", "Flood Watch", "Frost Advisory", "Dense Fog Advisory")
+
+# Chance of an alert starting on any given day for a location
+ALERT_PROBABILITY = 0.03
+
+MODEL_NAMES = ("CurrentWeather", "HourlyWeather", "DailyWeather", "MinutelyWeather", "WeatherAlert", "APICallLog")
+
+# Fields whose values the database driver takes as they are
+_PLAIN_FIELDS = (models.IntegerField, models.DecimalField, models.FloatField, models.CharField, models.TextField)
+
+
+class _RowWriter:
+    """Insert rows of one model in batches with ``executemany``, without building model instances.
+
+    ``bulk_create`` prepares every value of every instance through its field, which limits it to a few tens of
+    thousands of rows per second. Here each column gets a cheap adapter, chosen once: numbers and text are passed to
+    the database driver as they are, and only datetimes (and any other field types) are converted. Values are used
+    as given, so ``auto_now_add`` timestamps are not overwritten and foreign keys are given as primary keys. Missing
+    values take the field's default.
+    """
+
+    def __init__(self, model, batch_size: int):
+        self.batch_size = batch_size
+        self.connection = connections[router.db_for_write(model)]
+        self.fields = [field for field in model._meta.concrete_fields if field is not model._meta.auto_field]
+        self.adapters = [self._adapter(field) for field in self.fields]
+        quote_name = self.connection.ops.quote_name
+        self.sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote_name(model._meta.db_table),
+            ", ".join(quote_name(field.column) for field in self.fields),
+            ", ".join(["%s"] * len(self.fields)),
+        )
+        self.rows = []
+        self.count = 0
+
+    def _adapter(self, field) -> Callable[[Any], Any] | None:
+        """Return the function that converts a field's values for the database, or None to pass them as they are."""
+        if field.is_relation:
+            return self._adapter(field.target_field)
+        if isinstance(field, models.DateTimeField):
+            return self.connection.ops.adapt_datetimefield_value
+        if isinstance(field, _PLAIN_FIELDS):
+            return None
+        return lambda value: field.get_db_prep_save(value, self.connection)
+
+    def add(self, values: dict[str, Any]) -> None:
+        """Add a row, writing the batch once it is full."""
+        row = []
+        for field, adapter in zip(self.fields, self.adapters):
+            value = values[field.name] if field.name in values else field.get_default()
+            row.append(value if adapter is None or value is None else adapter(value))
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.write()
+
+    def write(self) -> None:
+        """Insert the buffered rows in one transaction."""
+        if not self.rows:
+            return
+        with transaction.atomic(using=self.connection.alias), self.connection.cursor() as cursor:
+            cursor.executemany(self.sql, self.rows)
+        self.count += len(self.rows)
+        self.rows = []
+
+
+class _LocationWeather:
+    """The evolving weather at one location, advanced one hour at a time."""
+
+    def __init__(self, latitude: float, longitude: float, rng: random.Random):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.rng = rng
+        # Colder towards the poles, with stronger seasons
+        self.mean_temp = 300.0 - 0.45 * abs(latitude)
+        self.seasonal_amplitude = 0.25 * abs(latitude)
+        self.pressure = rng.gauss(1013, 6)
+        self.clouds = rng.uniform(0, 100)
+        self.raining = False
+
+    def step(self, timestamp: datetime.datetime) -> dict[str, Any]:
+        """Advance to ``timestamp`` and return the measurements for that hour."""
+        rng = self.rng
+        self.pressure = min(max(self.pressure + rng.gauss(0, 0.8) + (1013 - self.pressure) * 0.02, 960), 1050)
+        self.clouds = min(max(self.clouds + rng.gauss(0, 8), 0), 100)
+        # Rain lasts a few hours once it starts, and is more likely to start under cloud and low pressure
+        rain_chance = 0.85 if self.raining else 0.02 + self.clouds / 2500 + max(1005 - self.pressure, 0) / 400
+        self.raining = rng.random() < rain_chance
+
+        temp = self.temperature(timestamp) - self.clouds / 40 + rng.gauss(0, 0.8)
+        humidity = min(max(int(55 + self.clouds / 4 + (25 if self.raining else 0) + rng.gauss(0, 5)), 5), 100)
+        wind_speed = abs(rng.gauss(3 + max(1013 - self.pressure, 0) / 4, 1.5))
+        rain = round(rng.expovariate(1 / 1.5), 2) if self.raining else None
+        return {
+            "temp": round(temp, 2),
+            "feels_like": round(temp - wind_speed * 0.7, 2),
+            "pressure": round(self.pressure),
+            "humidity": humidity,
+            "dew_point": round(temp - (100 - humidity) / 5, 2),
+            "clouds": round(self.clouds),
+            "visibility": 10000 if not self.raining else rng.randrange(2000, 10000, 500),
+            "wind_speed": round(wind_speed, 2),
+            "wind_deg": rng.randrange(360),
+            "wind_gust": round(wind_speed * rng.uniform(1.2, 1.8), 2),
+            "rain_1h": rain if rain is None or temp > 274 else None,
+            "snow_1h": rain if rain is not None and temp <= 274 else None,
+            **self.condition(),
+        }
+
+    def temperature(self, timestamp: datetime.datetime) -> float:
+        """Return the expected temperature at a time from the daily and seasonal cycles, in Kelvin."""
+        day_of_year = timestamp.timetuple().tm_yday
+        # Seasons are reversed in the southern hemisphere; the warmest day is in late July in the north
+        season = math.cos(2 * math.pi * (day_of_year - 200) / 365) * (1 if self.latitude >= 0 else -1)
+        local_hour = (timestamp.hour + timestamp.minute / 60 + self.longitude / 15) % 24
+        # Warmest around 3 pm local solar time
+        daily = math.cos(2 * math.pi * (local_hour - 15) / 24)
+        return self.mean_temp + self.seasonal_amplitude * season + 5 * daily
+
+    def condition(self) -> dict[str, Any]:
+        """Return the weather condition fields for the current state."""
+        for raining, clouds, condition in _CONDITIONS:
+            if raining == self.raining and self.clouds >= clouds:
+                break
+        condition_id, main, description, icon = condition
+        return {
+            "weather_condition_id": condition_id,
+            "weather_condition_main": main,
+            "weather_condition_description": description,
+            "weather_condition_icon": icon,
+        }
+
+
+@dataclass
+class SyntheticWeatherGenerator:
+    """Create ``locations`` locations, each with ``days`` days of weather history up to ``end``.
+
+    Per location and day, this creates 24 current weather rows (one per hourly fetch), 24 hourly and 1 daily forecast
+    rows, 1,440 minutely rows unless ``minutely`` is False, 24 API call logs and occasionally an alert.
+    """
+
+    locations: int
+    days: int
+    seed: int = 0
+    end: datetime.datetime | None = None
+    batch_size: int = 10_000
+    minutely: bool = True
+
+    def __post_init__(self):
+        self.writers = {
+            name: _RowWriter(apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get(name)), self.batch_size)
+            for name in MODEL_NAMES
+        }
+        self.counts = {"WeatherLocation": 0, **{name: 0 for name in MODEL_NAMES}}
+        if self.end is None:
+            self.end = timezone.now()
+        self.end = self.end.replace(minute=0, second=0, microsecond=0)
+
+    def run(self, progress: Callable[[int, dict[str, int]], None] | None = None) -> dict[str, int]:
+        """Create every location and its history, returning the number of rows created per model.
+
+        ``progress`` is called with the number of locations done and the counts so far after each location.
+        """
+        for index, location in enumerate(self.create_locations(), start=1):
+            self.add_history(location, f"{self.seed}-{index}")
+            if progress:
+                self.flush()
+                progress(index, dict(self.counts))
+        self.flush()
+        return dict(self.counts)
+
+    def create_locations(self) -> list:
+        """Create the locations, spread over the inhabited latitudes."""
+        WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+        rng = random.Random(self.seed)  # noqa: S311
+        locations = [
+            WeatherLocationModel(
+                name=f"Synthetic location {self.seed}-{index}",
+                latitude=round(rng.uniform(-55, 65), 2),
+                longitude=round(rng.uniform(-180, 180), 2),
+                timezone="UTC",
+                timezone_offset=0,
+            )
+            for index in range(1, self.locations + 1)
+        ]
+        created = WeatherLocationModel.objects.bulk_create(locations, batch_size=self.batch_size)
+        if created and created[0].pk is None:
+            # Databases that cannot return primary keys from bulk inserts
+            names = [location.name for location in locations]
+            created = list(WeatherLocationModel.objects.filter(name__in=names).order_by("pk"))
+        self.counts["WeatherLocation"] += len(created)
+        return created
+
+    def add_history(self, location, seed: str) -> None:
+        """Add every row of a location's history to the buffers."""
+        rng = random.Random(seed)  # noqa: S311
+        # Minutely data has its own generator, so that leaving it out does not change the other data
+        minutely_rng = random.Random(f"{seed}-minutely")  # noqa: S311
+        weather = _LocationWeather(float(location.latitude), float(location.longitude), rng)
+        hours = self.days * 24
+        start = self.end - datetime.timedelta(hours=hours - 1)
+        for hour in range(hours):
+            timestamp = start + datetime.timedelta(hours=hour)
+            measurements = weather.step(timestamp)
+            self.add("CurrentWeather", location=location.pk, timestamp=timestamp, **measurements)
+            self.add(
+                "HourlyWeather",
+                location=location.pk,
+                timestamp=timestamp,
+                pop=round(min(measurements["clouds"] / 100 * rng.random(), 1), 2),
+                **measurements,
+            )
+            fetched_at = timestamp + datetime.timedelta(seconds=rng.uniform(0, 60))
+            self.add("APICallLog", api_name="one_call", timestamp=fetched_at)
+            if self.minutely:
+                self.add_minutely(location, timestamp, measurements["rain_1h"] or measurements["snow_1h"], minutely_rng)
+            if timestamp.hour == 12:
+                self.add_daily(location, timestamp, weather, measurements, rng)
+            if timestamp.hour == 0 and rng.random() < ALERT_PROBABILITY:
+                self.add_alert(location, timestamp, rng)
+
+    def add_minutely(self, location, timestamp: datetime.datetime, rain: float | None, rng: random.Random) -> None:
+        """Add the minutely precipitation rows for an hour."""
+        writer = self.writers["MinutelyWeather"]
+        for minute in range(60):
+            writer.add(
+                {
+                    "location": location.pk,
+                    "timestamp": timestamp + datetime.timedelta(minutes=minute),
+                    "precipitation": round(max(rng.gauss(rain / 60, rain / 120), 0), 2) if rain else 0,
+                }
+            )
+
+    def add_daily(self, location, timestamp, weather: _LocationWeather, measurements, rng: random.Random) -> None:
+        """Add the daily forecast row for a day, with the temperatures of its parts taken from the daily cycle."""
+        midnight = timestamp.replace(hour=0)
+        temps = {
+            part: round(weather.temperature(midnight + datetime.timedelta(hours=hour)) + rng.gauss(0, 0.5), 2)
+            for part, hour in (("morn", 9), ("day", 15), ("eve", 19), ("night", 3))
+        }
+        # Sunrise and sunset around 6 am and 6 pm local solar time
+        solar_noon = midnight + datetime.timedelta(hours=12 - float(location.longitude) / 15)
+        self.add(
+            "DailyWeather",
+            location=location.pk,
+            timestamp=timestamp,
+            pressure=measurements["pressure"],
+            humidity=measurements["humidity"],
+            dew_point=measurements["dew_point"],
+            clouds=measurements["clouds"],
+            wind_speed=measurements["wind_speed"],
+            wind_deg=measurements["wind_deg"],
+            wind_gust=measurements["wind_gust"],
+            sunrise=solar_noon - datetime.timedelta(hours=6),
+            sunset=solar_noon + datetime.timedelta(hours=6),
+            moon_phase=round((timestamp.timetuple().tm_yday % 29.5) / 29.5, 2),
+            temp_min=min(temps.values()),
+            temp_max=max(temps.values()),
+            pop=round(rng.random(), 2),
+            rain=measurements["rain_1h"],
+            snow=measurements["snow_1h"],
+            **{f"temp_{part}": temp for part, temp in temps.items()},
+            **{f"feels_like_{part}": round(temp - 1, 2) for part, temp in temps.items()},
+            **weather.condition(),
+        )
+
+    def add_alert(self, location, timestamp: datetime.datetime, rng: random.Random) -> None:
+        """Add an alert starting during a day."""
+        start = timestamp + datetime.timedelta(hours=rng.randrange(24))
+        end = start + datetime.timedelta(hours=rng.randrange(6, 48))
+        event = rng.choice(_ALERT_EVENTS)
+        sender_name = "Synthetic Weather Service"
+        description = f"{event} in effect for {location.name}."
+        WeatherAlert = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherAlert"))
+        self.add(
+            "WeatherAlert",
+            location=location.pk,
+            sender_name=sender_name,
+            event=event,
+            start=start,
+            end=end,
+            description=description,
+            tags=[event.split()[0]],
+            signature=WeatherAlert.build_signature(sender_name, event, start, end, description),
+            first_seen=timestamp,
+            last_seen=min(end, self.end),
+        )
+
+    def add(self, model_name: str, **values: Any) -> None:
+        """Add a row for a model."""
+        self.writers[model_name].add(values)
+
+    def flush(self) -> None:
+        """Write every buffered row and update the counts."""
+        for model_name, writer in self.writers.items():
+            writer.write()
+            self.counts[model_name] = writer.count
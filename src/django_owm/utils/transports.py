@@ -0,0 +1,242 @@
+"""Pluggable transports for making OpenWeatherMap API requests.
+
+A transport has a ``get(url, timeout)`` method returning a response with ``status_code``, ``headers``, ``text`` and
+``json()``, and raising ``requests.RequestException`` for network errors, like ``requests.get``. The transport is
+chosen with the ``OWM_API_TRANSPORT`` setting::
+
+    DJANGO_OWM = {
+        "OWM_API_TRANSPORT": {
+            "BACKEND": "django_owm.utils.transports.ReplayTransport",
+            "OPTIONS": {"latency": 0.2, "error_rate": 0.01},
+        },
+    }
+
+``ReplayTransport`` serves recorded One Call API responses without any network access, with optional synthetic
+latency and errors, for load tests and benchmarks. ``StubServer`` serves the same responses over HTTP, for
+end-to-end tests of the real HTTP transport.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from functools import cache
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+import requests
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from ..app_settings import owm_settings
+
+
+RECORDED_RESPONSES_DIR = Path(__file__).resolve().parent.parent / "data" / "onecall"
+
+# Keys of the One Call API response holding Unix timestamps, which are shifted when replaying responses
+_TIMESTAMP_KEYS = ("dt", "sunrise", "sunset", "moonrise", "moonset", "start", "end")
+
+
+class RequestsTransport:
+    """Make requests over the network with ``requests``. This is the default transport."""
+
+    def get(self, url: str, timeout: float):
+        """Send a GET request."""
+        return requests.get(url, timeout=timeout)
+
+
+class ReplayResponse:
+    """A response served by ``ReplayTransport``, with the parts of ``requests.Response`` the app uses."""
+
+    def __init__(self, status_code: int, data: dict[str, Any], headers: dict[str, str] | None = None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+
+    @property
+    def text(self) -> str:
+        """Return the body as text."""
+        return json.dumps(self.data)
+
+    def json(self) -> dict[str, Any]:
+        """Return the body as JSON."""
+        return self.data
+
+
+def load_recorded_responses(directory: str | Path = RECORDED_RESPONSES_DIR) -> list[dict[str, Any]]:
+    """Load every recorded One Call API response (``*.json``) in a directory, in name order."""
+    paths = sorted(Path(directory).glob("*.json"))
+    if not paths:
+        raise ValueError(f"No recorded responses (*.json) found in {directory}.")
+    return [json.loads(path.read_text()) for path in paths]
+
+
+def _shift_timestamps(value: Any, offset: int) -> Any:
+    """Return a copy of a response with every timestamp shifted by ``offset`` seconds."""
+    if isinstance(value, dict):
+        return {
+            key: (
+                item + offset if key in _TIMESTAMP_KEYS and isinstance(item, int) else _shift_timestamps(item, offset)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_shift_timestamps(item, offset) for item in value]
+    return value
+
+
+class ReplayTransport:
+    """Serve recorded One Call API responses, with synthetic latency and errors.
+
+    Each location is always served the same recorded response, chosen from its coordinates, with ``lat`` and ``lon``
+    set to the requested point. With ``rebase_timestamps``, timestamps are shifted so that the response's current
+    weather is from the time of the request. A fraction ``error_rate`` of requests fail with one of
+    ``error_statuses``; a status of ``0`` raises a connection error instead. Pass ``seed`` for reproducible errors and
+    latencies.
+    """
+
+    def __init__(
+        self,
+        responses_dir: str | Path = RECORDED_RESPONSES_DIR,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_statuses: tuple[int, ...] = (500, 502, 503, 429),
+        rebase_timestamps: bool = True,
+        seed: int | None = None,
+    ):
+        self.responses = load_recorded_responses(responses_dir)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.rebase_timestamps = rebase_timestamps
+        self.random = random.Random(seed)  # noqa: S311
+        self.lock = threading.Lock()
+
+    def get(self, url: str, timeout: float) -> ReplayResponse:
+        """Serve the recorded response for the coordinates in the request URL."""
+        with self.lock:
+            delay = self.latency + self.random.uniform(-self.latency_jitter, self.latency_jitter)
+            fails = self.random.random() < self.error_rate
+            error_status = self.random.choice(self.error_statuses) if fails else None
+        delay = min(max(delay, 0.0), timeout)
+        if delay:
+            time.sleep(delay)
+
+        if error_status == 0:
+            raise requests.ConnectionError(f"Synthetic connection error for {url}")
+        if error_status is not None:
+            headers = {"Retry-After": "1"} if error_status == 429 else {}
+            return ReplayResponse(error_status, {"cod": error_status, "message": "Synthetic error"}, headers)
+
+        query = parse_qs(urlsplit(url).query)
+        try:
+            lat, lon = float(query["lat"][0]), float(query["lon"][0])
+        except (KeyError, ValueError):
+            return ReplayResponse(400, {"cod": "400", "message": "wrong latitude or longitude"})
+        return ReplayResponse(200, self.response_for(lat, lon))
+
+    def response_for(self, lat: float, lon: float) -> dict[str, Any]:
+        """Return the recorded response served for a point."""
+        recorded = self.responses[hash((round(lat, 2), round(lon, 2))) % len(self.responses)]
+        offset = int(time.time()) - recorded["current"]["dt"] if self.rebase_timestamps else 0
+        data = _shift_timestamps(recorded, offset)
+        data["lat"], data["lon"] = lat, lon
+        return data
+
+
+@cache
+def get_transport():
+    """Return the transport configured with the ``OWM_API_TRANSPORT`` setting."""
+    if not owm_settings.OWM_API_TRANSPORT:
+        return RequestsTransport()
+    transport_class = import_string(owm_settings.OWM_API_TRANSPORT["BACKEND"])
+    return transport_class(**owm_settings.OWM_API_TRANSPORT.get("OPTIONS", {}))
+
+
+@receiver(setting_changed)
+def reset_transport(*, setting: str, **kwargs) -> None:  # pylint: disable=W0613
+    """Discard the cached transport when ``DJANGO_OWM`` changes, so that the next call uses the new setting."""
+    if setting == "DJANGO_OWM":
+        get_transport.cache_clear()
+
+
+class StubServer:
+    """A local HTTP server that answers One Call API requests using a transport, by default a ``ReplayTransport``.
+
+    Point ``OWM_API_BASE_URL`` at ``url`` to exercise the real HTTP transport without network access. Use it as a
+    context manager to run it in a background thread, or call ``serve_forever`` to run it in the foreground.
+    """
+
+    path = "/data/3.0/onecall"
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, transport: Any = None):
+        self.transport = transport or ReplayTransport()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        """Return the URL to use as ``OWM_API_BASE_URL``."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                if urlsplit(self.path).path != stub.path:
+                    response = ReplayResponse(404, {"cod": "404", "message": "Not found"})
+                else:
+                    try:
+                        response = stub.transport.get(self.path, timeout=30)
+                    except requests.RequestException:
+                        # Simulate a dropped connection
+                        self.close_connection = True
+                        return
+                body = response.text.encode()
+                self.send_response(response.status_code)
+                for name, value in response.headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # noqa: A002
+                pass
+
+        return Handler
+
+    def serve_forever(self) -> None:
+        """Serve requests until interrupted."""
+        self.server.serve_forever()
+
+    def start(self) -> StubServer:
+        """Start serving requests in a background thread."""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and close its socket."""
+        if self.thread is not None:
+            self.server.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.server.server_close()
+
+    def __enter__(self) -> StubServer:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
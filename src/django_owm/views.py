@@ -1,36 +1,128 @@
-"""Views for the django_owm app."""
+"""Views for the django_owm app.
+
+The read-only weather views are async so that, under ASGI, they do not tie up a worker thread per request. Data is
+fetched with Django's async ORM API (see ``utils.queries``) and fully materialized before rendering, since template
+rendering is synchronous.
+"""
 
 import logging
 import uuid
 
 from django.apps import apps
-from django.core.paginator import Paginator
-from django.shortcuts import get_object_or_404
+from django.db.models import Max
+from django.db.models import Min
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.shortcuts import render
+from django.urls import reverse
 from django.utils import timezone
 
-from .app_settings import OWM_MODEL_MAPPINGS
-from .app_settings import OWM_SHOW_MAP
-from .app_settings import OWM_USE_UUID
+from .app_settings import owm_settings
 from .forms import WeatherLocationForm
+from .utils.exposition import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .utils.exposition import render_metrics
+from .utils.geo import CLUSTER_MAX_ZOOM
+from .utils.geo import MAX_UNCLUSTERED_POINTS
+from .utils.geo import cluster_locations
+from .utils.geo import filter_bbox
+from .utils.geo import parse_bbox
+from .utils.geo import parse_zoom
+from .utils.queries import aget_dashboard
+from .utils.queries import aget_location
+from .utils.queries import aget_page
+from .utils.queries import alerts_queryset
+from .utils.queries import alist
+from .utils.queries import current_weather_queryset
+from .utils.queries import daily_forecast_queryset
+from .utils.queries import errors_queryset
+from .utils.queries import get_location
+from .utils.queries import hourly_forecast_queryset
 
 
 logger = logging.getLogger(__name__)
 
+LOCATIONS_PAGE_SIZE = 50
+
+
+async def list_locations(request):
+    """View to display a paginated list of weather locations with an optional map.
 
-def list_locations(request):
-    """View to display a list of all weather locations with an optional map."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    locations = WeatherLocationModel.objects.all()
-    show_map = OWM_SHOW_MAP
+    The map does not embed the locations; it loads them for the visible area from ``locations_geojson``.
+    """
+    WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+    locations = await aget_page(
+        WeatherLocationModel.objects.order_by("pk"), request.GET.get("page", 1), per_page=LOCATIONS_PAGE_SIZE
+    )
+    show_map = owm_settings.OWM_SHOW_MAP
+    map_bounds = None
+    if show_map and locations.paginator.count:
+        map_bounds = await WeatherLocationModel.objects.aaggregate(
+            south=Min("latitude"), west=Min("longitude"), north=Max("latitude"), east=Max("longitude")
+        )
     context = {
         "locations": locations,
         "show_map": show_map,
+        "map_bounds": map_bounds,
     }
     return render(request, "django_owm/list_locations.html", context)
 
 
+async def locations_geojson(request):
+    """Return the weather locations inside a bounding box as a GeoJSON FeatureCollection.
+
+    Expects ``bbox=west,south,east,north`` and ``zoom`` query parameters. When the box holds many locations and the
+    zoom level is low, locations are bucketed into grid cells in the database and each cell is returned as a single
+    cluster point, so the response size depends on the visible area rather than on the number of locations.
+    """
+    WeatherLocationModel = apps.get_model(owm_settings.OWM_MODEL_MAPPINGS.get("WeatherLocation"))
+
+    try:
+        west, south, east, north = parse_bbox(request.GET.get("bbox"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    zoom = parse_zoom(request.GET.get("zoom"))
+
+    locations = filter_bbox(WeatherLocationModel.objects.all(), west, south, east, north)
+
+    features = []
+    if zoom > CLUSTER_MAX_ZOOM or await locations.acount() <= MAX_UNCLUSTERED_POINTS:
+        async for location in locations.only("pk", "name", "latitude", "longitude")[:MAX_UNCLUSTERED_POINTS]:
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [float(location.longitude), float(location.latitude)]},
+                    "properties": {
+                        "cluster": False,
+                        "name": str(location),
+                        "url": reverse("django_owm:weather_detail", args=[location.pk]),
+                    },
+                }
+            )
+    else:
+        async for cell in cluster_locations(locations, zoom):
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [cell["center_longitude"], cell["center_latitude"]]},
+                    "properties": {"cluster": True, "count": cell["count"]},
+                }
+            )
+
+    return JsonResponse({"type": "FeatureCollection", "features": features})
+
+
+def metrics(request):
+    """Serve the app's metrics in the Prometheus text exposition format, if ``OWM_ENABLE_METRICS_VIEW`` is on.
+
+    The metrics include location and API usage counts, so restrict access to this URL to your metrics scraper.
+    """
+    if not owm_settings.OWM_ENABLE_METRICS_VIEW:
+        raise Http404("The metrics view is not enabled.")
+    return HttpResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
 def create_location(request):
     """View to create a new weather location."""
     if request.method == "POST":
@@ -48,12 +140,7 @@ def create_location(request):
 
 def delete_location(request, location_id: int | uuid.UUID):
     """View to delete a weather location."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
+    location = get_location(location_id)
 
     if request.method == "POST":
         location.delete()
@@ -67,12 +154,7 @@ def delete_location(request, location_id: int | uuid.UUID):
 
 def update_location(request, location_id: int | uuid.UUID):
     """View to update a weather location."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
+    location = get_location(location_id)
 
     if request.method == "POST":
         form = WeatherLocationForm(request.POST, instance=location)
@@ -88,39 +170,26 @@ def update_location(request, location_id: int | uuid.UUID):
     return render(request, "django_owm/update_location.html", context)
 
 
-def weather_detail(request, location_id: int | uuid.UUID):
+async def weather_detail(request, location_id: int | uuid.UUID):
     """View to display the weather details for a location."""
-    model_mappings = OWM_MODEL_MAPPINGS
-    WeatherLocationModel = apps.get_model(model_mappings.get("WeatherLocation"))
-    CurrentWeatherModel = apps.get_model(model_mappings.get("CurrentWeather"))
+    location = await aget_location(location_id)
 
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
-
-    current_weather = CurrentWeatherModel.objects.filter(location=location).order_by("-timestamp").first()
+    current_weather = await current_weather_queryset(location).afirst()
 
     context = {
         "location": location,
         "current_weather": current_weather,
-        "show_map": OWM_SHOW_MAP,
+        "show_map": owm_settings.OWM_SHOW_MAP,
     }
 
     return render(request, "django_owm/weather_detail.html", context)
 
 
-def weather_history(request, location_id: int | uuid.UUID):
+async def weather_history(request, location_id: int | uuid.UUID):
     """View to display historical weather data for a location."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    CurrentWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
-
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
+    location = await aget_location(location_id)
 
-    historical_weather = CurrentWeatherModel.objects.filter(location=location).order_by("-timestamp")
+    historical_weather = await alist(current_weather_queryset(location))
 
     context = {
         "location": location,
@@ -130,23 +199,13 @@ def weather_history(request, location_id: int | uuid.UUID):
     return render(request, "django_owm/weather_history.html", context)
 
 
-def weather_forecast(request, location_id: int | uuid.UUID):
+async def weather_forecast(request, location_id: int | uuid.UUID):
     """View to display weather forecast for a location."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    HourlyWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("HourlyWeather"))
-    DailyWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("DailyWeather"))
-
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
+    location = await aget_location(location_id)
 
-    hourly_forecast = HourlyWeatherModel.objects.filter(location=location, timestamp__gte=timezone.now()).order_by(
-        "timestamp"
-    )
-    daily_forecast = DailyWeatherModel.objects.filter(location=location, timestamp__gte=timezone.now()).order_by(
-        "timestamp"
-    )
+    now = timezone.now()
+    hourly_forecast = await alist(hourly_forecast_queryset(location, now))
+    daily_forecast = await alist(daily_forecast_queryset(location, now))
 
     context = {
         "location": location,
@@ -157,17 +216,11 @@ def weather_forecast(request, location_id: int | uuid.UUID):
     return render(request, "django_owm/weather_forecast.html", context)
 
 
-def weather_alerts(request, location_id: int | uuid.UUID):
+async def weather_alerts(request, location_id: int | uuid.UUID):
     """View to display weather alerts for a location."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    WeatherAlertModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherAlert"))
-
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
+    location = await aget_location(location_id)
 
-    alerts = WeatherAlertModel.objects.filter(location=location, end__gte=timezone.now()).order_by("start")
+    alerts = await alist(alerts_queryset(location))
 
     context = {
         "location": location,
@@ -177,17 +230,11 @@ def weather_alerts(request, location_id: int | uuid.UUID):
     return render(request, "django_owm/weather_alerts.html", context)
 
 
-def weather_errors(request, location_id: int | uuid.UUID):
+async def weather_errors(request, location_id: int | uuid.UUID):
     """View to display weather errors for a location."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    WeatherErrorLogModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
-
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
+    location = await aget_location(location_id)
 
-    errors = WeatherErrorLogModel.objects.filter(location=location).order_by("-timestamp")
+    errors = await alist(errors_queryset(location))
 
     context = {
         "location": location,
@@ -197,20 +244,11 @@ def weather_errors(request, location_id: int | uuid.UUID):
     return render(request, "django_owm/weather_errors.html", context)
 
 
-def weather_history_partial(request, location_id: int | uuid.UUID):
+async def weather_history_partial(request, location_id: int | uuid.UUID):
     """Partial view to display historical weather data for a location inside weather_detail.html."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    CurrentWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("CurrentWeather"))
+    location = await aget_location(location_id)
 
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
-
-    historical_weather = CurrentWeatherModel.objects.filter(location=location).order_by("-timestamp")
-    paginator = Paginator(historical_weather, 5)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+    page_obj = await aget_page(current_weather_queryset(location), request.GET.get("page", 1))
 
     context = {
         "location": location,
@@ -220,32 +258,14 @@ def weather_history_partial(request, location_id: int | uuid.UUID):
     return render(request, "django_owm/partials/weather_history.html", context)
 
 
-def weather_forecast_partial(request, location_id: int | uuid.UUID):
+async def weather_forecast_partial(request, location_id: int | uuid.UUID):
     """Partial view to display weather forecast for a location inside weather_detail.html."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    HourlyWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("HourlyWeather"))
-    DailyWeatherModel = apps.get_model(OWM_MODEL_MAPPINGS.get("DailyWeather"))
-
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
-
-    hourly_forecast = HourlyWeatherModel.objects.filter(location=location, timestamp__gte=timezone.now()).order_by(
-        "timestamp"
-    )
-    daily_forecast = DailyWeatherModel.objects.filter(location=location, timestamp__gte=timezone.now()).order_by(
-        "timestamp"
-    )
-
-    hourly_paginator = Paginator(hourly_forecast, 5)
-    daily_paginator = Paginator(daily_forecast, 5)
+    location = await aget_location(location_id)
 
-    hourly_page = request.GET.get("hourly_page", 1)
-    daily_page = request.GET.get("daily_page", 1)
+    now = timezone.now()
 
-    hourly_page_obj = hourly_paginator.get_page(hourly_page)
-    daily_page_obj = daily_paginator.get_page(daily_page)
+    hourly_page_obj = await aget_page(hourly_forecast_queryset(location, now), request.GET.get("hourly_page", 1))
+    daily_page_obj = await aget_page(daily_forecast_queryset(location, now), request.GET.get("daily_page", 1))
 
     context = {
         "location": location,
@@ -256,20 +276,11 @@ def weather_forecast_partial(request, location_id: int | uuid.UUID):
     return render(request, "django_owm/partials/weather_forecast.html", context)
 
 
-def weather_alerts_partial(request, location_id: int | uuid.UUID):
+async def weather_alerts_partial(request, location_id: int | uuid.UUID):
     """Partial view to display weather alerts for a location inside weather_detail.html."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    WeatherAlertModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherAlert"))
-
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
+    location = await aget_location(location_id)
 
-    alerts = WeatherAlertModel.objects.filter(location=location, end__gte=timezone.now()).order_by("start")
-    paginator = Paginator(alerts, 5)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+    page_obj = await aget_page(alerts_queryset(location), request.GET.get("page", 1))
 
     context = {
         "location": location,
@@ -279,20 +290,11 @@ def weather_alerts_partial(request, location_id: int | uuid.UUID):
     return render(request, "django_owm/partials/weather_alerts.html", context)
 
 
-def weather_errors_partial(request, location_id: int | uuid.UUID):
+async def weather_errors_partial(request, location_id: int | uuid.UUID):
     """Partial view to display weather errors for a location inside weather_detail.html."""
-    WeatherLocationModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherLocation"))
-    WeatherErrorLogModel = apps.get_model(OWM_MODEL_MAPPINGS.get("WeatherErrorLog"))
-
-    if OWM_USE_UUID:
-        location = get_object_or_404(WeatherLocationModel, uuid=location_id)
-    else:
-        location = get_object_or_404(WeatherLocationModel, pk=location_id)
+    location = await aget_location(location_id)
 
-    errors = WeatherErrorLogModel.objects.filter(location=location).order_by("-timestamp")
-    paginator = Paginator(errors, 5)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+    page_obj = await aget_page(errors_queryset(location), request.GET.get("page", 1))
 
     context = {
         "location": location,
@@ -300,3 +302,28 @@ def weather_errors_partial(request, location_id: int | uuid.UUID):
     }
 
     return render(request, "django_owm/partials/weather_errors.html", context)
+
+
+async def weather_dashboard_partial(request, location_id: int | uuid.UUID):
+    """Partial view to display every weather panel for a location inside weather_detail.html in one request."""
+    location = await aget_location(location_id)
+
+    dashboard = await aget_dashboard(
+        location,
+        history_page=request.GET.get("history_page", 1),
+        hourly_page=request.GET.get("hourly_page", 1),
+        daily_page=request.GET.get("daily_page", 1),
+        alerts_page=request.GET.get("alerts_page", 1),
+        errors_page=request.GET.get("errors_page", 1),
+    )
+
+    context = {
+        "location": location,
+        "history_page_obj": dashboard.history_page,
+        "hourly_page_obj": dashboard.hourly_page,
+        "daily_page_obj": dashboard.daily_page,
+        "alerts_page_obj": dashboard.alerts_page,
+        "errors_page_obj": dashboard.errors_page,
+    }
+
+    return render(request, "django_owm/partials/weather_dashboard.html", context)